@@ -0,0 +1,267 @@
+"""
+Startup time and cache memory of the full and lean cache modes (CACHE_MODE).
+
+Drives discord.py's real connection state offline: a READY and a
+GUILD_CREATE per guild, member chunks answering the chunk requests (full
+mode chunks every guild before READY completes; the gateway round trip and
+per-chunk delivery time are simulated), then a stream of MESSAGE_CREATEs.
+Memory is what the Python allocator holds for the caches afterwards
+(tracemalloc, in a second run of each mode so tracing doesn't skew the
+timings), so the modes are comparable on any machine.
+
+Usage (from the bot directory):
+    python -m benchmarks.cache_modes [--guilds N] [--members N] [--messages N] [--json results.json]
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import random
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+import discord
+
+from utils.cache_mode import CACHE_MODES, cache_options
+
+BOT_ID = 100_000_000_000_000_000
+GUILD_ID_BASE = 200_000_000_000_000_000
+CHANNEL_ID_BASE = 300_000_000_000_000_000
+USER_ID_BASE = 400_000_000_000_000_000
+MESSAGE_ID_BASE = 500_000_000_000_000_000
+
+# Members per GUILD_MEMBERS_CHUNK, as Discord sends them
+CHUNK_SIZE = 1000
+
+
+def user_payload(user_id: int, bot: bool = False) -> Dict[str, Any]:
+    return {
+        'id': str(user_id),
+        'username': f'user{user_id % 100000}',
+        'global_name': f'User {user_id % 100000}',
+        'discriminator': '0',
+        'avatar': f'{user_id:032x}'[-32:],
+        'bot': bot
+    }
+
+
+def member_payload(user_id: int, guild_id: int, bot: bool = False) -> Dict[str, Any]:
+    return {
+        'user': user_payload(user_id, bot),
+        'roles': [str(guild_id + 1), str(guild_id + 2)],
+        'joined_at': '2024-01-01T00:00:00+00:00',
+        'deaf': False,
+        'mute': False,
+        'flags': 0
+    }
+
+
+def guild_payload(guild_id: int, member_count: int) -> Dict[str, Any]:
+    """GUILD_CREATE without the presences intent: only the bot's own member is included."""
+    roles = [
+        {'id': str(guild_id + offset), 'name': name, 'permissions': '0', 'position': offset, 'color': 0,
+         'hoist': False, 'managed': False, 'mentionable': False}
+        for offset, name in enumerate(('@everyone', 'member', 'mod'))
+    ]
+    return {
+        'id': str(guild_id),
+        'name': f'guild-{guild_id % 1000}',
+        'owner_id': str(USER_ID_BASE),
+        'member_count': member_count + 1,
+        'large': member_count >= 250,
+        'unavailable': False,
+        'roles': roles,
+        'emojis': [],
+        'stickers': [],
+        'features': [],
+        'channels': [
+            {'id': str(CHANNEL_ID_BASE + guild_id % 1000), 'type': 0, 'name': 'general', 'position': 0,
+             'permission_overwrites': []}
+        ],
+        'threads': [],
+        'members': [member_payload(BOT_ID, guild_id, bot=True)],
+        'voice_states': [],
+        'presences': []
+    }
+
+
+def message_payload(message_id: int, guild_id: int, user_id: int) -> Dict[str, Any]:
+    member = member_payload(user_id, guild_id)
+    author = member.pop('user')
+    return {
+        'id': str(message_id),
+        'channel_id': str(CHANNEL_ID_BASE + guild_id % 1000),
+        'guild_id': str(guild_id),
+        'author': author,
+        'member': member,
+        'content': f'look at this https://x.com/someuser/status/{message_id}',
+        'timestamp': '2024-06-01T12:00:00+00:00',
+        'edited_timestamp': None,
+        'tts': False,
+        'mention_everyone': False,
+        'mentions': [],
+        'mention_roles': [],
+        'attachments': [],
+        'embeds': [],
+        'pinned': False,
+        'type': 0
+    }
+
+
+def guild_members(guild_id: int, members: int) -> List[int]:
+    offset = (guild_id - GUILD_ID_BASE) * members
+    return [USER_ID_BASE + offset + index for index in range(members)]
+
+
+async def run_mode(mode: str, args: argparse.Namespace, trace_memory: bool = False) -> Dict[str, Any]:
+    """Start a client in a cache mode on synthetic gateway events and measure it (memory only when tracing)."""
+    rng = random.Random(args.seed)
+    guild_ids = [GUILD_ID_BASE + index for index in range(args.guilds)]
+    intents = discord.Intents.default()
+    intents.message_content = True
+    intents.members = True
+
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+    client = discord.Client(intents=intents, guild_ready_timeout=args.guild_ready_timeout, **cache_options(mode))
+    async with client:
+        state = client._connection
+        chunk_requests = 0
+        # A shard's chunks all arrive over its one websocket, one after another
+        websocket = asyncio.Lock()
+
+        async def deliver_chunks(guild_id: int, nonce: str):
+            user_ids = guild_members(guild_id, args.members)
+            chunk_count = max(1, -(-len(user_ids) // CHUNK_SIZE))
+            await asyncio.sleep(args.gateway_latency_ms / 1000)
+            async with websocket:
+                await deliver(guild_id, nonce, user_ids, chunk_count)
+
+        async def deliver(guild_id: int, nonce: str, user_ids: List[int], chunk_count: int):
+            for index in range(chunk_count):
+                state.parse_guild_members_chunk({
+                    'guild_id': str(guild_id),
+                    'members': [
+                        member_payload(user_id, guild_id)
+                        for user_id in user_ids[index * CHUNK_SIZE:(index + 1) * CHUNK_SIZE]
+                    ],
+                    'chunk_index': index,
+                    'chunk_count': chunk_count,
+                    'nonce': nonce
+                })
+                await asyncio.sleep(args.chunk_ms / 1000)
+
+        async def chunker(guild_id: int, query: str = '', limit: int = 0, presences: bool = False, *, nonce=None):
+            nonlocal chunk_requests
+            chunk_requests += 1
+            asyncio.ensure_future(deliver_chunks(guild_id, nonce))
+
+        # Chunk requests go to the simulated gateway instead of a websocket
+        state.chunker = chunker
+
+        started = time.monotonic()
+        cpu_started = time.process_time()
+        ready = asyncio.ensure_future(client.wait_for('ready'))
+        state.parse_ready({
+            'v': 10,
+            'user': user_payload(BOT_ID, bot=True),
+            'guilds': [{'id': str(guild_id), 'unavailable': True} for guild_id in guild_ids],
+            'session_id': 'benchmark',
+            'resume_gateway_url': 'wss://gateway.invalid',
+            'application': {'id': str(BOT_ID), 'flags': 0}
+        })
+        for guild_id in guild_ids:
+            state.parse_guild_create(guild_payload(guild_id, args.members))
+        await ready
+        startup_seconds = time.monotonic() - started
+        startup_cpu_seconds = time.process_time() - cpu_started
+
+        members = {guild_id: guild_members(guild_id, args.members) for guild_id in guild_ids}
+        messages = []
+        for index in range(args.messages):
+            guild_id = rng.choice(guild_ids)
+            messages.append(message_payload(MESSAGE_ID_BASE + index, guild_id, rng.choice(members[guild_id])))
+        del members
+        message_started = time.process_time()
+        for payload in messages:
+            state.parse_message_create(payload)
+        message_cpu_seconds = time.process_time() - message_started
+        # Let the dispatched on_message tasks finish before measuring
+        await asyncio.sleep(0)
+
+        del messages
+        gc.collect()
+        memory = tracemalloc.get_traced_memory()[0] if trace_memory else 0
+        results = {
+            'mode': mode,
+            'startup_seconds': round(startup_seconds, 3),
+            # Excludes the guild_ready_timeout both modes wait after the last GUILD_CREATE
+            'startup_after_guilds_seconds': round(max(0.0, startup_seconds - args.guild_ready_timeout), 3),
+            'startup_cpu_seconds': round(startup_cpu_seconds, 3),
+            'message_cpu_us': round(message_cpu_seconds / max(1, args.messages) * 1e6, 1),
+            'chunk_requests': chunk_requests,
+            'cached_members': sum(len(guild.members) for guild in client.guilds),
+            'cached_messages': len(client.cached_messages),
+            'memory_mb': round(memory / 1024 / 1024, 2)
+        }
+    del client
+    if trace_memory:
+        tracemalloc.stop()
+    return results
+
+
+def measure(mode: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """Timings from an untraced run of a mode, memory from a traced one."""
+    results = asyncio.run(run_mode(mode, args))
+    results['memory_mb'] = asyncio.run(run_mode(mode, args, trace_memory=True))['memory_mb']
+    return results
+
+
+def print_report(results: List[Dict[str, Any]], args: argparse.Namespace):
+    """Print the modes side by side."""
+    print(f'{args.guilds} guilds x {args.members} members, {args.messages} messages')
+    rows = [
+        ('Startup', lambda r: f'{r["startup_seconds"]:.2f}s'),
+        ('  after guilds', lambda r: f'{r["startup_after_guilds_seconds"]:.2f}s'),
+        ('  CPU', lambda r: f'{r["startup_cpu_seconds"]:.2f}s'),
+        ('Chunk requests', lambda r: str(r['chunk_requests'])),
+        ('Cached members', lambda r: str(r['cached_members'])),
+        ('Cached messages', lambda r: str(r['cached_messages'])),
+        ('Cache memory', lambda r: f'{r["memory_mb"]:.1f} MB'),
+        ('CPU/message', lambda r: f'{r["message_cpu_us"]:.0f}us')
+    ]
+    print(f'{"":<18}' + ''.join(f'{r["mode"]:>12}' for r in results))
+    for label, fmt in rows:
+        print(f'{label:<18}' + ''.join(f'{fmt(r):>12}' for r in results))
+
+
+def main():
+    """Parse arguments, run each cache mode and report."""
+    parser = argparse.ArgumentParser(description='GFC Bot cache mode startup/memory benchmark')
+    parser.add_argument('--mode', choices=CACHE_MODES, action='append', help='Mode to run (default: all)')
+    parser.add_argument('--guilds', type=int, default=10, help='Guilds (default: 10)')
+    parser.add_argument('--members', type=int, default=5000, help='Members per guild (default: 5000)')
+    parser.add_argument('--messages', type=int, default=5000, help='Messages after startup (default: 5000)')
+    parser.add_argument('--gateway-latency-ms', type=float, default=50, help='Chunk request round trip (default: 50)')
+    parser.add_argument('--chunk-ms', type=float, default=20, help='Delivery time per member chunk (default: 20)')
+    parser.add_argument(
+        '--guild-ready-timeout', type=float, default=0.1,
+        help="Wait for more GUILD_CREATEs before READY (discord.py's default: 2)"
+    )
+    parser.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+    parser.add_argument('--json', help='Write the results to this file')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    results = [measure(mode, args) for mode in (args.mode or CACHE_MODES)]
+    print_report(results, args)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
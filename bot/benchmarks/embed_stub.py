@@ -0,0 +1,160 @@
+"""
+Local stand-in for the embed prefix services, the metadata provider and the
+backend config API.
+
+EmbedStub runs an aiohttp server on 127.0.0.1. RoutedSession wraps the
+bot's shared ClientSession and sends every request to the stub, passing the
+original host in a header, so the cogs run unmodified against it.
+"""
+import asyncio
+import random
+from collections import defaultdict
+from typing import Dict, Any, Optional
+
+import aiohttp
+from aiohttp import web
+from yarl import URL
+
+ORIGINAL_HOST_HEADER = 'X-Bench-Host'
+
+EMBED_PAGE = (
+    '<html><head>'
+    '<meta property="og:title" content="Benchmark post">'
+    '<meta property="og:description" content="Served by the benchmark embed stub">'
+    '<meta property="og:image" content="https://example.invalid/media.jpg">'
+    '</head><body></body></html>'
+)
+
+
+class EmbedStub:
+    """
+    Fake embed services with configurable latency, error rate and HEAD support.
+
+    Requests are dispatched on the original host: /api/bot/... paths serve
+    the guild embed config, api.* hosts serve FxTwitter-style metadata and
+    every other host behaves like an embed prefix service.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.08,
+        jitter: float = 0.04,
+        error_rate: float = 0.0,
+        head_405: bool = False,
+        config: Optional[Dict[str, Any]] = None,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize embed stub.
+
+        Args:
+            latency: Mean response latency of embed and metadata hosts in seconds
+            jitter: Uniform +/- jitter added to the latency in seconds
+            error_rate: Fraction of embed requests answered with HTTP 503
+            head_405: Answer HEAD with 405 so validations fall back to a bounded GET
+            config: Overrides merged into the guild embed config served to the cogs
+            seed: Random seed for reproducible runs
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.head_405 = head_405
+        self.config = config or {}
+        self.random = random.Random(seed)
+        self.requests: Dict[str, int] = defaultdict(int)  # 'kind METHOD' -> count
+        self.runner: Optional[web.AppRunner] = None
+        self.url: Optional[URL] = None
+
+    @property
+    def request_count(self) -> int:
+        """Total requests served."""
+        return sum(self.requests.values())
+
+    async def start(self):
+        """Start serving on an ephemeral local port."""
+        app = web.Application()
+        app.router.add_route('*', '/{tail:.*}', self._handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        self.url = URL(f'http://127.0.0.1:{port}')
+
+    async def close(self):
+        """Stop the server."""
+        if self.runner:
+            await self.runner.cleanup()
+
+    async def _delay(self):
+        await asyncio.sleep(max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter)))
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        host = request.headers.get(ORIGINAL_HOST_HEADER, request.host)
+        if request.path.startswith('/api/bot/'):
+            self.requests[f'config {request.method}'] += 1
+            return web.json_response(self._guild_config())
+        if host.startswith('api.'):
+            self.requests[f'metadata {request.method}'] += 1
+            await self._delay()
+            return web.json_response({
+                'tweet': {
+                    'text': 'Benchmark post',
+                    'author': {'name': 'Benchmark', 'screen_name': 'bench'},
+                    'media': {'photos': [{'url': 'https://example.invalid/media.jpg'}]}
+                }
+            })
+        self.requests[f'embed {request.method}'] += 1
+        await self._delay()
+        if self.random.random() < self.error_rate:
+            return web.Response(status=503)
+        if request.method == 'HEAD' and self.head_405:
+            return web.Response(status=405)
+        return web.Response(text=EMBED_PAGE, content_type='text/html')
+
+    def _guild_config(self) -> Dict[str, Any]:
+        config = {
+            'webhook_repost_enabled': False,
+            'suppress_original_embed': True,
+            'reaction_enabled': True,
+            'reaction_emoji': '🙏'
+        }
+        config.update(self.config)
+        return config
+
+
+class RoutedSession:
+    """
+    ClientSession proxy that sends every request to the embed stub.
+
+    The request URL's path and query are kept and its host is passed in a
+    header; everything else (closing, trace hooks, the connector) is the
+    wrapped session's.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, stub_url: URL):
+        self._session = session
+        self._stub_url = stub_url
+
+    def _route(self, url, kwargs: Dict[str, Any]):
+        url = URL(str(url))
+        headers = dict(kwargs.pop('headers', None) or {})
+        headers[ORIGINAL_HOST_HEADER] = url.host or ''
+        kwargs['headers'] = headers
+        return self._stub_url.with_path(url.path).with_query(url.query)
+
+    def get(self, url, **kwargs):
+        return self._session.get(self._route(url, kwargs), **kwargs)
+
+    def head(self, url, **kwargs):
+        return self._session.head(self._route(url, kwargs), **kwargs)
+
+    def post(self, url, **kwargs):
+        return self._session.post(self._route(url, kwargs), **kwargs)
+
+    def request(self, method: str, url, **kwargs):
+        return self._session.request(method, self._route(url, kwargs), **kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self._session, name)
+
@@ -0,0 +1,141 @@
+"""
+In-process stand-ins for Discord objects used by the benchmarks, and a
+counting proxy for the in-memory database backend.
+
+The fakes implement only what the embed cogs touch. Every Discord REST call
+(reply, edit, reaction) and every database query sleeps for a configurable
+round trip and is counted, so a run reports realistic per-link costs
+without a Discord connection or a Postgres server.
+"""
+import asyncio
+import itertools
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+import discord
+
+_ids = itertools.count()
+
+
+def next_snowflake() -> int:
+    """A unique snowflake for the current time."""
+    return discord.utils.time_snowflake(datetime.now(timezone.utc)) + next(_ids) % 4096
+
+
+class FakeUser:
+    """Message author."""
+
+    def __init__(self, user_id: int, name: str, bot: bool = False):
+        self.id = user_id
+        self.name = name
+        self.bot = bot
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class FakeGuild:
+    """Guild without custom emojis."""
+
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+        self.emojis: List[Any] = []
+
+
+class FakeChannel:
+    """Plain messageable channel (not a discord.TextChannel, so webhook reposts fall back to replies)."""
+
+    def __init__(self, channel_id: int, guild: FakeGuild, name: str):
+        self.id = channel_id
+        self.guild = guild
+        self.name = name
+
+
+class FakeMessage:
+    """
+    Message delivered to the cogs.
+
+    Replies, edits and reactions wait for the simulated REST latency and
+    record when they happened, which is what time-to-embed is measured against.
+    """
+
+    def __init__(self, content: str, channel: FakeChannel, author: FakeUser, rest_latency: float = 0.0):
+        self.id = next_snowflake()
+        self.content = content
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.reference = None
+        self.rest_latency = rest_latency
+        self.created = time.monotonic()
+        self.replies: List[tuple] = []  # (monotonic time, content, embed)
+        self.reactions: List[Any] = []
+        self.suppressed = False
+        self.deleted = False
+        self.rest_calls = 0
+
+    async def _rest(self):
+        self.rest_calls += 1
+        await asyncio.sleep(self.rest_latency)
+
+    async def reply(self, content: Optional[str] = None, *, embed: Optional[discord.Embed] = None, **kwargs) -> 'FakeMessage':
+        await self._rest()
+        reply = FakeMessage(content or '', self.channel, FakeUser(0, 'gfcbot', bot=True), self.rest_latency)
+        self.replies.append((time.monotonic(), content, embed))
+        return reply
+
+    async def edit(self, *, content: Optional[str] = None, suppress: Optional[bool] = None, **kwargs):
+        await self._rest()
+        if content is not None:
+            self.content = content
+        if suppress is not None:
+            self.suppressed = suppress
+
+    async def add_reaction(self, emoji):
+        await self._rest()
+        self.reactions.append(emoji)
+
+    async def delete(self):
+        await self._rest()
+        self.deleted = True
+
+
+class CountingDatabase:
+    """
+    Storage backend proxy that counts each query method call and waits for a
+    simulated round trip before running it.
+
+    Wraps the in-memory backend (utils/memory_database.py) so the pipeline
+    sees the same semantics as with Postgres; other attributes (the backend's
+    tables, seed helpers) are the wrapped database's.
+    """
+
+    def __init__(self, db: Any, latency: float = 0.0):
+        """
+        Initialize counting proxy.
+
+        Args:
+            db: Wrapped storage backend
+            latency: Simulated round trip per query in seconds
+        """
+        self.db = db
+        self.latency = latency
+        self.queries: Dict[str, int] = defaultdict(int)
+
+    @property
+    def query_count(self) -> int:
+        """Total queries issued."""
+        return sum(self.queries.values())
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.db, name)
+        if name in ('connect', 'close') or not asyncio.iscoroutinefunction(attr):
+            return attr
+
+        async def query(*args, **kwargs):
+            self.queries[name] += 1
+            await asyncio.sleep(self.latency)
+            return await attr(*args, **kwargs)
+        return query
@@ -0,0 +1,259 @@
+"""
+Microbenchmarks of the per-message hot-path primitives.
+
+Each case is timed with timeit (async cases inside one event loop) and
+reported as the per-call cost. Runs can be saved under a name and a later
+run compared against it, to see the cost of a change before and after.
+
+Usage (from the bot directory):
+    python -m benchmarks.micro [--filter TEXT] [--save NAME] [--compare NAME]
+
+Saved runs are JSON files in bot/.benchmarks/.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+import timeit
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from cogs.instagram_embed import InstagramEmbed, INSTAGRAM_URL_PATTERN, INSTAGRAM_SHARE_PATTERN
+from cogs.twitter_embed import TwitterEmbed, TWITTER_URL_PATTERN, TWITTER_SHORT_LINK_PATTERN
+from utils.database import encode_json
+from utils.embed_policy import GuildEmbedPolicy
+from utils.feature_manager import FeatureManager
+from benchmarks.fakes import FakeGuild
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.benchmarks')
+
+# Target duration of one timing repeat
+REPEAT_SECONDS = 0.2
+
+# Messages as they show up in busy servers: mostly chatter of varied length, some links
+CORPUS = [
+    'lol',
+    'gm everyone',
+    'did anyone watch the game last night? that last quarter was unreal',
+    'https://x.com/someuser/status/1790000000000000000',
+    'look at this https://twitter.com/someuser/status/1790000000000000001?s=20&t=AbCdEf',
+    'https://www.instagram.com/p/C7xYzAbCdEf/?igsh=MWQ1ZGUxMzBkMA==',
+    'https://www.instagram.com/reel/C7xYzAbCdEg/',
+    'check https://t.co/AbCdEf1234 and https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+    'https://fxtwitter.com/someuser/status/1790000000000000002',
+    '```python\nfor i in range(10):\n    print(i)\n```',
+    'https://www.reddit.com/r/soccer/comments/abc123/match_thread/',
+    ' '.join(['this is a long message that rambles on about nothing in particular'] * 12),
+    'ok',
+    '<@123456789012345678> you coming tonight?',
+    'https://instagram.com/share/BAbCdEf123',
+    'no link here, just :custom_emoji: and 🎉🎉🎉'
+]
+
+EMBED_CONFIGS = [
+    {'prefix': 'fx', 'embed_type': 'prefix'},
+    {'prefix': 'vx', 'embed_type': 'prefix'},
+    {'prefix': 'fixupx.com', 'embed_type': 'replacement'}
+]
+
+AUDIT_DETAILS = {
+    'original_url': 'https://x.com/someuser/status/1790000000000000000',
+    'embedded_url': 'https://fxx.com/someuser/status/1790000000000000000',
+    'prefix_used': 'fx',
+    'message_id': 1234567890123456789
+}
+
+
+class Case:
+    """A named microbenchmark: a callable, or a coroutine function when is_async."""
+
+    def __init__(self, name: str, func: Callable, is_async: bool = False, per_call: int = 1):
+        """
+        Initialize case.
+
+        Args:
+            name: Case name
+            func: Function timed with no arguments
+            is_async: Whether func returns a coroutine
+            per_call: Operations per call of func (per-call cost is divided by this)
+        """
+        self.name = name
+        self.func = func
+        self.is_async = is_async
+        self.per_call = per_call
+
+
+def build_cases() -> List[Case]:
+    """Create the cogs and fixtures and return every case."""
+    bot = SimpleNamespace()
+    instagram = InstagramEmbed(bot)
+    twitter = TwitterEmbed(bot)
+
+    guild = FakeGuild(1000)
+    guild.emojis = [SimpleNamespace(name=f'emoji_{index}') for index in range(200)]
+
+    # Config cache hit (the common case: configs are cached for 30 seconds per guild)
+    now = datetime.utcnow().timestamp()
+    twitter.config_cache[guild.id] = {'config': {'reaction_enabled': True}, 'fetched_at': now + 3600}
+    instagram.config_cache[guild.id] = {'config': {'reaction_enabled': True}, 'fetched_at': now + 3600}
+
+    # Compiled embed policies (what the cogs evaluate per link)
+    policy_config = {'reaction_enabled': True, 'reaction_emoji': ':emoji_150:'}
+    twitter_policy = GuildEmbedPolicy('twitter', guild, policy_config, EMBED_CONFIGS)
+    instagram_policy = GuildEmbedPolicy('instagram', guild, policy_config, EMBED_CONFIGS)
+
+    # Permission check cache hit
+    feature_manager = FeatureManager(db=None, cache_enabled=True)  # type: ignore
+    feature_manager.cache['1000:1,2,3:instagram_embed:manage'] = True
+    feature_manager.last_cache_update = datetime.utcnow() + timedelta(days=1)
+
+    def scan_twitter():
+        for content in CORPUS:
+            TWITTER_URL_PATTERN.search(content) or TWITTER_SHORT_LINK_PATTERN.search(content)
+
+    def scan_instagram():
+        for content in CORPUS:
+            INSTAGRAM_URL_PATTERN.search(content) or INSTAGRAM_SHARE_PATTERN.search(content)
+
+    embedded_url = 'https://fxtwitter.com/someuser/status/1790000000000000002'
+    plain_url = 'https://x.com/someuser/status/1790000000000000000'
+
+    return [
+        Case('url_scan.twitter', scan_twitter, per_call=len(CORPUS)),
+        Case('url_scan.instagram', scan_instagram, per_call=len(CORPUS)),
+        Case('already_embedded.twitter.miss', lambda: twitter_policy.is_already_embedded(plain_url)),
+        Case('already_embedded.twitter.hit', lambda: twitter_policy.is_already_embedded(embedded_url)),
+        Case(
+            'already_embedded.instagram.miss',
+            lambda: instagram_policy.is_already_embedded('https://www.instagram.com/p/C7xYzAbCdEf/')
+        ),
+        Case(
+            'permission_check.cache_hit',
+            lambda: feature_manager.check_permission(1000, [1, 2, 3], 'instagram_embed', 'manage'),
+            is_async=True
+        ),
+        Case('config_cache.twitter', lambda: twitter.get_twitter_embed_config(guild.id), is_async=True),
+        Case('config_cache.instagram', lambda: instagram.get_instagram_embed_config(guild.id), is_async=True),
+        Case('embed_rewrite.twitter', lambda: [embed.apply(plain_url) for embed in twitter_policy.embeds],
+             per_call=len(EMBED_CONFIGS)),
+        Case('embed_policy.reaction_emoji', lambda: twitter_policy.reaction_emoji if twitter_policy.reaction_enabled else None),
+        Case('embed_policy.compile', lambda: GuildEmbedPolicy('twitter', guild, policy_config, EMBED_CONFIGS)),
+        Case('audit_details.encode', lambda: encode_json(AUDIT_DETAILS))
+    ]
+
+
+def time_sync(func: Callable, repeat: int) -> List[float]:
+    """Seconds per call of a function over each repeat."""
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * REPEAT_SECONDS / max(elapsed, 1e-9)))
+    return [elapsed / number for elapsed in timer.repeat(repeat=repeat, number=number)]
+
+
+def time_async(func: Callable[[], Awaitable], repeat: int) -> List[float]:
+    """Seconds per call of a coroutine function over each repeat, awaited back to back in one loop."""
+    async def run(number: int) -> float:
+        started = time.perf_counter()
+        for _ in range(number):
+            await func()
+        return time.perf_counter() - started
+
+    async def measure() -> List[float]:
+        number = 1
+        while (elapsed := await run(number)) < REPEAT_SECONDS / 10:
+            number *= 10
+        number = max(1, int(number * REPEAT_SECONDS / max(elapsed, 1e-9)))
+        return [await run(number) / number for _ in range(repeat)]
+
+    return asyncio.run(measure())
+
+
+def run_cases(cases: List[Case], repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    Time every case.
+
+    Returns:
+        Case name -> best and median nanoseconds per operation
+    """
+    results = {}
+    for case in cases:
+        timings = time_async(case.func, repeat) if case.is_async else time_sync(case.func, repeat)
+        per_op = [timing / case.per_call * 1e9 for timing in timings]
+        results[case.name] = {'best_ns': round(min(per_op), 1), 'median_ns': round(statistics.median(per_op), 1)}
+    return results
+
+
+def results_path(name: str) -> str:
+    """File of a saved run."""
+    return os.path.join(RESULTS_DIR, f'micro-{name}.json')
+
+
+def print_results(results: Dict[str, Dict[str, float]], baseline: Optional[Dict[str, Dict[str, float]]] = None):
+    """Print per-call costs, with the change against a baseline when given."""
+    width = max(len(name) for name in results)
+    header = f'{"case".ljust(width)}  {"best":>10}  {"median":>10}'
+    if baseline:
+        header += f'  {"baseline":>10}  {"change":>8}'
+    print(header)
+    for name, result in results.items():
+        line = f'{name.ljust(width)}  {format_ns(result["best_ns"]):>10}  {format_ns(result["median_ns"]):>10}'
+        previous = (baseline or {}).get(name)
+        if previous:
+            change = (result['best_ns'] - previous['best_ns']) / previous['best_ns']
+            line += f'  {format_ns(previous["best_ns"]):>10}  {change:>+8.1%}'
+        print(line)
+
+
+def format_ns(value: float) -> str:
+    """Human-readable duration of a nanosecond count."""
+    if value >= 1e6:
+        return f'{value / 1e6:.2f}ms'
+    if value >= 1e3:
+        return f'{value / 1e3:.2f}µs'
+    return f'{value:.0f}ns'
+
+
+def main():
+    """Parse arguments, run the cases and save or compare the results."""
+    parser = argparse.ArgumentParser(description='GFC Bot hot-path microbenchmarks')
+    parser.add_argument('--filter', help='Only run cases whose name contains this text')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repeats per case (default: 5)')
+    parser.add_argument('--save', metavar='NAME', help='Save the results under this name')
+    parser.add_argument('--compare', metavar='NAME', help='Compare against the results saved under this name')
+    args = parser.parse_args()
+
+    # Missing custom emojis log a warning per call; keep log output (and its I/O) out of the timings
+    logging.disable(logging.WARNING)
+    cases = [case for case in build_cases() if not args.filter or args.filter in case.name]
+    if not cases:
+        print(f'No cases match "{args.filter}"')
+        sys.exit(1)
+
+    baseline = None
+    if args.compare:
+        with open(results_path(args.compare)) as f:
+            baseline = json.load(f)['results']
+
+    results = run_cases(cases, args.repeat)
+    print_results(results, baseline)
+
+    if args.save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        with open(results_path(args.save), 'w') as f:
+            json.dump({
+                'saved_at': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'results': results
+            }, f, indent=2)
+        print(f'Saved to {results_path(args.save)}')
+
+
+if __name__ == '__main__':
+    main()
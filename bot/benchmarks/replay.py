@@ -0,0 +1,387 @@
+"""
+End-to-end replay benchmark of the link pipeline.
+
+Feeds a synthetic or recorded message stream through the Instagram and
+Twitter cogs' on_message at a configurable rate. Discord is faked in-process
+(benchmarks/fakes.py), the database is the in-memory backend with a
+simulated round trip and every HTTP request the pipeline makes goes to a
+local embed service stub (benchmarks/embed_stub.py).
+
+Reports links/sec, p50/p95/p99 time-to-embed, DB queries, HTTP requests
+and Discord REST calls per link, and event loop lag and CPU time (compare
+the default loop against --uvloop). With --baseline, exits non-zero when a
+metric regressed by more than --max-regression against an earlier --json run.
+
+Usage (from the bot directory):
+    python -m benchmarks.replay [--messages N] [--rate R] [--head-405] ...
+    python -m benchmarks.replay --input stream.jsonl --json results.json
+    python -m benchmarks.replay --baseline results.json
+
+A recorded stream is JSON lines with a "content" field and optional
+"guild_id", "channel_id", "author_id" and "offset" (seconds since the first
+message; without it messages arrive at --rate).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger('gfcbot.benchmarks.replay')
+
+# Embed prefixes seeded for every guild, in priority order
+TWITTER_PREFIXES = ['fx', 'vx']
+INSTAGRAM_PREFIXES = ['dd', 'kk']
+
+# Metrics compared against a baseline, and whether higher is better
+BASELINE_METRICS = {
+    'links_per_sec': True,
+    'time_to_embed_p95': False,
+    'db_queries_per_link': False,
+    'http_requests_per_link': False
+}
+
+
+def synthetic_stream(args) -> List[Dict[str, Any]]:
+    """
+    Generate a message stream with Poisson arrivals.
+
+    Mixes Twitter/X and Instagram links (with tracking parameters and host
+    variants), links already using an embed prefix, reposts of earlier
+    links and plain chatter.
+    """
+    rng = random.Random(args.seed)
+    guilds = [1000 + index for index in range(args.guilds)]
+    posted: List[tuple] = []  # (guild_id, channel_id, content)
+    events = []
+    offset = 0.0
+    for index in range(args.messages):
+        offset += rng.expovariate(args.rate)
+        guild_id = rng.choice(guilds)
+        channel_id = guild_id * 100 + rng.randrange(args.channels)
+        if rng.random() >= args.link_ratio:
+            content = f'just chatting #{index}'
+        elif posted and rng.random() < args.duplicate_ratio:
+            guild_id, channel_id, content = rng.choice(posted)
+        elif rng.random() < args.embedded_ratio:
+            content = f'https://fxtwitter.com/user{index}/status/{10 ** 18 + index}'
+        else:
+            if rng.random() < 0.5:
+                host = rng.choice(['x.com', 'twitter.com', 'mobile.twitter.com'])
+                content = f'look https://{host}/user{index}/status/{10 ** 18 + index}?s=20&t=abc'
+            else:
+                content = f'https://www.instagram.com/{rng.choice(["p", "reel"])}/Bench{index}/?igsh=xyz'
+            posted.append((guild_id, channel_id, content))
+        events.append({
+            'content': content,
+            'guild_id': guild_id,
+            'channel_id': channel_id,
+            'author_id': 5000 + rng.randrange(50),
+            'offset': offset
+        })
+    return events
+
+
+def load_stream(path: str, args) -> List[Dict[str, Any]]:
+    """Load a recorded message stream, spacing messages without an offset at --rate."""
+    rng = random.Random(args.seed)
+    events = []
+    offset = 0.0
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            event = json.loads(line)
+            if 'offset' in event:
+                offset = float(event['offset']) / args.speed
+            else:
+                offset += rng.expovariate(args.rate)
+            event.setdefault('guild_id', 1000)
+            event.setdefault('channel_id', event['guild_id'] * 100)
+            event.setdefault('author_id', 5000)
+            event['offset'] = offset
+            events.append(event)
+    return events
+
+
+async def run_benchmark(events: List[Dict[str, Any]], args) -> Dict[str, Any]:
+    """
+    Replay a message stream through the cogs and measure the pipeline.
+
+    Args:
+        events: Messages to deliver (content, guild_id, channel_id, author_id, offset)
+        args: Parsed command-line arguments
+
+    Returns:
+        Results dict
+    """
+    # Imported after main() set the environment: modules read their configuration at import time
+    import discord
+    from discord.ext import commands
+    from utils.metrics import Metrics
+    from utils.prefix_health import PrefixHealth
+    from utils.single_flight import SingleFlight
+    from utils.http_client import HttpClient
+    from utils.link_resolver import LinkResolver
+    from utils.post_metadata import PostMetadataCache
+    from utils.retry_queue import RetryQueue
+    from utils.job_queue import JobQueue
+    from utils.task_supervisor import TaskSupervisor
+    from utils.discord_actions import DiscordExecutor
+    from utils.startup import StartupTimer
+    from utils.loop_monitor import LoopMonitor
+    from utils.diagnostics import EmbedLatency
+    from utils.feature_manager import FeatureManager
+    from utils.memory_database import MemoryDatabase
+    from cogs.instagram_embed import INSTAGRAM_URL_PATTERN
+    from cogs.twitter_embed import TWITTER_URL_PATTERN
+    from benchmarks.embed_stub import EmbedStub, RoutedSession
+    from benchmarks.fakes import FakeUser, FakeGuild, FakeChannel, FakeMessage, CountingDatabase
+
+    stub = EmbedStub(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        head_405=args.head_405,
+        config={'optimistic_posting_enabled': args.optimistic},
+        seed=args.seed
+    )
+    await stub.start()
+
+    db = CountingDatabase(MemoryDatabase(), latency=args.db_latency_ms / 1000)
+    feature_manager = FeatureManager(db=db)  # type: ignore
+    twitter_feature_id = db.add_feature('twitter_embed')
+    instagram_feature_id = db.add_feature('instagram_embed')
+    for guild_id in set(event['guild_id'] for event in events):
+        for priority, prefix in enumerate(TWITTER_PREFIXES):
+            db.add_embed_config(guild_id, twitter_feature_id, prefix, priority)
+        for priority, prefix in enumerate(INSTAGRAM_PREFIXES):
+            db.add_embed_config(guild_id, instagram_feature_id, prefix, priority)
+
+    # Same wiring as main.py, on the fakes
+    metrics = Metrics()
+    http_client = HttpClient(metrics=metrics)
+    await http_client.start()
+    http_client.session = RoutedSession(http_client.session, stub.url)  # type: ignore
+    bot = commands.Bot(command_prefix='!', intents=discord.Intents.default(), help_command=None)
+    bot.db = db  # type: ignore
+    bot.feature_manager = feature_manager  # type: ignore
+    bot.prefix_health = PrefixHealth()  # type: ignore
+    bot.metrics = metrics  # type: ignore
+    bot.validation_flight = SingleFlight('validation', metrics=metrics)  # type: ignore
+    bot.http_client = http_client  # type: ignore
+    bot.link_resolver = LinkResolver(http_client, db, metrics=metrics)  # type: ignore
+    bot.post_metadata = PostMetadataCache(http_client, db, metrics=metrics)  # type: ignore
+    bot.retry_queue = RetryQueue(db, metrics=metrics)  # type: ignore
+    bot.job_queue = JobQueue(db, metrics=metrics)  # type: ignore
+    bot.task_supervisor = TaskSupervisor(metrics=metrics)  # type: ignore
+    bot.discord_executor = DiscordExecutor(metrics=metrics)  # type: ignore
+    bot.startup = StartupTimer(metrics=metrics)  # type: ignore
+    bot.loop_monitor = LoopMonitor(metrics=metrics, interval=0.02)  # type: ignore
+    bot.embed_latency = EmbedLatency(metrics=metrics)  # type: ignore
+    await bot.load_extension('cogs.instagram_embed')
+    await bot.load_extension('cogs.twitter_embed')
+    listeners = [cog.on_message for cog in bot.cogs.values()]
+    # Only count the pipeline's queries, not the feature lookups at cog load
+    db.queries.clear()
+
+    guilds: Dict[int, FakeGuild] = {}
+    channels: Dict[int, FakeChannel] = {}
+    links: List[FakeMessage] = []
+    tasks = set()
+    bot.task_supervisor.start('loop_monitor', bot.loop_monitor.run)
+    started = time.monotonic()
+    cpu_started = time.process_time()
+    for event in events:
+        delay = started + event['offset'] - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        guild = guilds.setdefault(event['guild_id'], FakeGuild(event['guild_id']))
+        channel = channels.setdefault(
+            event['channel_id'],
+            FakeChannel(event['channel_id'], guild, f'channel-{event["channel_id"]}')
+        )
+        author = FakeUser(event['author_id'], f'user{event["author_id"]}')
+        message = FakeMessage(event['content'], channel, author, rest_latency=args.discord_latency_ms / 1000)
+        if TWITTER_URL_PATTERN.search(message.content) or INSTAGRAM_URL_PATTERN.search(message.content):
+            links.append(message)
+        # Like the gateway dispatch: every cog's listener runs as its own task
+        for listener in listeners:
+            task = asyncio.create_task(listener(message))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    sent = time.monotonic()
+
+    def settled(message: FakeMessage) -> bool:
+        return bool(message.id in db.message_data or message.reactions or message.replies)
+
+    deadline = sent + args.drain_timeout
+    while time.monotonic() < deadline and not all(settled(message) for message in links):
+        await asyncio.sleep(0.05)
+    finished = time.monotonic()
+    cpu_seconds = time.process_time() - cpu_started
+
+    await bot.task_supervisor.shutdown(grace=0)
+    for task in list(tasks):
+        task.cancel()
+    await http_client.close()
+    await stub.close()
+
+    outcomes: Counter = Counter()
+    latencies = Metrics(reservoir_size=max(1, len(links)))
+    for message in links:
+        row = db.message_data.get(message.id)
+        if row:
+            outcome = 'native' if row['embed_prefix_used'] == 'native' else row['validation_status']
+        elif message.reactions:
+            outcome = 'already_embedded'
+        elif message.replies:
+            outcome = 'duplicate'
+        else:
+            outcome = 'unsettled'
+        outcomes[outcome] += 1
+        if outcome in ('success', 'native') and message.replies:
+            latencies.observe('time_to_embed_seconds', message.replies[0][0] - message.created)
+
+    link_count = max(1, len(links))
+    embedded = outcomes['success'] + outcomes['native']
+    percentiles = latencies.percentiles('time_to_embed_seconds')
+    loop_lag = bot.loop_monitor.lag_percentiles()
+    return {
+        'messages': len(events),
+        'links': len(links),
+        'duration_seconds': round(finished - started, 3),
+        'send_seconds': round(sent - started, 3),
+        'links_per_sec': round(len(links) / max(finished - started, 1e-9), 2),
+        'embedded': embedded,
+        'time_to_embed_p50': percentiles[0.5],
+        'time_to_embed_p95': percentiles[0.95],
+        'time_to_embed_p99': percentiles[0.99],
+        'db_queries_per_link': round(db.query_count / link_count, 2),
+        'http_requests_per_link': round(stub.request_count / link_count, 2),
+        'discord_calls_per_link': round(sum(message.rest_calls for message in links) / link_count, 2),
+        'event_loop': type(asyncio.get_running_loop()).__module__.split('.')[0],
+        'loop_lag_p50': loop_lag.get(0.5),
+        'loop_lag_p99': loop_lag.get(0.99),
+        'loop_lag_max': round(bot.loop_monitor.max_lag, 6),
+        'cpu_ms_per_link': round(cpu_seconds * 1000 / link_count, 2),
+        'outcomes': dict(outcomes),
+        'db_queries': dict(sorted(db.queries.items())),
+        'http_requests': dict(sorted(stub.requests.items()))
+    }
+
+
+def print_report(results: Dict[str, Any]):
+    """Print a human-readable summary of a run."""
+    def ms(value: Optional[float]) -> str:
+        return f'{value * 1000:.0f}ms' if value is not None else 'n/a'
+
+    def ms_fine(value: Optional[float]) -> str:
+        return f'{value * 1000:.2f}ms' if value is not None else 'n/a'
+
+    print(f'Messages:            {results["messages"]} ({results["links"]} with links, sent in {results["send_seconds"]:.1f}s)')
+    print(f'Throughput:          {results["links_per_sec"]:.2f} links/sec over {results["duration_seconds"]:.1f}s')
+    print(
+        f'Time to embed:       p50 {ms(results["time_to_embed_p50"])}  '
+        f'p95 {ms(results["time_to_embed_p95"])}  p99 {ms(results["time_to_embed_p99"])}'
+    )
+    print(f'DB queries/link:     {results["db_queries_per_link"]:.2f}')
+    print(f'HTTP requests/link:  {results["http_requests_per_link"]:.2f}')
+    print(f'Discord calls/link:  {results["discord_calls_per_link"]:.2f}')
+    print(
+        f'Event loop lag:      p50 {ms_fine(results["loop_lag_p50"])}  p99 {ms_fine(results["loop_lag_p99"])}  '
+        f'max {ms_fine(results["loop_lag_max"])} ({results["event_loop"]})'
+    )
+    print(f'CPU/link:            {results["cpu_ms_per_link"]:.2f}ms')
+    print('Outcomes:            ' + ', '.join(f'{name}={count}' for name, count in sorted(results['outcomes'].items())))
+    print('DB queries:          ' + ', '.join(f'{name}={count}' for name, count in results['db_queries'].items()))
+    print('HTTP requests:       ' + ', '.join(f'{name}={count}' for name, count in results['http_requests'].items()))
+
+
+def compare_to_baseline(results: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """
+    Compare a run against a baseline run.
+
+    Returns:
+        Descriptions of the metrics that regressed by more than max_regression
+    """
+    regressions = []
+    for name, higher_is_better in BASELINE_METRICS.items():
+        current, previous = results.get(name), baseline.get(name)
+        if current is None or not previous:
+            continue
+        change = (current - previous) / previous
+        if (-change if higher_is_better else change) > max_regression:
+            regressions.append(f'{name}: {previous} -> {current} ({change:+.0%})')
+    return regressions
+
+
+def main():
+    """Parse arguments, run the benchmark and report."""
+    parser = argparse.ArgumentParser(description='GFC Bot link pipeline replay benchmark')
+    parser.add_argument('--input', help='Recorded message stream (JSON lines); synthetic if omitted')
+    parser.add_argument('--messages', type=int, default=300, help='Synthetic messages to send (default: 300)')
+    parser.add_argument('--rate', type=float, default=20, help='Mean messages per second (default: 20)')
+    parser.add_argument('--speed', type=float, default=1, help='Replay speed-up for recorded offsets (default: 1)')
+    parser.add_argument('--link-ratio', type=float, default=0.5, help='Fraction of synthetic messages with a link')
+    parser.add_argument('--duplicate-ratio', type=float, default=0.1, help='Fraction of links reposting an earlier link')
+    parser.add_argument('--embedded-ratio', type=float, default=0.05, help='Fraction of links already using a prefix')
+    parser.add_argument('--guilds', type=int, default=5, help='Synthetic guilds (default: 5)')
+    parser.add_argument('--channels', type=int, default=3, help='Synthetic channels per guild (default: 3)')
+    parser.add_argument('--latency-ms', type=float, default=80, help='Embed service latency (default: 80)')
+    parser.add_argument('--jitter-ms', type=float, default=40, help='Embed service latency jitter (default: 40)')
+    parser.add_argument('--error-rate', type=float, default=0.02, help='Fraction of embed requests failing with 503')
+    parser.add_argument('--head-405', action='store_true', help='Embed services reject HEAD with 405')
+    parser.add_argument('--optimistic', action='store_true', help='Enable optimistic posting in the guild config')
+    parser.add_argument('--db-latency-ms', type=float, default=1, help='Simulated database round trip (default: 1)')
+    parser.add_argument('--discord-latency-ms', type=float, default=60, help='Simulated Discord REST latency (default: 60)')
+    parser.add_argument(
+        '--pacing', type=float, default=0,
+        help='Pause between validations in seconds (VALIDATION_DELAY_SECONDS; production default 1.5, benchmark default 0)'
+    )
+    parser.add_argument('--drain-timeout', type=float, default=60, help='Seconds to wait for links after the last message')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+    parser.add_argument('--uvloop', action='store_true', help='Run on uvloop (USE_UVLOOP)')
+    parser.add_argument('--json', help='Write the results to this file')
+    parser.add_argument('--baseline', help='Fail if the run regressed against these results')
+    parser.add_argument('--max-regression', type=float, default=0.15, help='Allowed regression vs the baseline (default: 0.15)')
+    parser.add_argument('--verbose', action='store_true', help='Show the bot logs')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.ERROR,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    # Must be set before the bot modules read their configuration
+    os.environ['VALIDATION_DELAY_SECONDS'] = str(args.pacing)
+    os.environ['PROCESS_ROLE'] = 'all'
+    os.environ['DURABLE_QUEUE_ENABLED'] = 'false'
+
+    events = load_stream(args.input, args) if args.input else synthetic_stream(args)
+    if args.uvloop:
+        from utils.loop_monitor import install_uvloop
+        if not install_uvloop():
+            sys.exit(1)
+    results = asyncio.run(run_benchmark(events, args))
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(results, json.load(f), args.max_regression)
+        if regressions:
+            print('Regressions against the baseline:')
+            for regression in regressions:
+                print(f'  {regression}')
+            sys.exit(1)
+        print('No regressions against the baseline')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,44 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
+import asyncio
 import logging
+from typing import Any, Dict, List, Optional
+from utils.cache_mode import get_member
+from utils.diagnostics import cache_hit_rates
+from utils.profiler import PROFILE_DEFAULT_SECONDS, PROFILE_USER_IDS
 
 logger = logging.getLogger('gfcbot.admin')
 
+# Timeout of each live prefix probe in /diagnose
+DIAGNOSE_PROBE_TIMEOUT = 5
+
+PLATFORM_NAMES = {'instagram': '📸 Instagram', 'twitter': '𝕏 Twitter/X'}
+HEALTH_ICONS = {'healthy': '🟢', 'degraded': '🟡', 'down': '🔴', 'unknown': '⚪'}
+
+
+def format_ms(seconds: Optional[float]) -> str:
+    """Seconds as milliseconds for display ('—' when unknown)."""
+    return f"{seconds * 1000:.0f}ms" if seconds is not None else "—"
+
 
 class Admin(commands.Cog):
     """Cog for general admin commands."""
     
     def __init__(self, bot):
         self.bot = bot
+        # Posts the summary of a /profile run when its time is up (cancelled by /profile stop)
+        self.profile_task: Optional[asyncio.Task] = None
+    
+    async def cog_unload(self):
+        """Stop a running profile."""
+        if self.profile_task:
+            self.profile_task.cancel()
+        self.bot.profiler.stop()
+    
+    async def can_profile(self, user: Any) -> bool:
+        """Whether a user may run the process-wide profiler (the bot's owner or PROFILE_USER_IDS)."""
+        return user.id in PROFILE_USER_IDS or await self.bot.is_owner(user)
     
     def is_admin(self, member: discord.Member) -> bool:
         """Check if a member has admin permissions."""
@@ -23,7 +51,7 @@ class Admin(commands.Cog):
             await interaction.response.send_message("This command can only be used in a server.", ephemeral=True)
             return
         
-        member = interaction.guild.get_member(interaction.user.id)
+        member = await get_member(interaction.guild, interaction.user)
         if not member:
             await interaction.response.send_message("Could not verify your permissions.", ephemeral=True)
             return
@@ -101,6 +129,8 @@ class Admin(commands.Cog):
             name="⚙️ Admin Commands",
             value="`/status` - Show bot status and stats\n"
                   "`/ping` - Check bot latency\n"
+                  "`/diagnose` - Diagnose embedding in this server\n"
+                  "`/profile start|stop` - Profile the bot for a while (bot owner only)\n"
                   "`/help` - Show this help message",
             inline=False
         )
@@ -123,7 +153,7 @@ class Admin(commands.Cog):
             await interaction.response.send_message("This command can only be used in a server.", ephemeral=True)
             return
         
-        member = interaction.guild.get_member(interaction.user.id)
+        member = await get_member(interaction.guild, interaction.user)
         if not member or not self.is_admin(member):
             await interaction.response.send_message("❌ You need administrator permissions to use this command.", ephemeral=True)
             return
@@ -142,6 +172,41 @@ class Admin(commands.Cog):
             inline=True
         )
         
+        # Shards (sharded deployments only)
+        if self.bot.shard_count:
+            shard_lines = [
+                f"**#{shard_id}:** {sum(1 for guild in self.bot.guilds if guild.shard_id == shard_id)} servers, "
+                f"{round(latency * 1000)}ms"
+                for shard_id, latency in self.bot.latencies
+            ]
+            embed.add_field(
+                name=f"Shards ({len(shard_lines)} of {self.bot.shard_count})",
+                value="\n".join(shard_lines) or "None",
+                inline=False
+            )
+        
+        # Validation
+        flight = self.bot.validation_flight
+        embed.add_field(
+            name="Validation",
+            value=f"**Requests:** {flight.leaders}\n"
+                  f"**Coalesced:** {flight.coalesced}\n"
+                  f"**In flight:** {len(flight.in_flight)}",
+            inline=True
+        )
+        
+        # Background tasks
+        tasks = self.bot.task_supervisor.status()
+        task_lines = [
+            f"{'🟢' if task['alive'] else '🔴'} {name}" + (f" ({task['restarts']} restarts)" if task['restarts'] else "")
+            for name, task in sorted(tasks.items())
+        ]
+        embed.add_field(
+            name=f"Background Tasks ({sum(1 for task in tasks.values() if task['alive'])}/{len(tasks)})",
+            value="\n".join(task_lines) or "None",
+            inline=False
+        )
+        
         # Features
         features_list = "✅ Instagram Embed\n✅ Twitter/X Embed"
         embed.add_field(
@@ -163,7 +228,7 @@ class Admin(commands.Cog):
             await interaction.response.send_message("This command can only be used in a server.", ephemeral=True)
             return
         
-        member = interaction.guild.get_member(interaction.user.id)
+        member = await get_member(interaction.guild, interaction.user)
         if not member or not self.is_admin(member):
             await interaction.response.send_message("❌ You need administrator permissions to use this command.", ephemeral=True)
             return
@@ -171,6 +236,211 @@ class Admin(commands.Cog):
         latency = round(self.bot.latency * 1000)
         await interaction.response.send_message(f"🏓 Pong! Latency: {latency}ms", ephemeral=True)
 
+    
+    @app_commands.command(name="profile", description="Profile the bot's event loop for a while")
+    @app_commands.describe(
+        action="Start a profile, or stop the running one early",
+        seconds="How long to profile (capped by PROFILE_MAX_SECONDS)"
+    )
+    @app_commands.choices(action=[
+        app_commands.Choice(name="start", value="start"),
+        app_commands.Choice(name="stop", value="stop")
+    ])
+    @app_commands.default_permissions(administrator=True)
+    async def profile(
+        self,
+        interaction: discord.Interaction,
+        action: app_commands.Choice[str],
+        seconds: int = PROFILE_DEFAULT_SECONDS
+    ):
+        """Start or stop the sampling profiler and reply with the top frames."""
+        # The profiler covers every guild this process serves, so server administrators are not enough
+        if not await self.can_profile(interaction.user):
+            await interaction.response.send_message("❌ Only the bot's owner can profile the bot.", ephemeral=True)
+            return
+        
+        profiler = self.bot.profiler
+        if action.value == 'start':
+            if profiler.running:
+                await interaction.response.send_message("⚠️ A profile is already running; use `/profile stop`.", ephemeral=True)
+                return
+            # A summary still pending from the previous run is superseded
+            if self.profile_task:
+                self.profile_task.cancel()
+            duration = profiler.start(seconds)
+            await interaction.response.send_message(
+                f"⏱️ Profiling for {duration:.0f}s. The summary is posted here when it ends (`/profile stop` ends it early).",
+                ephemeral=True
+            )
+            self.profile_task = asyncio.create_task(self._post_profile_when_done(interaction, duration))
+            return
+        
+        if self.profile_task:
+            self.profile_task.cancel()
+            self.profile_task = None
+        # Stopping waits for the sampler thread to write the file
+        result = await asyncio.to_thread(profiler.stop)
+        if not result:
+            await interaction.response.send_message("No profile is running.", ephemeral=True)
+            return
+        await interaction.response.send_message(embed=self._profile_embed(result), ephemeral=True)
+    
+    async def _post_profile_when_done(self, interaction: discord.Interaction, duration: float):
+        """Post the summary of a profile that ran its full duration."""
+        await asyncio.sleep(duration + 1)
+        self.profile_task = None
+        result = await asyncio.to_thread(self.bot.profiler.stop)
+        if result:
+            try:
+                await interaction.followup.send(embed=self._profile_embed(result), ephemeral=True)
+            except discord.HTTPException as e:
+                logger.warning(f'Failed to post profile summary: {e}')
+    
+    def _profile_embed(self, result: Dict[str, Any]) -> discord.Embed:
+        """Embed summarizing a profile."""
+        embed = discord.Embed(title="⏱️ Profile", color=discord.Color.blue())
+        embed.add_field(
+            name="Run",
+            value=f"**Duration:** {result['duration']:.1f}s\n"
+                  f"**Samples:** {result['samples']}\n"
+                  f"**Overhead:** {result['overhead']:.2%}\n"
+                  f"**Idle:** {result['idle']:.0%}",
+            inline=False
+        )
+        for name, key in (("Top Frames (self)", 'top_self'), ("Top Frames (total)", 'top_total')):
+            lines = [f"{share:6.1%}  {label}" for label, share in result[key]]
+            # Embed field values are limited to 1024 characters
+            value = "\n".join(lines)[:1000] or "No busy samples"
+            embed.add_field(name=name, value=f"```\n{value}\n```", inline=False)
+        embed.set_footer(text=f"Collapsed stacks: {result['path'] or 'not written'}")
+        return embed
+    
+    @app_commands.command(name="diagnose", description="Diagnose embedding in this server")
+    @app_commands.default_permissions(administrator=True)
+    async def diagnose(self, interaction: discord.Interaction):
+        """Report this server's prefixes (with live probes), queues, time-to-embed, caches, database and webhooks."""
+        if not interaction.guild:
+            await interaction.response.send_message("This command can only be used in a server.", ephemeral=True)
+            return
+        
+        member = await get_member(interaction.guild, interaction.user)
+        if not member or not self.is_admin(member):
+            await interaction.response.send_message("❌ You need administrator permissions to use this command.", ephemeral=True)
+            return
+        
+        # Probing the prefixes takes up to DIAGNOSE_PROBE_TIMEOUT
+        await interaction.response.defer(ephemeral=True)
+        guild = interaction.guild
+        
+        platforms: List[Dict[str, Any]] = []
+        for cog in self.bot.cogs.values():
+            get_diagnostics = getattr(cog, 'get_diagnostics', None)
+            if not get_diagnostics:
+                continue
+            try:
+                platforms.append(await get_diagnostics(guild))
+            except Exception as e:
+                logger.warning(f'Failed to collect {cog.qualified_name} diagnostics for guild {guild.id}: {e}')
+        platforms.sort(key=lambda platform: platform['platform'])
+        
+        hosts = sorted({host for platform in platforms for _, host in platform['prefixes'] if host})
+        probes = dict(zip(hosts, await asyncio.gather(
+            *(self.bot.http_client.probe(host, timeout=DIAGNOSE_PROBE_TIMEOUT) for host in hosts)
+        )))
+        try:
+            queue_depths: Optional[Dict[str, int]] = await self.bot.db.get_queue_depths(guild.id)
+        except Exception as e:
+            logger.warning(f'Failed to count queued links for guild {guild.id}: {e}')
+            queue_depths = None
+        
+        embed = discord.Embed(
+            title=f"🩺 Embed Diagnostics: {guild.name}",
+            color=discord.Color.blue()
+        )
+        
+        # Prefixes, in the order they are tried
+        health = self.bot.prefix_health
+        for platform in platforms:
+            lines = []
+            for index, (prefix, host) in enumerate(platform['prefixes'], start=1):
+                url = f'https://{host}/'
+                state = health.state(url)
+                rate, samples = health.success_rate(url)
+                probe = probes.get(host) or {}
+                live = (
+                    f"live {format_ms(probe['latency'])} (HTTP {probe['status']})"
+                    if probe.get('latency') is not None else f"live ❌ {(probe.get('error') or 'not probed')[:80]}"
+                )
+                stats = f"p95 {format_ms(health.p95_latency(url))} · {rate:.0%} of {samples}" if rate is not None else "no validations yet"
+                lines.append(f"{index}. `{prefix}` → {host}\n{HEALTH_ICONS.get(state, '⚪')} {state} · {stats} · {live}")
+            embed.add_field(
+                name=f"{PLATFORM_NAMES.get(platform['platform'], platform['platform'])} Prefixes",
+                value="\n".join(lines)[:1024] or "No embed prefixes configured",
+                inline=False
+            )
+        
+        # Time from a link being posted to its embed
+        latency = self.bot.embed_latency.summary(guild.id)
+        overall = self.bot.metrics.percentiles('time_to_embed_seconds')
+        value = (
+            f"**p50:** {format_ms(latency['p50'])} · **p95:** {format_ms(latency['p95'])}\n"
+            f"**Embeds:** {latency['count']}"
+            + (f" since <t:{int(latency['since'])}:R>" if latency['since'] else "")
+            + f"\n**Deferred:** {latency['deferred']} (retries and backfill, not in the percentiles)\n"
+            f"**All servers p95:** {format_ms(overall[0.95])}\n"
+            f"**Event loop lag p95:** {format_ms(self.bot.loop_monitor.lag_percentiles().get(0.95))}"
+        )
+        embed.add_field(name="Time to Embed", value=value, inline=False)
+        
+        # Queues
+        job_queue = self.bot.job_queue
+        lines = [
+            f"**Validation queue ({PLATFORM_NAMES.get(platform['platform'], platform['platform'])}):** "
+            f"{platform['queued']} (all servers)"
+            for platform in platforms
+        ]
+        if queue_depths is not None:
+            lines.append(f"**Durable link jobs (this server):** {queue_depths['link_jobs']}")
+            lines.append(f"**Pending retries (this server):** {queue_depths['embed_retries']}")
+        else:
+            lines.append("**Durable queues:** unavailable")
+        if job_queue.enabled:
+            lines.append(f"**Buffered / claimed here:** {len(job_queue.buffer)} / {sum(job_queue.claimed.values())}")
+        embed.add_field(name="Queues", value="\n".join(lines), inline=True)
+        
+        # Database connection pool
+        pool = self.bot.db.pool_stats()
+        embed.add_field(
+            name="Database",
+            value=f"**Backend:** {pool['backend']}\n"
+                  f"**Connections:** {pool['size']} open ({pool['size'] - pool['idle']} in use, max {pool['max']})",
+            inline=True
+        )
+        
+        # Cache hit rates since startup
+        lines = [
+            f"**{cache}:** {rate:.0%} of {count}" if rate is not None else f"**{cache}:** no lookups"
+            for cache, (rate, count) in cache_hit_rates(self.bot.metrics).items()
+        ]
+        embed.add_field(name="Cache Hit Rates", value="\n".join(lines), inline=False)
+        
+        # Webhook registry
+        lines = []
+        for platform in platforms:
+            channels = ", ".join(f"<#{channel_id}>" for channel_id in platform['webhooks'][:10])
+            more = len(platform['webhooks']) - 10
+            lines.append(
+                f"**{PLATFORM_NAMES.get(platform['platform'], platform['platform'])}:** "
+                f"repost {'enabled' if platform['webhook_repost_enabled'] else 'disabled'}, "
+                f"{len(platform['webhooks'])} cached" + (f" ({channels}{f' +{more} more' if more > 0 else ''})" if channels else "")
+            )
+        embed.add_field(name="Webhooks", value="\n".join(lines)[:1024] or "None", inline=False)
+        
+        embed.set_footer(text="Caches, queues and p95s are this process's view; live probes are HEAD requests to each host")
+        embed.timestamp = discord.utils.utcnow()
+        
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
 
 async def setup(bot):
     """Required function to add cog to bot."""
@@ -0,0 +1,244 @@
+import discord
+from discord.ext import commands
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Set
+
+logger = logging.getLogger('gfcbot.backfill')
+
+BACKFILL_ENABLED = os.getenv('BACKFILL_ENABLED', 'true').lower() == 'true'
+
+# Messages older than this are never backfilled
+BACKFILL_MAX_AGE_MINUTES = int(os.getenv('BACKFILL_MAX_AGE_MINUTES', '30'))
+
+# Maximum messages fetched per channel (the newest ones in the gap) and channels fetched in parallel
+BACKFILL_MAX_MESSAGES = int(os.getenv('BACKFILL_MAX_MESSAGES', '200'))
+BACKFILL_CONCURRENCY = int(os.getenv('BACKFILL_CONCURRENCY', '4'))
+
+# How often in-memory watermarks are written to the database
+WATERMARK_FLUSH_SECONDS = 30
+
+
+class Backfill(commands.Cog):
+    """Cog that catches up on links posted while the bot was down or disconnected."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.watermarks: Dict[int, tuple] = {}  # channel_id -> (server_id, last_message_id)
+        self.dirty: Dict[int, tuple] = {}  # Watermarks not yet written to the database
+        self.checkpoint: Dict[int, int] = {}  # channel_id -> last message ID seen before the gap
+        self.backfilling: Dict[int, int] = {}  # Checkpoint of the pass in progress
+        # channel_id -> IDs of messages fed to the pipelines since the gap opened (delivered live, e.g.
+        # replayed on RESUME, or by an earlier pass); they may not have a message_data row yet
+        self.queued_ids: Dict[int, Set[int]] = {}
+        self.lock = asyncio.Lock()
+        self.pending: Optional[str] = None  # Reconnect seen while a backfill was running
+
+    async def cog_load(self):
+        """Load the stored watermarks (the gap since the last run) and start flushing."""
+        try:
+            self.checkpoint = await self.bot.db.get_channel_watermarks()
+        except Exception as e:
+            logger.warning(f'Failed to load channel watermarks: {e}')
+        self.bot.task_supervisor.start('watermark_flush', self._flush_worker)
+        self.bot.task_supervisor.add_drain_hook('watermarks', lambda timeout: self.flush_watermarks())
+        logger.info(f'Backfill cog loaded ({len(self.checkpoint)} channel watermark(s))')
+
+    async def cog_unload(self):
+        """Stop flushing and persist the latest watermarks."""
+        self.bot.task_supervisor.cancel('watermark_flush')
+        self.bot.task_supervisor.cancel('backfill')
+        self.bot.task_supervisor.remove_drain_hook('watermarks')
+        await self.flush_watermarks()
+        logger.info('Backfill cog unloaded')
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        """Advance the channel's watermark for every guild message received live."""
+        if not message.guild:
+            return
+        channel_id = message.channel.id
+        self._advance(channel_id, message.guild.id, message.id)
+        if BACKFILL_ENABLED and (channel_id in self.checkpoint or channel_id in self.backfilling):
+            self.queued_ids.setdefault(channel_id, set()).add(message.id)
+
+    @commands.Cog.listener()
+    async def on_disconnect(self):
+        """Remember where each channel was when the gateway connection dropped."""
+        # Also while a backfill runs: it already took its checkpoint, so this gap needs a pass of its own
+        for channel_id, (_, message_id) in self.watermarks.items():
+            self.checkpoint[channel_id] = max(message_id, self.checkpoint.get(channel_id, 0))
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Backfill after (re)connecting."""
+        self._start_backfill('ready')
+
+    @commands.Cog.listener()
+    async def on_resumed(self):
+        """Backfill after a resumed session, which may not replay every missed event."""
+        self._start_backfill('resumed')
+
+    def _advance(self, channel_id: int, server_id: int, message_id: int):
+        current = self.watermarks.get(channel_id)
+        if current and current[1] >= message_id:
+            return
+        self.watermarks[channel_id] = (server_id, message_id)
+        self.dirty[channel_id] = (server_id, message_id)
+
+    async def flush_watermarks(self):
+        """Write changed watermarks to the database in one round trip."""
+        dirty, self.dirty = self.dirty, {}
+        if not dirty:
+            return
+        try:
+            await self.bot.db.save_channel_watermarks(dirty)
+        except Exception as e:
+            logger.warning(f'Failed to save {len(dirty)} channel watermark(s): {e}')
+            for channel_id, watermark in dirty.items():
+                self.dirty.setdefault(channel_id, watermark)
+
+    async def _flush_worker(self):
+        """Background task that periodically persists watermarks."""
+        while True:
+            await asyncio.sleep(WATERMARK_FLUSH_SECONDS)
+            await self.flush_watermarks()
+
+    def _start_backfill(self, reason: str):
+        if not BACKFILL_ENABLED or not self.checkpoint:
+            return
+        if self.lock.locked():
+            # The running backfill makes another pass once it is done
+            self.pending = reason
+            return
+        self.bot.task_supervisor.start('backfill', lambda: self.backfill(reason))
+
+    async def backfill(self, reason: str) -> int:
+        """
+        Feed messages posted after each channel's checkpoint through the link pipeline.
+
+        Passes repeat while reconnects arrived during the previous pass.
+
+        Args:
+            reason: What triggered the backfill (for logging)
+
+        Returns:
+            Number of messages fed to the pipeline
+        """
+        async with self.lock:
+            total = 0
+            while True:
+                total += await self._backfill_pass(reason)
+                reason, self.pending = self.pending, None
+                if not reason or not self.checkpoint:
+                    return total
+
+    async def _backfill_pass(self, reason: str) -> int:
+        """Backfill every channel in the current checkpoint (the caller holds the lock)."""
+        checkpoint, self.checkpoint = self.checkpoint, {}
+        self.backfilling = checkpoint
+        started = time.monotonic()
+        oldest_id = discord.utils.time_snowflake(
+            datetime.now(timezone.utc) - timedelta(minutes=BACKFILL_MAX_AGE_MINUTES)
+        )
+        semaphore = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+
+        async def run(channel_id: int, last_id: int) -> int:
+            # Messages from the live watermark on arrived over the gateway, so the gap ends there
+            watermark = self.watermarks.get(channel_id)
+            before_id = watermark[1] if watermark and watermark[1] > last_id else None
+            async with semaphore:
+                try:
+                    return await self._backfill_channel(channel_id, max(last_id, oldest_id), before_id)
+                except Exception as e:
+                    logger.error(f'Error backfilling channel {channel_id}: {e}', exc_info=True)
+                    return 0
+
+        try:
+            counts = await asyncio.gather(*(run(channel_id, last_id) for channel_id, last_id in checkpoint.items()))
+        finally:
+            self.backfilling = {}
+            # Only gaps opened during this pass still need to know what was queued
+            self.queued_ids = {
+                channel_id: {message_id for message_id in ids if message_id > self.checkpoint[channel_id]}
+                for channel_id, ids in self.queued_ids.items() if channel_id in self.checkpoint
+            }
+        total = sum(counts)
+        logger.info(
+            f'Backfill after {reason}: {total} message(s) from {sum(1 for count in counts if count)} '
+            f'channel(s) in {time.monotonic() - started:.1f}s'
+        )
+        return total
+
+    async def _backfill_channel(self, channel_id: int, after_id: int, before_id: Optional[int] = None) -> int:
+        """
+        Backfill one channel.
+
+        Args:
+            channel_id: Discord channel ID
+            after_id: Only messages newer than this ID are fetched
+            before_id: Only messages older than this ID are fetched (the live watermark)
+
+        Returns:
+            Number of messages fed to the pipeline
+        """
+        channel = self.bot.get_channel(channel_id)
+        if channel is None or not hasattr(channel, 'history') or not getattr(channel, 'guild', None):
+            return 0
+        # The gateway tells us each channel's newest message; skip the request if nothing is newer
+        last_message_id = getattr(channel, 'last_message_id', None)
+        if last_message_id is not None and last_message_id <= after_id:
+            return 0
+        try:
+            # Newest first, so a gap longer than the cap keeps its most recent links
+            messages = []
+            before = discord.Object(id=before_id) if before_id else None
+            async for message in channel.history(limit=BACKFILL_MAX_MESSAGES + 1, before=before):
+                if message.id <= after_id:
+                    break
+                messages.append(message)
+        except discord.HTTPException as e:
+            logger.info(f'Cannot read history of channel {channel_id}: {e}')
+            return 0
+        if not messages:
+            return 0
+        if len(messages) > BACKFILL_MAX_MESSAGES:
+            messages.pop()
+            logger.warning(
+                f'Backfill of channel {channel_id} capped at its newest {BACKFILL_MAX_MESSAGES} messages; '
+                f'older messages in the gap were skipped'
+            )
+        messages.reverse()
+        self._advance(channel_id, channel.guild.id, messages[-1].id)
+
+        queued_ids = self.queued_ids.get(channel_id, ())
+        candidates = [message for message in messages if not message.author.bot and message.id not in queued_ids]
+        processed = await self.bot.db.get_processed_message_ids([message.id for message in candidates])
+        pipelines = [
+            cog.process_message for cog in self.bot.cogs.values()
+            if getattr(cog, 'process_message', None)
+        ]
+        count = 0
+        for message in candidates:
+            if message.id in processed:
+                continue
+            for process_message in pipelines:
+                try:
+                    await process_message(message)
+                except Exception as e:
+                    logger.warning(f'Failed to backfill message {message.id}: {e}')
+            count += 1
+        if channel_id in self.checkpoint:
+            # A disconnect during this pass opened a new gap; the next pass must not queue these again
+            self.queued_ids.setdefault(channel_id, set()).update(message.id for message in candidates)
+        if count and self.bot.metrics:
+            self.bot.metrics.incr('backfill_messages_total', count)
+        return count
+
+
+async def setup(bot):
+    """Required function to add cog to bot."""
+    await bot.add_cog(Backfill(bot))
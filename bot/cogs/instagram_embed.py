@@ -5,17 +5,38 @@ import aiohttp
 import asyncio
 import logging
 import os
-from typing import Optional, List, Dict
+import time
+from typing import Any, Optional, List, Dict, Tuple
 from datetime import datetime
+from utils.deadline import Deadline, MAX_ATTEMPT_TIMEOUT
+from utils.prefix_health import prefix_host
+from utils.url_canonical import canonicalize_instagram_url, post_key
+from utils.embed_probe import VALIDATION_MODE, probe_url, is_valid_verdict
+from utils.post_metadata import build_native_embed
+from utils.embed_policy import EmbedRewrite, GuildEmbedPolicy
+from utils.discord_actions import ActionPlan
+from utils.sharding import guild_shard
 
 logger = logging.getLogger('gfcbot.instagram_embed')
 
+# Pause between validations of queued links (spreads load on the embed services)
+VALIDATION_DELAY = float(os.getenv('VALIDATION_DELAY_SECONDS', '1.5'))
+
 # Instagram URL pattern - matches both regular and prefixed Instagram URLs
 INSTAGRAM_URL_PATTERN = re.compile(
-    r'https?://(?:www\.)?(?:[a-z]{2,5})?instagram\.com/(?:p|reel|reels|tv)/([a-zA-Z0-9_-]+)/?',
+    r'https?://(?:www\.|m\.)?(?:[a-z]{2,5})?instagram\.com/(?:p|reel|reels|tv)/([a-zA-Z0-9_-]+)/?',
     re.IGNORECASE
 )
 
+# Instagram share links - the post is only known after following their redirects
+INSTAGRAM_SHARE_PATTERN = re.compile(
+    r'https?://(?:www\.|m\.)?instagram\.com/share/(?:p/|reels?/)?[a-zA-Z0-9_-]+/?',
+    re.IGNORECASE
+)
+
+# Post URL that embed prefixes are applied to when only their host matters
+PREFIX_SAMPLE_URL = 'https://www.instagram.com/p/x/'
+
 
 class InstagramEmbed(commands.Cog):
     """Cog for Instagram URL embedding functionality."""
@@ -23,23 +44,30 @@ class InstagramEmbed(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.validation_queue = asyncio.Queue()
-        self.session: Optional[aiohttp.ClientSession] = None
         self.config_cache: Dict[int, Dict] = {}  # guild_id -> config
+        self.policies: Dict[int, GuildEmbedPolicy] = {}  # guild_id -> compiled embed policy
         self.api_url = os.getenv('API_URL', 'http://localhost:3001')  # Set your backend API URL here
         self.instagram_feature_id: Optional[str] = None
+        self.background_tasks: set = set()  # Optimistic embed verifications in flight
+        self.webhooks: Dict[int, discord.Webhook] = {}  # channel_id -> the bot's webhook
+
+    @property
+    def session(self) -> Optional[aiohttp.ClientSession]:
+        """Shared HTTP session owned by the bot."""
+        return self.bot.http_client.session
 
     async def get_instagram_embed_config(self, guild_id: int) -> Dict:
-        if not self.session:
-            self.session = aiohttp.ClientSession()
         # Cache for 30 seconds per guild (faster config updates)
         now = datetime.utcnow().timestamp()
         cache_entry = self.config_cache.get(guild_id)
         if cache_entry and (now - cache_entry.get('fetched_at', 0) < 30):
+            self.bot.metrics.incr('embed_config_cache_total', platform='instagram', result='hit')
             return cache_entry['config']
+        self.bot.metrics.incr('embed_config_cache_total', platform='instagram', result='miss')
         # Fetch from bot-accessible endpoint (no auth required)
         url = f"{self.api_url}/api/bot/instagram-embed-config/{guild_id}"
         try:
-            async with self.session.get(url, timeout=5) as resp:
+            async with self.session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as resp:  # type: ignore
                 if resp.status == 200:
                     data = await resp.json()
                     self.config_cache[guild_id] = {'config': data, 'fetched_at': now}
@@ -59,57 +87,112 @@ class InstagramEmbed(commands.Cog):
             'reaction_emoji': '🙏'
         }
         
+    async def get_embed_policy(self, guild) -> Optional[GuildEmbedPolicy]:
+        """
+        Get the compiled Instagram embed policy of a guild, rebuilt when its config or embed configs change.
+        
+        Args:
+            guild: Discord guild (or a discord.Object with its ID when the guild isn't cached)
+            
+        Returns:
+            The guild's policy, or None if the instagram_embed feature is unavailable
+        """
+        if not self.instagram_feature_id:
+            self.instagram_feature_id = await self.bot.feature_manager.get_feature_id('instagram_embed')
+        if not self.instagram_feature_id:
+            return None
+        config = await self.get_instagram_embed_config(guild.id)
+        policy = self.policies.get(guild.id)
+        # The config dict is replaced whenever it is refetched, so it doubles as the policy's version
+        if policy is None or policy.config is not config:
+            embed_configs = await self.bot.db.get_embed_configs(guild.id, self.instagram_feature_id)
+            policy = GuildEmbedPolicy('instagram', guild, config, embed_configs)
+            self.policies[guild.id] = policy
+        return policy
+        
     async def cog_load(self):
-        """Initialize aiohttp session when cog loads."""
-        self.session = aiohttp.ClientSession()
+        """Load the feature id and start the validation worker when cog loads."""
         try:
             self.instagram_feature_id = await self.bot.feature_manager.get_feature_id('instagram_embed')
             logger.info(f"Loaded instagram feature id: {self.instagram_feature_id}")
         except Exception as e:
             logger.warning(f"Failed to load instagram feature id: {e}")
         # Start validation worker
-        self.bot.loop.create_task(self._validation_worker())
+        supervisor = self.bot.task_supervisor
+        supervisor.start('instagram_validation', self._validation_worker)
+        supervisor.add_drain_hook('instagram_validation', self.drain)
+        # Gateway-only processes leave the durable queue and retries to the worker processes
+        if self.bot.job_queue.consumes:
+            if self.bot.job_queue.enabled:
+                supervisor.start('instagram_durable_validation', self._durable_validation_worker)
+            # Start deferred retries of failed links (only run while the validation queue is idle)
+            supervisor.start('instagram_retries', lambda: self.bot.retry_queue.run('instagram', self._retry_embed, self._is_idle))
         logger.info('Instagram embed cog loaded')
     
+    async def get_prefix_hosts(self) -> List[str]:
+        """Hosts of every active Instagram embed prefix across all servers, for connection pre-warming."""
+        if not self.instagram_feature_id:
+            return []
+        prefixes = await self.bot.db.get_feature_embed_prefixes(
+            self.instagram_feature_id,
+            [guild.id for guild in self.bot.guilds]
+        )
+        return [
+            prefix_host(EmbedRewrite('instagram', row['prefix'], row.get('embed_type', 'prefix')).apply(PREFIX_SAMPLE_URL))
+            for row in prefixes
+        ]
+    
+    def evict_guild(self, guild_id: int):
+        """Drop every cache entry of a guild this process no longer serves."""
+        self.clear_config_cache(guild_id)
+        for channel_id in [channel_id for channel_id, webhook in self.webhooks.items() if webhook.guild_id == guild_id]:
+            del self.webhooks[channel_id]
+    
+    async def get_diagnostics(self, guild: discord.Guild) -> Dict[str, Any]:
+        """
+        Instagram embed state of a guild, for /diagnose.
+        
+        Args:
+            guild: Discord guild
+            
+        Returns:
+            Dictionary with platform, prefixes ((prefix, host) in priority order),
+            webhook_repost_enabled, webhooks (IDs of the guild's channels with a cached
+            webhook) and queued (links in this process's validation queue, all guilds)
+        """
+        policy = await self.get_embed_policy(guild)
+        return {
+            'platform': 'instagram',
+            'prefixes': [(embed.prefix, prefix_host(embed.apply(PREFIX_SAMPLE_URL))) for embed in policy.embeds] if policy else [],
+            'webhook_repost_enabled': bool(policy and policy.webhook_repost_enabled),
+            'webhooks': [channel_id for channel_id, webhook in self.webhooks.items() if webhook.guild_id == guild.id],
+            'queued': self.validation_queue.qsize()
+        }
+    
     def clear_config_cache(self, guild_id: Optional[int] = None):
         """Clear the config cache for a guild or all guilds."""
         if guild_id:
+            self.policies.pop(guild_id, None)
             if guild_id in self.config_cache:
                 del self.config_cache[guild_id]
                 logger.info(f'Cleared Instagram embed config cache for guild {guild_id}')
         else:
+            self.policies.clear()
             self.config_cache.clear()
             logger.info('Cleared Instagram embed config cache for all guilds')
     
-    def _resolve_emoji(self, emoji_str: str, guild: discord.Guild):
-        """
-        Resolve an emoji string to an actual emoji object.
-        Supports unicode emojis and Discord emoji codes like :emoji_name:
-        
-        Returns:
-            Emoji object/string that can be used with add_reaction, or None if not found
-        """
-        if not emoji_str:
-            return '🙏'
-        
-        # Check if it's a Discord emoji code (e.g., :custom_emoji:)
-        if emoji_str.startswith(':') and emoji_str.endswith(':'):
-            emoji_name = emoji_str[1:-1]
-            # Try to find the emoji by name in the guild
-            emoji = discord.utils.get(guild.emojis, name=emoji_name)
-            if emoji:
-                return emoji
-            else:
-                logger.warning(f'Custom emoji :{emoji_name}: not found in guild {guild.id}')
-                return '🙏'  # Fallback to default if not found
-        else:
-            # It's a unicode emoji, return as-is
-            return emoji_str
+    @commands.Cog.listener()
+    async def on_guild_emojis_update(self, guild: discord.Guild, before, after):
+        """Recompile the guild's policy so a custom reaction emoji resolves against the new emojis."""
+        policy = self.policies.get(guild.id)
+        if policy:
+            self.policies[guild.id] = policy.rebind(guild)
     
     async def cog_unload(self):
-        """Clean up aiohttp session when cog unloads."""
-        if self.session:
-            await self.session.close()
+        """Stop the cog's background loops (the shared HTTP session is owned by the bot)."""
+        for name in ('instagram_validation', 'instagram_durable_validation', 'instagram_retries'):
+            self.bot.task_supervisor.cancel(name)
+        self.bot.task_supervisor.remove_drain_hook('instagram_validation')
         logger.info('Instagram embed cog unloaded')
     
     @commands.Cog.listener()
@@ -144,14 +227,25 @@ class InstagramEmbed(commands.Cog):
             logger.info(f'Detected reply from {message.author.id} to message {message.reference.message_id}')
             await self._handle_webhook_reply(message)
         
+        await self.process_message(message)
+    
+    async def process_message(self, message: discord.Message):
+        """
+        Detect an Instagram link in a guild message and queue it for embedding.
+        
+        Also called by the backfill for messages missed while disconnected.
+        
+        Args:
+            message: Discord message (not from a bot, not a DM)
+        """
         # Check for Instagram URLs
-        urls = INSTAGRAM_URL_PATTERN.findall(message.content)
-        if not urls:
-            return
-        # Get original URL from message
         match = INSTAGRAM_URL_PATTERN.search(message.content)
         if not match:
-            return
+            # Share links only reveal the post after following their redirects
+            match = INSTAGRAM_SHARE_PATTERN.search(message.content)
+            if not match or not await self._resolve_link(match.group(0)):
+                return
+        # Get original URL from message
         original_url = match.group(0)
 
         # Log audit: URL detected
@@ -170,46 +264,24 @@ class InstagramEmbed(commands.Cog):
         except Exception as e:
             logger.warning(f'Failed to log audit event for url_detected: {e}')
         
-        # Get all embed configs for this server, scoped to instagram feature
-        if not self.instagram_feature_id:
-            self.instagram_feature_id = await self.bot.feature_manager.get_feature_id('instagram_embed')
-        if not self.instagram_feature_id:
+        # Compiled embed policy of this server
+        policy = await self.get_embed_policy(message.guild)
+        if not policy:
             logger.warning('instagram_embed feature id not found; skipping embed processing')
             return
-        embed_configs = await self.bot.db.get_embed_configs(message.guild.id, self.instagram_feature_id)
         
         # Check if URL already uses a configured embed (prefix or replacement)
-        already_embedded = False
-        if embed_configs:
-            for embed_config in embed_configs:
-                prefix = embed_config['prefix']
-                embed_type = embed_config.get('embed_type', 'prefix')
-                
-                if embed_type == 'replacement':
-                    # For replacement mode, check if URL uses the replacement domain
-                    # e.g., if prefix is 'ddinstagram.com', check for 'ddinstagram.com/' or 'ddinstagram.com?' in URL
-                    normalized_url = original_url.lower()
-                    normalized_prefix = prefix.lower()
-                    if f'{normalized_prefix}/' in normalized_url or f'{normalized_prefix}?' in normalized_url:
-                        already_embedded = True
-                        break
-                else:
-                    # For prefix mode, check if prefix is added before instagram.com
-                    if f'{prefix}instagram.com' in original_url.lower():
-                        already_embedded = True
-                        break
-        
-        if already_embedded:
+        if policy.is_already_embedded(original_url):
             # URL already uses configured embed - react and skip processing
             # NOTE: Already-embedded URLs are NOT added to message_data (URL history)
             # They only get an audit log entry for tracking purposes
-            config = await self.get_instagram_embed_config(message.guild.id)
-            if not config.get('reaction_enabled', True):
+            if not policy.reaction_enabled:
                 return
-            reaction_emoji_str = config.get('reaction_emoji', '🙏')
-            reaction_emoji = self._resolve_emoji(reaction_emoji_str, message.guild)
+            reaction_emoji = policy.reaction_emoji
             try:
-                await message.add_reaction(reaction_emoji)
+                await self.bot.discord_executor.call(
+                    'reaction', lambda: message.add_reaction(reaction_emoji), message.channel.id
+                )
                 logger.info(f'Reacted with {reaction_emoji} to already-embedded URL: {original_url}')
                 # Log audit: already embedded
                 await self.bot.db.insert_audit_log(
@@ -226,13 +298,77 @@ class InstagramEmbed(commands.Cog):
             except Exception as e:
                 logger.warning(f'Failed to react to message: {e}')
             return
-        # Add to validation queue
+        canonical = canonicalize_instagram_url(self._resolved_url(original_url))
+        if not canonical:
+            return
+        
+        # Point to the earlier embed if this post was already embedded in the channel recently
+        if await self._handle_duplicate_repost(message, original_url, post_key(canonical[0], canonical[1]), policy):
+            return
+        
+        # Persist the job to the durable queue when enabled (the job's deadline starts counting now);
+        # otherwise, or if the write failed, queue it in memory
+        if await self.bot.job_queue.enqueue('instagram', message, original_url, canonical[1]):
+            return
         await self.validation_queue.put({
             'message': message,
             'original_url': original_url,
-            'post_id': urls[0]
+            'post_id': canonical[1],
+            'enqueued_at': time.time()
         })
     
+    async def _handle_duplicate_repost(
+        self,
+        message: discord.Message,
+        original_url: str,
+        key: str,
+        policy: GuildEmbedPolicy
+    ) -> bool:
+        """
+        Reply with a pointer to the earlier embed if the same post was embedded
+        in this channel within the server's dedupe window.
+        
+        Returns:
+            True if the message was handled as a duplicate
+        """
+        if not message.guild:
+            return False
+        window = policy.repost_dedupe_minutes
+        if window <= 0:
+            return False
+        try:
+            earlier = await self.bot.db.get_recent_embed(message.channel.id, key, window)
+        except Exception as e:
+            logger.warning(f'Failed to look up recent embeds for {key}: {e}')
+            return False
+        if not earlier:
+            return False
+        earlier_id = earlier.get('webhook_message_id') or earlier['message_id']
+        jump_url = f'https://discord.com/channels/{message.guild.id}/{message.channel.id}/{earlier_id}'
+        try:
+            await self.bot.discord_executor.call(
+                'duplicate_reply',
+                lambda: message.reply(f'🔁 Already shared here recently: {jump_url}', mention_author=False),
+                message.channel.id
+            )
+            logger.info(f'Pointed duplicate post {key} in channel {message.channel.id} to message {earlier_id}')
+            # Log audit: duplicate repost
+            await self.bot.db.insert_audit_log(
+                server_id=message.guild.id,
+                user_id=message.author.id,
+                action='duplicate_repost',
+                target_type='message',
+                target_id=str(message.id),
+                details={
+                    'original_url': original_url,
+                    'post_key': key,
+                    'earlier_message_id': earlier_id
+                }
+            )
+        except Exception as e:
+            logger.warning(f'Failed to point to earlier embed: {e}')
+        return True
+    
     async def _handle_webhook_reply(self, message: discord.Message):
         """
         Handle replies to webhook messages by notifying the original poster.
@@ -256,12 +392,11 @@ class InstagramEmbed(commands.Cog):
             logger.warning('Message has no guild, skipping webhook reply notification')
             return
         
-        # Get the server config to check webhook reply notification settings
-        config = await self.get_instagram_embed_config(message.guild.id)
-        webhook_notifications_enabled = config.get('webhook_reply_notifications', True)
+        # Get the server policy to check webhook reply notification settings
+        policy = await self.get_embed_policy(message.guild)
         
         # Skip if webhook reply notifications are disabled overall
-        if not webhook_notifications_enabled:
+        if not policy or not policy.webhook_reply_notifications:
             logger.info(f'Webhook reply notifications disabled for guild {message.guild.id}, skipping')
             return
         
@@ -278,9 +413,10 @@ class InstagramEmbed(commands.Cog):
                 return
             
             # Reply to the user's message and tag the original poster
-            await message.reply(
-                f"{original_user.mention}",
-                mention_author=False
+            await self.bot.discord_executor.call(
+                'reply_notification',
+                lambda: message.reply(f"{original_user.mention}", mention_author=False),
+                message.channel.id
             )
             logger.info(f'Notified user {original_user_id} about reply from {message.author.id} via reply')
             
@@ -294,25 +430,90 @@ class InstagramEmbed(commands.Cog):
                 # Get item from queue
                 item = await self.validation_queue.get()
                 
-                # Process the URL
-                await self._process_instagram_url(
-                    message=item['message'],
-                    original_url=item['original_url'],
-                    post_id=item['post_id']
-                )
-                
-                # Delay between validations (1-2 seconds)
-                await asyncio.sleep(1.5)
+                try:
+                    # Process the URL
+                    await self._process_instagram_url(
+                        message=item['message'],
+                        original_url=item['original_url'],
+                        post_id=item['post_id'],
+                        enqueued_at=item.get('enqueued_at')
+                    )
+                finally:
+                    # Mark the item done even if processing failed, so drain() can't wait on it forever
+                    self.validation_queue.task_done()
                 
-                self.validation_queue.task_done()
+                # Delay between validations
+                await asyncio.sleep(VALIDATION_DELAY)
             except Exception as e:
                 logger.error(f'Error in validation worker: {e}', exc_info=True)
     
+    async def drain(self, timeout: float):
+        """
+        Shutdown hook: finish the in-memory validation queue within the grace period
+        and hand whatever is left to the retry queue so it is embedded after the restart.
+        
+        Args:
+            timeout: Seconds allowed for draining
+        """
+        if self.validation_queue.empty():
+            return
+        try:
+            # Keep a second for persisting the leftovers
+            await asyncio.wait_for(self.validation_queue.join(), timeout=max(timeout - 1, 0))
+            return
+        except asyncio.TimeoutError:
+            pass
+        leftovers = []
+        while not self.validation_queue.empty():
+            leftovers.append(self.validation_queue.get_nowait())
+            self.validation_queue.task_done()
+        logger.warning(f'Deferring {len(leftovers)} queued Instagram link(s) to the retry queue at shutdown')
+        for item in leftovers:
+            await self.bot.retry_queue.schedule(
+                item['message'], 'instagram', item['original_url'],
+                self._post_key(item['original_url']), 'Shut down before processing'
+            )
+    
+    async def _durable_validation_worker(self):
+        """Background worker consuming the durable link job queue; jobs are acked once processed."""
+        job_queue = self.bot.job_queue
+        while True:
+            try:
+                jobs = await job_queue.claim('instagram')
+            except Exception as e:
+                logger.error(f'Error claiming link jobs: {e}', exc_info=True)
+                await asyncio.sleep(1)
+                continue
+            for job in jobs:
+                try:
+                    message = await job_queue.fetch_message(self.bot, job['channel_id'], job['message_id'])
+                    if message:
+                        await self._process_instagram_url(
+                            message=message,
+                            original_url=job['original_url'],
+                            post_id=job['post_id'],
+                            enqueued_at=job_queue.deadline_start(job)
+                        )
+                    else:
+                        logger.info(f'Message {job["message_id"]} of link job {job["id"]} is gone; skipping')
+                    await job_queue.ack(job)
+                except Exception as e:
+                    logger.error(f'Error processing link job {job["id"]}: {e}', exc_info=True)
+                    job_queue.nack(job)
+                
+                # Delay between validations
+                await asyncio.sleep(VALIDATION_DELAY)
+    
+    def _is_idle(self) -> bool:
+        """Whether no live links are waiting, in memory or in the durable queue."""
+        return self.validation_queue.empty() and self.bot.job_queue.is_idle('instagram')
+    
     async def _process_instagram_url(
         self,
         message: discord.Message,
         original_url: str,
-        post_id: str
+        post_id: str,
+        enqueued_at: Optional[float] = None
     ):
         """
         Process Instagram URL with priority-based fallback.
@@ -321,158 +522,79 @@ class InstagramEmbed(commands.Cog):
             message: Discord message containing the URL
             original_url: Original Instagram URL
             post_id: Instagram post ID
+            enqueued_at: Wall-clock time the link was queued; the guild's deadline counts from here
         """
         # Get per-server Instagram embed config
         guild = message.guild
         if not guild:
             logger.warning('Message has no guild (DM or system message); skipping embed config.')
             return
+        shard_id = guild_shard(self.bot, guild.id)
+        if shard_id is not None:
+            # Label this job's metrics with the shard its guild belongs to
+            self.bot.metrics.bind(shard=shard_id)
         
 
-        config = await self.get_instagram_embed_config(guild.id)
-        webhook_mode = config.get('webhook_repost_enabled', False)
-        logger.info(f'Instagram embed config for guild {guild.id}: webhook_repost_enabled={webhook_mode}')
-        if not self.instagram_feature_id:
-            self.instagram_feature_id = await self.bot.feature_manager.get_feature_id('instagram_embed')
-        if not self.instagram_feature_id:
+        if INSTAGRAM_SHARE_PATTERN.match(original_url):
+            await self._resolve_link(original_url)
+        
+        policy = await self.get_embed_policy(guild)
+        if not policy:
             logger.warning('instagram_embed feature id not found; cannot fetch embed configs')
             return
-        embed_configs = await self.bot.db.get_embed_configs(guild.id, self.instagram_feature_id)
-        if not embed_configs:
+        deadline = Deadline.from_config(policy.config, started_at=enqueued_at)
+        if deadline.expired:
+            await self._handle_timeout(message, original_url, deadline)
+            return
+        webhook_mode = policy.webhook_repost_enabled
+        logger.info(f'Instagram embed config for guild {guild.id}: webhook_repost_enabled={webhook_mode}')
+        if not policy.embeds:
             logger.warning(f'No embed configs found for server {guild.id}')
             return
-        for embed_config in embed_configs:
-            prefix = embed_config['prefix']
-            embedded_url = original_url.replace('instagram.com', f'{prefix}instagram.com')
-            logger.info(f'Trying prefix "{prefix}" for URL: {original_url}')
-            is_valid, error = await self._validate_url(embedded_url)
+        
+        # Embed the canonical form of the URL (tracking params and host variants dropped)
+        source_url = self._canonical_url(original_url)
+        key = self._post_key(original_url)
+        
+        # Prefetch post metadata alongside validation for the native embed fallback
+        metadata_task = asyncio.create_task(self.bot.post_metadata.get_or_fetch('instagram', post_id, source_url))
+        self.background_tasks.add(metadata_task)
+        metadata_task.add_done_callback(self.background_tasks.discard)
+        
+        # Optimistic mode: post with a reliably healthy top prefix right away and verify in the background
+        top_embed = policy.embeds[0]
+        top_url = top_embed.apply(source_url)
+        if policy.optimistic_posting_enabled and self.bot.prefix_health.is_reliable(top_url):
+            logger.info(f'Optimistically posting prefix "{top_embed.prefix}" for URL: {original_url}')
+            posted = await self._post_embed(message, original_url, top_url, top_embed.prefix, policy, webhook_mode)
+            if posted:
+                task = asyncio.create_task(self._verify_optimistic_embed(message, original_url, posted, policy.embeds))
+                self.background_tasks.add(task)
+                task.add_done_callback(self.background_tasks.discard)
+                return
+        
+        for embed in policy.embeds:
+            prefix = embed.prefix
+            embedded_url = embed.apply(source_url)
+            if deadline.expired:
+                await self._handle_timeout(message, original_url, deadline)
+                return
+            timeout = deadline.attempt_timeout(self.bot.prefix_health.p95_latency(embedded_url))
+            logger.info(f'Trying prefix "{prefix}" for URL: {original_url} (timeout {timeout:.2f}s)')
+            is_valid, error = await self._validate_url(embedded_url, timeout=timeout, post_key=key)
             if is_valid:
-                try:
-                    if webhook_mode and isinstance(message.channel, discord.TextChannel):
-                        logger.info(f'Using webhook repost mode for message {message.id}')
-                        try:
-                            webhook_msg = await self._repost_with_webhook(message, embedded_url)
-                            await self.bot.db.insert_message_data(
-                                message_id=message.id,
-                                channel_id=message.channel.id,
-                                server_id=guild.id,
-                                user_id=message.author.id,
-                                original_url=original_url,
-                                embedded_url=embedded_url,
-                                embed_prefix_used=prefix,
-                                validation_status='success',
-                                validation_error=None,
-                                webhook_message_id=webhook_msg.id
-                            )
-                            # Log audit: reposted with webhook
-                            await self.bot.db.insert_audit_log(
-                                server_id=guild.id,
-                                user_id=message.author.id,
-                                action='reposted_with_webhook',
-                                target_type='webhook_message',
-                                target_id=str(webhook_msg.id),
-                                details={
-                                    'original_url': original_url,
-                                    'embedded_url': embedded_url,
-                                    'prefix': prefix,
-                                    'message_id': message.id,
-                                    'webhook_message_id': webhook_msg.id
-                                }
-                            )
-                            logger.info(f'Successfully reposted with webhook for prefix "{prefix}"')
-                            return
-                        except Exception as e:
-                            # Webhook repost failed - fall back to normal reply mode
-                            logger.warning(f'Webhook repost failed ({e}), falling back to reply mode')
-                            if config.get('suppress_original_embed', True):
-                                await message.edit(suppress=True)
-                            new_content = message.content.replace(original_url, embedded_url)
-                            await message.reply(new_content, mention_author=False)
-                            await self.bot.db.insert_message_data(
-                                message_id=message.id,
-                                channel_id=message.channel.id,
-                                server_id=guild.id,
-                                user_id=message.author.id,
-                                original_url=original_url,
-                                embedded_url=embedded_url,
-                                embed_prefix_used=prefix,
-                                validation_status='success',
-                                validation_error=None
-                            )
-                            # Log audit: embedded with reply
-                            await self.bot.db.insert_audit_log(
-                                server_id=guild.id,
-                                user_id=message.author.id,
-                                action='embedded_with_reply',
-                                target_type='message',
-                                target_id=str(message.id),
-                                details={
-                                    'original_url': original_url,
-                                    'embedded_url': embedded_url,
-                                    'prefix': prefix,
-                                    'message_id': message.id
-                                }
-                            )
-                            logger.info(f'Successfully embedded URL with prefix "{prefix}" (reply mode)')
-                            return
-                    else:
-                        if config.get('suppress_original_embed', True):
-                            await message.edit(suppress=True)
-                        new_content = message.content.replace(original_url, embedded_url)
-                        await message.reply(new_content, mention_author=False)
-                        await self.bot.db.insert_message_data(
-                            message_id=message.id,
-                            channel_id=message.channel.id,
-                            server_id=guild.id,
-                            user_id=message.author.id,
-                            original_url=original_url,
-                            embedded_url=embedded_url,
-                            embed_prefix_used=prefix,
-                            validation_status='success',
-                            validation_error=None
-                        )
-                        # Log audit: embedded with reply
-                        await self.bot.db.insert_audit_log(
-                            server_id=guild.id,
-                            user_id=message.author.id,
-                            action='embedded_with_reply',
-                            details={
-                                'original_url': original_url,
-                                'embedded_url': embedded_url,
-                                'prefix': prefix,
-                                'message_id': message.id
-                            }
-                        )
-                        logger.info(f'Successfully embedded URL with prefix "{prefix}"')
-                        return
-                except discord.Forbidden:
-                    logger.error(f'Missing permissions to suppress embeds/send message in channel {message.channel.id}')
-                    try:
-                        new_content = message.content.replace(original_url, embedded_url)
-                        await message.reply(new_content, mention_author=False)
-                        logger.info(f'Sent reply but could not suppress original embed')
-                        # Log audit: embedded with reply (forbidden)
-                        await self.bot.db.insert_audit_log(
-                            server_id=guild.id,
-                            user_id=message.author.id,
-                            action='embedded_with_reply_forbidden',
-                            target_type='message',
-                            target_id=str(message.id),
-                            details={
-                                'original_url': original_url,
-                                'embedded_url': embedded_url,
-                                'prefix': prefix,
-                                'message_id': message.id
-                            }
-                        )
-                        return
-                    except:
-                        break
-                except discord.HTTPException as e:
-                    logger.error(f'Failed to suppress embed/send reply: {e}')
-                    break
+                posted = await self._post_embed(message, original_url, embedded_url, prefix, policy, webhook_mode)
+                if posted:
+                    return
+                break
             else:
                 logger.warning(f'Prefix "{prefix}" failed: {error}')
+        if deadline.expired:
+            await self._handle_timeout(message, original_url, deadline)
+            return
+        # Fall back to a native embed built from cached post metadata
+        if await self._post_native_embed(message, original_url, source_url, metadata_task, deadline):
+            return
         # Log audit: all prefixes failed
         await self.bot.db.insert_audit_log(
             server_id=guild.id,
@@ -492,68 +614,416 @@ class InstagramEmbed(commands.Cog):
             error='All embed prefixes failed validation'
         )
 
-    async def _repost_with_webhook(self, message: discord.Message, embedded_url: str):
+    async def _post_native_embed(
+        self,
+        message: discord.Message,
+        original_url: str,
+        source_url: str,
+        metadata_task: asyncio.Task,
+        deadline: Deadline
+    ) -> bool:
+        """
+        Reply with a native Discord embed built from post metadata when no prefix validated.
+        
+        Args:
+            message: Discord message containing the URL
+            original_url: Original Instagram URL
+            source_url: Canonical Instagram URL
+            metadata_task: Metadata prefetch started with the validation
+            deadline: The job's deadline
+            
+        Returns:
+            True if a native embed was posted
         """
-        Delete the original message and repost as the user using a webhook (only in text channels).
-        Returns the webhook message.
+        if not message.guild:
+            return False
+        try:
+            metadata = await asyncio.wait_for(asyncio.shield(metadata_task), timeout=max(0.5, deadline.remaining()))
+        except Exception as e:
+            logger.warning(f'Post metadata unavailable for {original_url}: {e}')
+            return False
+        if not metadata:
+            return False
+        try:
+            reply_msg = await self.bot.discord_executor.call(
+                'reply',
+                lambda: message.reply(embed=build_native_embed('instagram', source_url, metadata), mention_author=False),
+                message.channel.id
+            )
+            self.bot.startup.mark('first_embed')
+            self.bot.embed_latency.record('instagram', message)
+            await self.bot.db.insert_message_data(
+                message_id=message.id,
+                channel_id=message.channel.id,
+                server_id=message.guild.id,
+                user_id=message.author.id,
+                original_url=original_url,
+                post_key=self._post_key(original_url),
+                embedded_url=None,
+                embed_prefix_used='native',
+                validation_status='success',
+                validation_error=None
+            )
+            # Log audit: native embed fallback
+            await self.bot.db.insert_audit_log(
+                server_id=message.guild.id,
+                user_id=message.author.id,
+                action='native_embed_fallback',
+                target_type='message',
+                target_id=str(reply_msg.id),
+                details={
+                    'original_url': original_url,
+                    'metadata_source': metadata.get('source'),
+                    'message_id': message.id
+                }
+            )
+            logger.info(f'Posted native embed for URL: {original_url}')
+            return True
+        except Exception as e:
+            logger.error(f'Failed to post native embed for {original_url}: {e}')
+            return False
+    
+    def _resolved_url(self, original_url: str) -> str:
+        """The URL as posted, or the post URL a share/short link resolved to."""
+        return self.bot.link_resolver.peek(original_url) or original_url
+    
+    async def _resolve_link(self, url: str) -> Optional[str]:
         """
-        # Only allow in text channels
-        if not isinstance(message.channel, discord.TextChannel):
-            logger.warning('Webhook repost attempted in non-text channel; skipping.')
-            raise ValueError('Webhook repost only works in text channels')
+        Resolve a share/short link to a Instagram post URL.
         
-        guild = message.guild
-        if not guild:
-            logger.warning('Webhook repost attempted in message with no guild; skipping.')
-            raise ValueError('Webhook repost requires a guild')
+        Returns:
+            The resolved post URL, or None if it doesn't lead to a Instagram post
+        """
+        resolved = await self.bot.link_resolver.resolve(url, is_final=INSTAGRAM_URL_PATTERN.match)
+        if resolved and INSTAGRAM_URL_PATTERN.match(resolved):
+            return resolved
+        return None
+    
+    def _canonical_url(self, original_url: str) -> str:
+        """Canonical form of a Instagram URL used for embedding (falls back to the URL as posted)."""
+        canonical = canonicalize_instagram_url(self._resolved_url(original_url))
+        return canonical[2] if canonical else original_url
+    
+    def _post_key(self, original_url: str) -> Optional[str]:
+        """Canonical (platform:post_id) key of a Instagram URL."""
+        canonical = canonicalize_instagram_url(self._resolved_url(original_url))
+        return post_key(canonical[0], canonical[1]) if canonical else None
+    
+    async def _verify_optimistic_embed(
+        self,
+        message: discord.Message,
+        original_url: str,
+        posted: discord.Message,
+        embeds: Tuple[EmbedRewrite, ...]
+    ):
+        """
+        Validate an optimistically posted embed and switch it to the next working prefix if it fails.
         
+        Args:
+            message: Original Discord message
+            original_url: Original Instagram URL
+            posted: The reply or webhook message that was posted optimistically
+            embeds: The guild's embeds in priority order (the first one was posted)
+        """
+        if not message.guild:
+            return
+        source_url = self._canonical_url(original_url)
+        posted_url = embeds[0].apply(source_url)
         try:
-            # Delete the original message
-            await message.delete()
-            logger.info(f'Deleted original message {message.id}')
-        except discord.Forbidden:
-            logger.error(f"Missing 'Manage Messages' permission to delete message {message.id}")
-            raise
+            is_valid, error = await self._validate_url(posted_url)
+            if is_valid:
+                return
+            logger.warning(f'Optimistic prefix "{embeds[0].prefix}" failed verification: {error}')
+            for embed in embeds[1:]:
+                prefix = embed.prefix
+                embedded_url = embed.apply(source_url)
+                is_valid, error = await self._validate_url(embedded_url)
+                if not is_valid:
+                    logger.warning(f'Prefix "{prefix}" failed: {error}')
+                    continue
+                await self.bot.discord_executor.call(
+                    'correct_embed',
+                    lambda: posted.edit(content=(posted.content or posted_url).replace(posted_url, embedded_url)),
+                    message.channel.id
+                )
+                await self.bot.db.update_message_embed(
+                    message_id=message.id,
+                    embedded_url=embedded_url,
+                    embed_prefix_used=prefix,
+                    validation_status='success',
+                    validation_error=None
+                )
+                # Log audit: optimistic embed corrected
+                await self.bot.db.insert_audit_log(
+                    server_id=message.guild.id,
+                    user_id=message.author.id,
+                    action='optimistic_embed_corrected',
+                    target_type='message',
+                    target_id=str(posted.id),
+                    details={
+                        'original_url': original_url,
+                        'embedded_url': embedded_url,
+                        'prefix': prefix,
+                        'message_id': message.id
+                    }
+                )
+                logger.info(f'Switched optimistic embed to prefix "{prefix}" for URL: {original_url}')
+                return
+            error = 'All embed prefixes failed verification'
+            await self.bot.db.update_message_embed(
+                message_id=message.id,
+                embedded_url=posted_url,
+                embed_prefix_used=embeds[0].prefix,
+                validation_status='failed',
+                validation_error=error
+            )
+            # Log audit: optimistic embed failed
+            await self.bot.db.insert_audit_log(
+                server_id=message.guild.id,
+                user_id=message.author.id,
+                action='optimistic_embed_failed',
+                target_type='message',
+                target_id=str(posted.id),
+                details={
+                    'original_url': original_url,
+                    'error': error,
+                    'message_id': message.id
+                }
+            )
         except Exception as e:
-            logger.error(f"Failed to delete message {message.id}: {e}")
-            raise
+            logger.error(f'Error verifying optimistic embed for {original_url}: {e}', exc_info=True)
+    
+    async def _post_embed(
+        self,
+        message: discord.Message,
+        original_url: str,
+        embedded_url: str,
+        prefix: str,
+        policy: GuildEmbedPolicy,
+        webhook_mode: bool
+    ) -> Optional[discord.Message]:
+        """
+        Post a validated embedded URL (webhook repost or reply) and record it.
         
-        try:
-            # Find or create webhook
-            webhooks = await message.channel.webhooks()
-            webhook = None
-            for wh in webhooks:
-                if wh.user and wh.user.id == guild.me.id:
-                    webhook = wh
-                    break
+        Args:
+            message: Discord message containing the URL
+            original_url: Original Instagram URL
+            embedded_url: Validated embedded URL
+            prefix: Prefix used to build the embedded URL
+            policy: The server's compiled Instagram embed policy
+            webhook_mode: Whether to repost via webhook
             
-            if not webhook:
-                webhook = await message.channel.create_webhook(name="GFCBot")
-                logger.info(f'Created new webhook in channel {message.channel.id}')
+        Returns:
+            The posted reply or webhook message, or None if posting failed
+        """
+        guild = message.guild
+        if not guild:
+            return None
+        if webhook_mode and isinstance(message.channel, discord.TextChannel):
+            logger.info(f'Using webhook repost mode for message {message.id}')
+            plan = ActionPlan(self.bot.discord_executor, bucket=message.channel.id)
+            self._plan_webhook_repost(plan, message, embedded_url)
             
-            # Send message via webhook
+            async def record():
+                webhook_msg = plan.result('webhook_send')
+                await self.bot.db.insert_message_data(
+                    message_id=message.id,
+                    channel_id=message.channel.id,
+                    server_id=guild.id,
+                    user_id=message.author.id,
+                    original_url=original_url,
+                    post_key=self._post_key(original_url),
+                    embedded_url=embedded_url,
+                    embed_prefix_used=prefix,
+                    validation_status='success',
+                    validation_error=None,
+                    webhook_message_id=webhook_msg.id
+                )
+                # Log audit: reposted with webhook
+                await self.bot.db.insert_audit_log(
+                    server_id=guild.id,
+                    user_id=message.author.id,
+                    action='reposted_with_webhook',
+                    target_type='webhook_message',
+                    target_id=str(webhook_msg.id),
+                    details={
+                        'original_url': original_url,
+                        'embedded_url': embedded_url,
+                        'prefix': prefix,
+                        'message_id': message.id,
+                        'webhook_message_id': webhook_msg.id
+                    }
+                )
+            
+            plan.add('record', record, after=('webhook_send',), discord_call=False)
+            await plan.run()
+            error = plan.error('webhook_send')
+            if not error:
+                if plan.error('record'):
+                    logger.error(f'Error recording webhook repost: {plan.error("record")}', exc_info=plan.error('record'))
+                logger.info(f'Successfully reposted with webhook for prefix "{prefix}"')
+                self.bot.startup.mark('first_embed')
+                self.bot.embed_latency.record('instagram', message)
+                return plan.result('webhook_send')
+            # Webhook repost failed - fall back to normal reply mode
+            logger.warning(f'Webhook repost failed ({error}), falling back to reply mode')
+        return await self._reply_with_embed(message, original_url, embedded_url, prefix, policy)
+    
+    async def _reply_with_embed(
+        self,
+        message: discord.Message,
+        original_url: str,
+        embedded_url: str,
+        prefix: str,
+        policy: GuildEmbedPolicy
+    ) -> Optional[discord.Message]:
+        """
+        Reply with the message content rewritten to the embedded URL and record it.
+        
+        Suppressing the original embed runs alongside the reply, and the
+        database writes run once the reply is out.
+
+        Args:
+            message: Discord message containing the URL
+            original_url: Original Instagram URL
+            embedded_url: Validated embedded URL
+            prefix: Prefix used to build the embedded URL
+            policy: The server's compiled Instagram embed policy
+
+        Returns:
+            The reply, or None if replying failed
+        """
+        guild = message.guild
+        new_content = message.content.replace(original_url, embedded_url)
+        plan = ActionPlan(self.bot.discord_executor, bucket=message.channel.id)
+        if policy.suppress_original_embed:
+            plan.add('suppress', lambda: message.edit(suppress=True))
+        plan.add('reply', lambda: message.reply(new_content, mention_author=False))
+        
+        async def record():
+            await self.bot.db.insert_message_data(
+                message_id=message.id,
+                channel_id=message.channel.id,
+                server_id=guild.id,
+                user_id=message.author.id,
+                original_url=original_url,
+                post_key=self._post_key(original_url),
+                embedded_url=embedded_url,
+                embed_prefix_used=prefix,
+                validation_status='success',
+                validation_error=None
+            )
+            # Log audit: embedded with reply (forbidden if the original embed could not be suppressed)
+            forbidden = plan.has('suppress') and isinstance(plan.error('suppress'), discord.Forbidden)
+            await self.bot.db.insert_audit_log(
+                server_id=guild.id,
+                user_id=message.author.id,
+                action='embedded_with_reply_forbidden' if forbidden else 'embedded_with_reply',
+                target_type='message',
+                target_id=str(message.id),
+                details={
+                    'original_url': original_url,
+                    'embedded_url': embedded_url,
+                    'prefix': prefix,
+                    'message_id': message.id
+                }
+            )
+        
+        plan.add(
+            'record',
+            record,
+            after=('reply',),
+            settled_after=('suppress',) if plan.has('suppress') else (),
+            discord_call=False
+        )
+        await plan.run()
+        
+        error = plan.error('reply')
+        if error:
+            if isinstance(error, discord.Forbidden):
+                logger.error(f'Missing permissions to send message in channel {message.channel.id}')
+            else:
+                logger.error(f'Failed to send reply: {error}')
+            return None
+        suppress_error = plan.error('suppress') if plan.has('suppress') else None
+        if isinstance(suppress_error, discord.Forbidden):
+            logger.error(f'Missing permissions to suppress embeds in channel {message.channel.id}')
+            logger.info(f'Sent reply but could not suppress original embed')
+        elif suppress_error:
+            logger.warning(f'Failed to suppress original Instagram embed: {suppress_error}')
+        if plan.error('record'):
+            logger.error(f'Error recording embedded URL: {plan.error("record")}', exc_info=plan.error('record'))
+        logger.info(f'Successfully embedded URL with prefix "{prefix}"')
+        self.bot.startup.mark('first_embed')
+        self.bot.embed_latency.record('instagram', message)
+        return plan.result('reply')
+
+    def _plan_webhook_repost(self, plan: ActionPlan, message: discord.Message, embedded_url: str):
+        """
+        Add deleting the original message and reposting it as the user via webhook (text channels only) to a plan.
+        
+        Deleting the original ('delete') and looking up the channel's webhook
+        ('webhook') run concurrently; the send ('webhook_send') waits for both,
+        so nothing is reposted while the original is still up.
+        """
+        plan.add('delete', lambda: message.delete())
+        plan.add('webhook', lambda: self._get_webhook(message.channel))  # type: ignore
+        plan.add(
+            'webhook_send',
+            lambda: self._send_with_webhook(plan.result('webhook'), message, embedded_url),
+            after=('delete', 'webhook')
+        )
+    
+    async def _send_with_webhook(
+        self,
+        webhook: discord.Webhook,
+        message: discord.Message,
+        embedded_url: str
+    ) -> discord.Message:
+        """Send the repost via the channel's webhook, looking the webhook up again if it was deleted."""
+        try:
             webhook_msg = await webhook.send(
                 content=embedded_url,
                 username=f"{message.author.display_name} (via GFC Bot)",
                 avatar_url=message.author.display_avatar.url,
                 wait=True
             )
-            logger.info(f'Successfully reposted message via webhook with user {message.author.display_name} (via GFC Bot)')
-            return webhook_msg
-        except discord.Forbidden as e:
-            logger.error(f"Missing 'Manage Webhooks' permission: {e}")
-            raise
-        except Exception as e:
-            logger.error(f"Failed to repost with webhook: {e}")
-            raise
+        except discord.NotFound:
+            # The cached webhook was deleted; look it up again
+            self.webhooks.pop(message.channel.id, None)
+            webhook = await self._get_webhook(message.channel)  # type: ignore
+            webhook_msg = await webhook.send(
+                content=embedded_url,
+                username=f"{message.author.display_name} (via GFC Bot)",
+                avatar_url=message.author.display_avatar.url,
+                wait=True
+            )
+        logger.info(f'Successfully reposted message via webhook with user {message.author.display_name} (via GFC Bot)')
+        return webhook_msg
+    
+    async def _get_webhook(self, channel: discord.TextChannel) -> discord.Webhook:
+        """Find or create the bot's webhook in a channel (cached per channel)."""
+        webhook = self.webhooks.get(channel.id)
+        if webhook:
+            return webhook
+        for wh in await channel.webhooks():
+            if wh.user and self.bot.user and wh.user.id == self.bot.user.id:
+                webhook = wh
+                break
+        if not webhook:
+            webhook = await channel.create_webhook(name="GFCBot")
+            logger.info(f'Created new webhook in channel {channel.id}')
+        self.webhooks[channel.id] = webhook
+        return webhook
     
-    async def _validate_url(self, url: str, timeout: int = 5) -> tuple[bool, Optional[str]]:
+    async def _validate_url(self, url: str, timeout: float = 5, post_key: Optional[str] = None) -> tuple[bool, Optional[str]]:
         """
         Validate if a URL is accessible.
         
         Args:
             url: URL to validate
-            timeout: Timeout in seconds
+            timeout: Total timeout in seconds across the HEAD and GET attempts
+            post_key: Canonical post key; og: tags seen during validation are cached under it
             
         Returns:
             Tuple of (is_valid, error_message)
@@ -561,27 +1031,133 @@ class InstagramEmbed(commands.Cog):
         if not self.session:
             return False, 'HTTP session not initialized'
         
+        # Concurrent validations of the same URL (cross-posts, other cogs) share one request
+        return await self.bot.validation_flight.do(
+            url, lambda: self._timed_check_url(url, timeout, post_key), timeout=timeout, timeout_result=(False, 'Request timeout')
+        )
+    
+    async def _timed_check_url(self, url: str, timeout: float, post_key: Optional[str] = None) -> tuple:
+        """Run a validation and record its latency and outcome in the prefix health stats."""
+        started = time.monotonic()
+        is_valid, error = await self._check_url(url, timeout, post_key)
+        self.bot.prefix_health.record(url, time.monotonic() - started, is_valid, error)
+        return is_valid, error
+    
+    async def _check_url(self, url: str, timeout: float, post_key: Optional[str] = None) -> tuple[bool, Optional[str]]:
+        """Issue the HEAD request and/or bounded GET for a validation."""
+        started = time.monotonic()
+        if VALIDATION_MODE != 'bounded':
+            try:
+                # Try HEAD request first
+                async with self.session.head(url, timeout=aiohttp.ClientTimeout(total=timeout), allow_redirects=True) as response:  # type: ignore
+                    if response.status < 400:
+                        return True, None
+            except asyncio.TimeoutError:
+                return False, 'Request timeout'
+            except aiohttp.ClientError as e:
+                return False, f'Client error: {str(e)}'
+            except Exception as e:
+                return False, f'Unexpected error: {str(e)}'
+        # Bounded GET (also the fallback when HEAD is rejected, e.g. 405) with whatever is left of the timeout
+        probe = await probe_url(self.session, url, max(0.0, timeout - (time.monotonic() - started)))  # type: ignore
+        self.bot.metrics.incr('validation_verdicts_total', platform='instagram', verdict=probe['verdict'])
+        logger.info(f'Bounded validation of {url}: {probe["verdict"]} (status {probe["status"]}, {probe["bytes_read"]} bytes)')
+        if post_key and probe['meta']:
+            await self.bot.post_metadata.record_og_tags(post_key, probe['meta'])
+        return is_valid_verdict(probe['verdict']), probe['error']
+    
+    async def _retry_embed(self, job: Dict) -> tuple:
+        """
+        Re-validate a link from the retry queue and post the embed once a prefix recovers.
+        
+        The embed is always posted as a reply: reposting through a webhook
+        would move the message long after it was sent.
+        
+        Args:
+            job: embed_retry_queue row
+            
+        Returns:
+            Tuple of (done, error); done is True once the embed is posted or the message is gone
+        """
+        if not self.instagram_feature_id:
+            return True, 'Feature unavailable'
+        original_url = job['original_url']
+        if INSTAGRAM_SHARE_PATTERN.match(original_url):
+            await self._resolve_link(original_url)
+        source_url = self._canonical_url(original_url)
+        policy = await self.get_embed_policy(self.bot.get_guild(job['server_id']) or discord.Object(job['server_id']))
+        if not policy:
+            return True, 'Feature unavailable'
+        for embed in policy.embeds:
+            prefix = embed.prefix
+            embedded_url = embed.apply(source_url)
+            is_valid, error = await self._validate_url(embedded_url, timeout=MAX_ATTEMPT_TIMEOUT, post_key=job['post_key'])
+            if not is_valid:
+                continue
+            message = await self.bot.job_queue.fetch_message(self.bot, job['channel_id'], job['message_id'])
+            if not message:
+                return True, 'Message deleted'
+            posted = await self._post_embed(message, original_url, embedded_url, prefix, policy, webhook_mode=False)
+            if not posted:
+                return False, 'Failed to post embed'
+            await self.bot.db.update_message_embed(
+                message_id=message.id,
+                embedded_url=embedded_url,
+                embed_prefix_used=prefix,
+                validation_status='success',
+                validation_error=None
+            )
+            logger.info(f'Retry succeeded with prefix "{prefix}" after {job["attempts"] + 1} attempt(s): {original_url}')
+            return True, None
+        return False, 'All embed prefixes failed validation'
+    
+    async def _handle_timeout(
+        self,
+        message: discord.Message,
+        original_url: str,
+        deadline: Deadline
+    ):
+        """
+        Finalize a link whose deadline passed before an embed could be posted.
+        
+        Args:
+            message: Discord message
+            original_url: Original Instagram URL
+            deadline: The job's deadline
+        """
+        if not message.guild:
+            return
+        error = f'Embed deadline exceeded after {deadline.elapsed():.1f}s'
+        logger.warning(f'{error} for URL: {original_url}')
         try:
-            # Try HEAD request first
-            async with self.session.head(url, timeout=timeout, allow_redirects=True) as response:
-                if response.status < 400:
-                    return True, None
-                else:
-                    # Try GET as fallback
-                    async with self.session.get(url, timeout=timeout, allow_redirects=True) as get_response:
-                        if get_response.status < 400:
-                            return True, None
-                        return False, f'HTTP {get_response.status}'
-                        
-        except asyncio.TimeoutError:
-            return False, 'Request timeout'
-        except aiohttp.ClientError as e:
-            return False, f'Client error: {str(e)}'
+            await self.bot.db.insert_message_data(
+                message_id=message.id,
+                channel_id=message.channel.id,
+                server_id=message.guild.id,
+                user_id=message.author.id,
+                original_url=original_url,
+                post_key=self._post_key(original_url),
+                embedded_url=None,
+                embed_prefix_used=None,
+                validation_status='timeout',
+                validation_error=error
+            )
+            await self.bot.retry_queue.schedule(message, 'instagram', original_url, self._post_key(original_url), error)
+            # Log audit: deadline exceeded
+            await self.bot.db.insert_audit_log(
+                server_id=message.guild.id,
+                user_id=message.author.id,
+                action='embed_timeout',
+                target_type='message',
+                target_id=str(message.id),
+                details={
+                    'original_url': original_url,
+                    'error': error,
+                    'message_id': message.id
+                }
+            )
         except Exception as e:
-            return False, f'Unexpected error: {str(e)}'
-    
-
-        return False
+            logger.warning(f'Failed to record embed timeout: {e}')
     
     async def _handle_failure(
         self,
@@ -608,17 +1184,20 @@ class InstagramEmbed(commands.Cog):
             server_id=message.guild.id,
             user_id=message.author.id,
             original_url=original_url,
+            post_key=self._post_key(original_url),
             embedded_url=None,
             embed_prefix_used=None,
             validation_status='failed',
             validation_error=error
         )
+        if await self.bot.retry_queue.schedule(message, 'instagram', original_url, self._post_key(original_url), error):
+            # The embed is posted as a reply once a prefix recovers, as for Twitter; a warning now would go stale
+            return
         
         # Send reply with warning message only
         try:
-            await message.reply(
-                f'⚠️ {error}',
-                mention_author=False
+            await self.bot.discord_executor.call(
+                'failure_reply', lambda: message.reply(f'⚠️ {error}', mention_author=False), message.channel.id
             )
         except discord.HTTPException as e:
             logger.error(f'Failed to send reply: {e}')
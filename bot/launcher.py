@@ -0,0 +1,93 @@
+"""
+Shard cluster launcher.
+
+Splits the bot's shards into contiguous ranges and runs each range as an
+AutoShardedBot in its own process, restarting any cluster that exits.
+
+Usage:
+    python launcher.py [--shard-count N] [--clusters P]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import time
+
+import aiohttp
+from dotenv import load_dotenv
+
+from utils.process_pool import ProcessPool
+from utils.sharding import split_shards, format_shard_ids
+
+logger = logging.getLogger('gfcbot.launcher')
+
+GATEWAY_BOT_URL = 'https://discord.com/api/v10/gateway/bot'
+
+# Discord allows one IDENTIFY per 5 seconds; later clusters wait for earlier ones to connect
+IDENTIFY_INTERVAL = 5.5
+
+
+def run_cluster(index: int, shard_count: int, shard_ids: str, start_delay: float = 0):
+    """Entry point of one shard cluster process."""
+    time.sleep(start_delay)
+    # Must be set before the bot modules read their configuration
+    os.environ['SHARDING_ENABLED'] = 'true'
+    os.environ['SHARD_COUNT'] = str(shard_count)
+    os.environ['SHARD_IDS'] = shard_ids
+    base_id = os.getenv('INSTANCE_ID') or socket.gethostname()
+    os.environ['INSTANCE_ID'] = f'{base_id}-cluster-{index}'
+
+    import main
+    if main.USE_UVLOOP:
+        main.install_uvloop()
+    asyncio.run(main.main())
+
+
+async def fetch_recommended_shards(token: str) -> int:
+    """Ask Discord for the recommended shard count."""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(GATEWAY_BOT_URL, headers={'Authorization': f'Bot {token}'}) as resp:
+            resp.raise_for_status()
+            data = await resp.json()
+            return int(data['shards'])
+
+
+def main():
+    """Start one process per shard range."""
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='GFC Bot shard cluster launcher')
+    parser.add_argument(
+        '--shard-count', type=int,
+        default=int(os.getenv('SHARD_COUNT')) if os.getenv('SHARD_COUNT') else None,
+        help="Total shards (default: SHARD_COUNT or Discord's recommendation)"
+    )
+    parser.add_argument(
+        '--clusters', type=int,
+        default=int(os.getenv('SHARD_CLUSTERS', '2')),
+        help='Number of processes to spread the shards over (default: SHARD_CLUSTERS or 2)'
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    shard_count = args.shard_count
+    if not shard_count:
+        token = os.getenv('DISCORD_TOKEN')
+        if not token:
+            logger.error('DISCORD_TOKEN not found in environment variables')
+            return
+        shard_count = asyncio.run(fetch_recommended_shards(token))
+        logger.info(f'Discord recommends {shard_count} shard(s)')
+
+    pool = ProcessPool('gfcbot-cluster')
+    for index, shard_ids in enumerate(split_shards(shard_count, args.clusters)):
+        logger.info(f'Cluster {index}: shards {format_shard_ids(shard_ids)} of {shard_count}')
+        pool.add(index, run_cluster, (index, shard_count, format_shard_ids(shard_ids), shard_ids[0] * IDENTIFY_INTERVAL))
+    pool.run()
+
+
+if __name__ == '__main__':
+    main()
@@ -4,8 +4,27 @@ from discord.ext import commands
 from dotenv import load_dotenv
 import logging
 import asyncio
-from utils.database import Database
+import signal
+from typing import Optional, List
+from utils.storage import create_database
 from utils.feature_manager import FeatureManager
+from utils.prefix_health import PrefixHealth
+from utils.metrics import Metrics
+from utils.single_flight import SingleFlight
+from utils.http_client import HttpClient
+from utils.link_resolver import LinkResolver
+from utils.post_metadata import PostMetadataCache
+from utils.retry_queue import RetryQueue
+from utils.job_queue import JobQueue
+from utils.sharding import SHARDING_ENABLED, SHARD_COUNT, SHARD_IDS, format_shard_ids
+from utils.leader import LeaderElection
+from utils.task_supervisor import TaskSupervisor
+from utils.discord_actions import DiscordExecutor
+from utils.cache_mode import CACHE_MODE, cache_options
+from utils.startup import StartupTimer, sync_command_tree
+from utils.loop_monitor import LOOP_MONITOR_ENABLED, USE_UVLOOP, LoopMonitor, install_uvloop
+from utils.profiler import SamplingProfiler
+from utils.diagnostics import EmbedLatency
 
 # Load environment variables
 load_dotenv()
@@ -23,11 +42,25 @@ intents.message_content = True
 intents.guilds = True
 intents.members = True
 
-bot = commands.Bot(
-    command_prefix=os.getenv('COMMAND_PREFIX', '!'),
-    intents=intents,
-    help_command=None
-)
+if SHARDING_ENABLED:
+    if SHARD_IDS and not SHARD_COUNT:
+        raise ValueError("SHARD_IDS requires SHARD_COUNT to be set")
+    bot = commands.AutoShardedBot(
+        command_prefix=os.getenv('COMMAND_PREFIX', '!'),
+        intents=intents,
+        help_command=None,
+        shard_count=SHARD_COUNT,
+        shard_ids=SHARD_IDS,
+        **cache_options()
+    )
+else:
+    bot = commands.Bot(
+        command_prefix=os.getenv('COMMAND_PREFIX', '!'),
+        intents=intents,
+        help_command=None,
+        **cache_options()
+    )
+logger.info(f'Cache mode: {CACHE_MODE}')
 
 # Initialize database and feature manager
 database_url = os.getenv('DATABASE_URL')
@@ -36,18 +69,54 @@ if not database_url:
     raise ValueError("DATABASE_URL environment variable is required but not set!")
     
 logger.info(f"DATABASE_URL environment variable found")
-db = Database(
-    database_url=database_url
-)
+db = create_database(database_url)
 
 feature_manager = FeatureManager(
     db=db,
     cache_enabled=os.getenv('ENABLE_PERMISSION_CACHE', 'false').lower() == 'true'
 )
 
+prefix_health = PrefixHealth()
+metrics = Metrics()
+if SHARD_IDS:
+    # Tell apart the processes of a shard cluster
+    metrics.default_labels['cluster'] = format_shard_ids(SHARD_IDS)
+validation_flight = SingleFlight('validation', metrics=metrics)
+http_client = HttpClient(metrics=metrics)
+link_resolver = LinkResolver(http_client, db, metrics=metrics)
+post_metadata = PostMetadataCache(http_client, db, metrics=metrics)
+retry_queue = RetryQueue(db, metrics=metrics)
+job_queue = JobQueue(db, metrics=metrics)
+task_supervisor = TaskSupervisor(metrics=metrics)
+discord_executor = DiscordExecutor(metrics=metrics)
+startup = StartupTimer(metrics=metrics)
+loop_monitor = LoopMonitor(metrics=metrics)
+profiler = SamplingProfiler()
+embed_latency = EmbedLatency(metrics=metrics)
+task_supervisor.add_drain_hook('job_queue', job_queue.drain)
+leader = LeaderElection(db, 'gfcbot-maintenance', metrics=metrics)
+
+# Retention of cached link resolutions and post metadata
+CACHE_RETENTION_DAYS = int(os.getenv('CACHE_RETENTION_DAYS', '30'))
+
 # Store instances for access by cogs
 bot.db = db  # type: ignore
 bot.feature_manager = feature_manager  # type: ignore
+bot.prefix_health = prefix_health  # type: ignore
+bot.metrics = metrics  # type: ignore
+bot.validation_flight = validation_flight  # type: ignore
+bot.http_client = http_client  # type: ignore
+bot.link_resolver = link_resolver  # type: ignore
+bot.post_metadata = post_metadata  # type: ignore
+bot.retry_queue = retry_queue  # type: ignore
+bot.job_queue = job_queue  # type: ignore
+bot.task_supervisor = task_supervisor  # type: ignore
+bot.discord_executor = discord_executor  # type: ignore
+bot.startup = startup  # type: ignore
+bot.loop_monitor = loop_monitor  # type: ignore
+bot.profiler = profiler  # type: ignore
+bot.embed_latency = embed_latency  # type: ignore
+bot.leader = leader  # type: ignore
 
 
 @bot.event
@@ -56,12 +125,14 @@ async def on_ready():
     logger.info(f'{bot.user} has connected to Discord!')
     logger.info(f'Connected to {len(bot.guilds)} guilds')
     
-    # Sync slash commands
-    try:
-        synced = await bot.tree.sync()
-        logger.info(f'Synced {len(synced)} command(s)')
-    except Exception as e:
-        logger.error(f'Failed to sync commands: {e}')
+    # Sync slash commands on the first ready only (on_ready fires again on reconnects), and only if they changed
+    if startup.mark('ready') is not None:
+        try:
+            synced = await sync_command_tree(bot, db)
+            if synced is not None:
+                logger.info(f'Synced {synced} command(s)')
+        except Exception as e:
+            logger.error(f'Failed to sync commands: {e}')
     
     # Set bot status from database
     try:
@@ -79,18 +150,67 @@ async def on_ready():
         )
     )
     
-    # Start background task to check for status updates
-    bot.loop.create_task(update_bot_status_task())
+    # Background loops (on_ready fires again on every reconnect; the supervisor keeps one of each).
+    # Presence is per gateway connection, so every process polls the status for its own shards.
+    task_supervisor.start('bot_status', lambda: update_bot_status_task(bot_status))
+    if bot.shard_count:
+        task_supervisor.start('shard_stats', shard_stats_task)
+    
+    # Cluster-wide jobs run only in the process holding the leader lock
+    task_supervisor.start('leader_election', leader.run)
+    task_supervisor.start_singleton('cache_maintenance', cache_maintenance_task, leader)
+    
+    # Open connections to the configured prefix hosts before the first link arrives
+    task_supervisor.start('prewarm', prewarm_connections)
+
+
+async def shard_stats_task():
+    """Background task publishing per-shard guild counts and gateway latency."""
+    while True:
+        guild_counts = {}
+        for guild in bot.guilds:
+            guild_counts[guild.shard_id] = guild_counts.get(guild.shard_id, 0) + 1
+        for shard_id, latency in bot.latencies:  # type: ignore
+            metrics.gauge('shard_guilds', guild_counts.get(shard_id, 0), shard=shard_id)
+            metrics.gauge('shard_latency_seconds', latency, shard=shard_id)
+        await asyncio.sleep(30)
+
+
+async def prewarm_connections():
+    """Pre-warm HTTP connections to every configured embed prefix host."""
+    hosts = []
+    for cog in bot.cogs.values():
+        get_prefix_hosts = getattr(cog, 'get_prefix_hosts', None)
+        if not get_prefix_hosts:
+            continue
+        try:
+            hosts.extend(await get_prefix_hosts())
+        except Exception as e:
+            logger.warning(f'Failed to load prefix hosts from {cog.qualified_name}: {e}')
+    await http_client.prewarm(hosts)
 
 
-async def update_bot_status_task():
+async def cache_maintenance_task():
+    """Cluster-wide job pruning cached link resolutions and post metadata."""
+    while True:
+        try:
+            pruned = await db.prune_cached_lookups(CACHE_RETENTION_DAYS)
+            if pruned:
+                logger.info(f'Pruned {pruned} cached lookup(s) older than {CACHE_RETENTION_DAYS} days')
+        except Exception as e:
+            logger.warning(f'Failed to prune cached lookups: {e}')
+        await asyncio.sleep(3600)
+
+
+async def update_bot_status_task(current_status: Optional[str] = None):
     """Background task to periodically check and update bot status."""
     await bot.wait_until_ready()
     while True:
         try:
             await asyncio.sleep(30)  # Check every 30 seconds
             bot_status = await db.get_bot_setting('bot_status')
-            if bot_status:
+            if bot_status and bot_status != current_status:
+                current_status = bot_status
                 await bot.change_presence(
                     activity=discord.Activity(
                         type=discord.ActivityType.watching,
@@ -114,6 +234,14 @@ async def on_guild_join(guild):
 async def on_guild_remove(guild):
     """Event handler for when bot is removed from a guild."""
     logger.info(f'Removed from guild: {guild.name} (ID: {guild.id})')
+    
+    # Drop per-guild cache entries; caches only hold guilds this process's shards own
+    feature_manager.invalidate_guild(guild.id)
+    embed_latency.evict(guild.id)
+    for cog in bot.cogs.values():
+        evict_guild = getattr(cog, 'evict_guild', None)
+        if evict_guild:
+            evict_guild(guild.id)
 
 
 @bot.event
@@ -130,38 +258,74 @@ async def on_command_error(ctx, error):
         await ctx.send("❌ An error occurred while executing the command.")
 
 
-async def load_cogs():
-    """Load all cog modules."""
-    cogs = [
-        'cogs.instagram_embed',
-        'cogs.twitter_embed',
-        'cogs.permissions',
-        'cogs.admin'
-    ]
+async def load_cogs(cogs: Optional[List[str]] = None):
+    """Load all cog modules, or only the given ones."""
+    if cogs is None:
+        cogs = [
+            'cogs.instagram_embed',
+            'cogs.twitter_embed',
+            'cogs.backfill',
+            'cogs.permissions',
+            'cogs.admin'
+        ]
     
-    for cog in cogs:
-        try:
-            await bot.load_extension(cog)
-            logger.info(f'Loaded cog: {cog}')
-        except Exception as e:
-            logger.error(f'Failed to load cog {cog}: {e}')
+    # One query for every cog's feature ID instead of one per cog_load
+    try:
+        await feature_manager.prefetch_feature_ids()
+    except Exception as e:
+        logger.warning(f'Failed to prefetch feature ids: {e}')
+    
+    # Cogs load concurrently; their cog_load hooks mostly wait on the database
+    await asyncio.gather(*(load_cog(cog) for cog in cogs))
+    startup.mark('cogs_loaded')
+
+
+async def load_cog(cog: str):
+    """Load one cog module, logging failures."""
+    try:
+        await bot.load_extension(cog)
+        logger.info(f'Loaded cog: {cog}')
+    except Exception as e:
+        logger.error(f'Failed to load cog {cog}: {e}')
+
+
+async def shutdown():
+    """Drain queues and flush buffers within the grace period, then disconnect."""
+    logger.info('Shutting down: draining queues and flushing buffers')
+    await task_supervisor.shutdown()
+    await bot.close()
 
 
 async def main():
     """Main entry point for the bot."""
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, lambda: task_supervisor.start('shutdown', shutdown, restart=False))
     async with bot:
-        # Load all cogs
-        await load_cogs()
-        
-        # Start the bot
-        token = os.getenv('DISCORD_TOKEN')
-        if not token:
-            logger.error('DISCORD_TOKEN not found in environment variables')
-            return
-        
-        await bot.start(token)
+        # Measure loop lag from the start, so slow cog loading and READY processing show up too
+        if LOOP_MONITOR_ENABLED:
+            task_supervisor.start('loop_monitor', loop_monitor.run)
+        # Shared HTTP client must exist before cogs start making requests
+        await http_client.start()
+        try:
+            # Load all cogs
+            await load_cogs()
+            
+            # Start the bot
+            token = os.getenv('DISCORD_TOKEN')
+            if not token:
+                logger.error('DISCORD_TOKEN not found in environment variables')
+                return
+            
+            await bot.start(token)
+        finally:
+            # The drain above still needs the HTTP session and the database pool
+            await http_client.close()
+            await db.close()
 
 
 if __name__ == '__main__':
     import asyncio
+    if USE_UVLOOP:
+        install_uvloop()
     asyncio.run(main())
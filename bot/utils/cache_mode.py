@@ -0,0 +1,62 @@
+import os
+from typing import Any, Dict
+
+import discord
+
+# full: discord.py's defaults (every member cached, guilds chunked at startup, 1000 messages)
+# lean: no member cache or chunking and a smaller message cache; the cogs only need
+# each message's author, which comes with the message
+CACHE_MODE = os.getenv('CACHE_MODE', 'full').lower()
+CACHE_MODES = ('full', 'lean')
+
+# Messages kept in lean mode (the job queue looks link messages up here before fetching them)
+LEAN_MESSAGE_CACHE_SIZE = int(os.getenv('MESSAGE_CACHE_SIZE', '200'))
+
+
+def cache_options(mode: str = CACHE_MODE, message_cache_size: int = LEAN_MESSAGE_CACHE_SIZE) -> Dict[str, Any]:
+    """
+    Client keyword arguments for the member, guild and message caches of a cache mode.
+
+    Args:
+        mode: 'full' or 'lean'
+        message_cache_size: Messages cached in lean mode
+
+    Returns:
+        Keyword arguments for commands.Bot / commands.AutoShardedBot
+
+    Raises:
+        ValueError: If the mode is not supported
+    """
+    if mode == 'full':
+        return {}
+    if mode == 'lean':
+        return {
+            'member_cache_flags': discord.MemberCacheFlags.none(),
+            'chunk_guilds_at_startup': False,
+            'max_messages': message_cache_size
+        }
+    raise ValueError(f"Unsupported CACHE_MODE: {mode!r} (expected one of {', '.join(CACHE_MODES)})")
+
+
+async def get_member(guild: discord.Guild, user: Any) -> Any:
+    """
+    A guild member, from the interaction/message, the member cache or the REST API.
+
+    In lean mode the member cache is empty, so members are fetched.
+
+    Args:
+        guild: Guild the member is in
+        user: User or member (e.g. interaction.user)
+
+    Returns:
+        The member, or None if they are not in the guild or could not be fetched
+    """
+    if isinstance(user, discord.Member) and user.guild.id == guild.id:
+        return user
+    member = guild.get_member(user.id)
+    if member:
+        return member
+    try:
+        return await guild.fetch_member(user.id)
+    except discord.HTTPException:
+        return None
@@ -1,13 +1,32 @@
 import asyncpg  # type: ignore
+import json
 import logging
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
+from utils.storage import Storage
+
 logger = logging.getLogger('gfcbot.database')
 
 
-class Database:
-    """Database interface for GFC Bot using asyncpg."""
+def encode_json(value: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Encode a dict for a JSONB parameter (asyncpg has no JSONB codec registered and expects text)."""
+    if value is None:
+        return None
+    return json.dumps(value, separators=(',', ':'), default=str)
+
+
+class Database(Storage):
+    """
+    Postgres storage backend for GFC Bot using asyncpg.
+
+    MemoryDatabase (utils/memory_database.py) and SqliteDatabase
+    (utils/sqlite_database.py) implement the same Storage interface
+    (utils/storage.py); use create_database() to pick one from a URL.
+    """
+
+    # Shared by every bot process, so cluster-wide jobs need a leader election
+    single_node = False
 
     async def upsert_user(self, user_id: int, username: str):
         """
@@ -82,6 +101,15 @@ class Database:
             await self.pool.close()
             logger.info('Database connection pool closed')
     
+    async def connect_dedicated(self) -> asyncpg.Connection:
+        """
+        Open a connection outside the pool, for session-scoped state such as advisory locks.
+        
+        Returns:
+            New asyncpg connection (the caller closes it)
+        """
+        return await asyncpg.connect(self.connection_string, statement_cache_size=0)
+    
     async def ensure_pruning_config(self, server_id: int):
         """
         Ensure pruning config exists for a server.
@@ -129,6 +157,103 @@ class Database:
                 )
             return [dict(row) for row in rows]
     
+    async def get_feature_embed_prefixes(self, feature_id: str, server_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """
+        Get the distinct active embed prefixes for a feature across servers.
+        
+        Args:
+            feature_id: Feature UUID
+            server_ids: Only these servers (e.g. the guilds of this process's shards); all if None
+            
+        Returns:
+            List of dicts with prefix and embed_type
+        """
+        await self.connect()
+        async with self.pool.acquire() as conn:  # type: ignore
+            rows = await conn.fetch(
+                """
+                SELECT DISTINCT prefix, embed_type
+                FROM embed_configs
+                WHERE feature_id = $1 AND active = true
+                  AND ($2::bigint[] IS NULL OR server_id = ANY($2::bigint[]))
+                """,
+                feature_id, server_ids
+            )
+            return [dict(row) for row in rows]
+    
+    async def get_feature_id(self, feature_name: str) -> Optional[str]:
+        """
+        Get feature ID by name.
+        
+        Args:
+            feature_name: Name of the feature
+            
+        Returns:
+            Feature UUID or None if not found or inactive
+        """
+        await self.connect()
+        async with self.pool.acquire() as conn:  # type: ignore
+            row = await conn.fetchrow(
+                "SELECT id FROM features WHERE name = $1 AND active = true",
+                feature_name
+            )
+            return str(row['id']) if row else None
+    
+    async def get_feature_ids(self) -> Dict[str, str]:
+        """
+        Get the IDs of every active feature in one query.
+        
+        Returns:
+            Dictionary of feature name -> feature UUID
+        """
+        await self.connect()
+        async with self.pool.acquire() as conn:  # type: ignore
+            rows = await conn.fetch("SELECT name, id FROM features WHERE active = true")
+            return {row['name']: str(row['id']) for row in rows}
+    
+    async def check_permission(self, server_id: int, role_ids: List[int], feature_name: str, action: str) -> bool:
+        """
+        Check if any of the roles has permission for a feature action (delete > manage > read).
+        
+        Args:
+            server_id: Discord server ID
+            role_ids: Role IDs to check
+            feature_name: Name of the feature
+            action: 'read', 'manage' or 'delete'
+            
+        Returns:
+            True if permission is granted
+        """
+        await self.connect()
+        async with self.pool.acquire() as conn:  # type: ignore
+            result = await conn.fetchval(
+                "SELECT check_permission($1, $2, $3, $4)",
+                server_id, role_ids, feature_name, action
+            )
+            return bool(result)
+    
+    async def set_feature_permissions(self, server_id: int, role_id: int, feature_id: str, actions: Dict[str, bool]):
+        """
+        Set the actions a role may perform on a feature.
+        
+        Args:
+            server_id: Discord server ID
+            role_id: Discord role ID
+            feature_id: Feature UUID
+            actions: Dict with read, manage and delete flags
+        """
+        await self.connect()
+        async with self.pool.acquire() as conn:  # type: ignore
+            await conn.execute(
+                """
+                INSERT INTO feature_permissions (server_id, role_id, feature_id, actions)
+                VALUES ($1, $2, $3, $4)
+                ON CONFLICT (server_id, role_id, feature_id)
+                DO UPDATE SET actions = $4, updated_at = NOW()
+                """,
+                server_id, role_id, feature_id, encode_json(actions)
+            )
+    
     async def insert_message_data(
         self,
         message_id: int,
@@ -140,7 +265,8 @@ class Database:
         embed_prefix_used: Optional[str],
         validation_status: str,
         validation_error: Optional[str],
-        webhook_message_id: Optional[int] = None
+        webhook_message_id: Optional[int] = None,
+        post_key: Optional[str] = None
     ):
         """
         Insert message transformation data.
@@ -156,6 +282,7 @@ class Database:
             validation_status: 'success', 'failed', or 'timeout'
             validation_error: Error message if failed
             webhook_message_id: ID of webhook message if reposted
+            post_key: Canonical post key (platform:post_id)
         """
         await self.connect()
         async with self.pool.acquire() as conn:  # type: ignore
@@ -164,16 +291,73 @@ class Database:
                 INSERT INTO message_data (
                     message_id, channel_id, server_id, user_id,
                     original_url, embedded_url, embed_prefix_used,
-                    validation_status, validation_error, checked_at, webhook_message_id
+                    validation_status, validation_error, checked_at, webhook_message_id, post_key
                 )
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
                 ON CONFLICT (message_id) DO NOTHING
                 """,
                 message_id, channel_id, server_id, user_id,
                 original_url, embedded_url, embed_prefix_used,
-                validation_status, validation_error, datetime.utcnow(), webhook_message_id
+                validation_status, validation_error, datetime.utcnow(), webhook_message_id, post_key
             )
     
+    async def update_message_embed(
+        self,
+        message_id: int,
+        embedded_url: Optional[str],
+        embed_prefix_used: Optional[str],
+        validation_status: str,
+        validation_error: Optional[str]
+    ):
+        """
+        Update the embed outcome of an existing message transformation record.
+        
+        Args:
+            message_id: Discord message ID (original message)
+            embedded_url: Embedded URL now in use, if any
+            embed_prefix_used: Prefix now in use, if any
+            validation_status: 'success', 'failed', or 'timeout'
+            validation_error: Error message if failed
+        """
+        await self.connect()
+        async with self.pool.acquire() as conn:  # type: ignore
+            await conn.execute(
+                """
+                UPDATE message_data
+                SET embedded_url = $2, embed_prefix_used = $3,
+                    validation_status = $4, validation_error = $5, checked_at = $6
+                WHERE message_id = $1
+                """,
+                message_id, embedded_url, embed_prefix_used,
+                validation_status, validation_error, datetime.utcnow()
+            )
+    
+    async def get_recent_embed(self, channel_id: int, post_key: str, within_minutes: int) -> Optional[Dict[str, Any]]:
+        """
+        Get the most recent successful embed of a post in a channel within a time window.
+        
+        Args:
+            channel_id: Discord channel ID
+            post_key: Canonical post key (platform:post_id)
+            within_minutes: Size of the lookback window
+            
+        Returns:
+            Dict with message_id and webhook_message_id, or None if not found
+        """
+        await self.connect()
+        async with self.pool.acquire() as conn:  # type: ignore
+            row = await conn.fetchrow(
+                """
+                SELECT message_id, webhook_message_id FROM message_data
+                WHERE channel_id = $1 AND post_key = $2 AND validation_status = 'success'
+                  AND created_at > NOW() - make_interval(mins => $3)
+                ORDER BY created_at DESC
+                LIMIT 1
+                """,
+                channel_id, post_key, within_minutes
+            )
+            return dict(row) if row else None
+    
     async def get_original_user_from_webhook(self, webhook_message_id: int) -> Optional[int]:
         """
         Get the original user ID from a webhook message ID.
@@ -195,6 +379,402 @@ class Database:
             )
             return row['user_id'] if row else None
     
+    async def get_resolved_link(self, short_url: str) -> Optional[str]:
+        """
+        Get the cached resolution of a share/short link.
+        
+        Args:
+            short_url: Link as posted
+            
+        Returns:
+            Resolved URL or None if not cached
+        """
+        await self.connect()
+        async with self.pool.acquire() as conn:  # type: ignore
+            row = await conn.fetchrow(
+                "SELECT resolved_url FROM resolved_links WHERE short_url = $1",
+                short_url
+            )
+            return row['resolved_url'] if row else None
+    
+    async def save_resolved_link(self, short_url: str, resolved_url: str):
+        """
+        Cache the resolution of a share/short link.
+        
+        Args:
+            short_url: Link as posted
+            resolved_url: URL it redirects to
+        """
+        await self.connect()
+        async with self.pool.acquire() as conn:  # type: ignore
+            await conn.execute(
+                """
+                INSERT INTO resolved_links (short_url, resolved_url, resolved_at)
+                VALUES ($1, $2, NOW())
+                ON CONFLICT (short_url) DO UPDATE SET resolved_url = EXCLUDED.resolved_url, resolved_at = NOW()
+                """,
+                short_url, resolved_url
+            )
+    
+    async def get_post_metadata(self, post_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get cached metadata for a post.
+        
+        Args:
+            post_key: Canonical post key (platform:post_id)
+            
+        Returns:
+            Dict with title, author, description, media_url, media_type and source, or None
+        """
+        await self.connect()
+        async with self.pool.acquire() as conn:  # type: ignore
+            row = await conn.fetchrow(
+                """
+                SELECT title, author, description, media_url, media_type, source
+                FROM post_metadata WHERE post_key = $1
+                """,
+                post_key
+            )
+            return dict(row) if row else None
+    
+    async def save_post_metadata(self, post_key: str, metadata: Dict[str, Any]):
+        """
+        Cache metadata for a post.
+        
+        Args:
+            post_key: Canonical post key (platform:post_id)
+            metadata: Dict with title, author, description, media_url, media_type and source
+        """
+        await self.connect()
+        async with self.pool.acquire() as conn:  # type: ignore
+            await conn.execute(
+                """
+                INSERT INTO post_metadata (post_key, title, author, description, media_url, media_type, source, fetched_at)
+                VALUES ($1, $2, $3, $4, $5, $6, $7, NOW())
+                ON CONFLICT (post_key) DO UPDATE SET
+                    title = EXCLUDED.title, author = EXCLUDED.author, description = EXCLUDED.description,
+                    media_url = EXCLUDED.media_url, media_type = EXCLUDED.media_type,
+                    source = EXCLUDED.source, fetched_at = NOW()
+                """,
+                post_key, metadata.get('title'), metadata.get('author'), metadata.get('description'),
+                metadata.get('media_url'), metadata.get('media_type'), metadata.get('source', 'provider')
+            )
+    
+    async def enqueue_embed_retry(
+        self,
+        message_id: int,
+        channel_id: int,
+        server_id: int,
+        user_id: int,
+        platform: str,
+        original_url: str,
+        post_key: Optional[str],
+        error: Optional[str],
+        delay_seconds: float
+    ):
+        """
+        Queue a failed link for a deferred retry (no-op if it is already queued).
+        
+        Args:
+            message_id: Discord message ID (original message)
+            channel_id: Discord channel ID
+            server_id: Discord server ID
+            user_id: Discord user ID
+            platform: 'instagram' or 'twitter'
+            original_url: Original URL
+            post_key: Canonical post key (platform:post_id)
+            error: Error of the failed attempt
+            delay_seconds: Delay before the first retry
+        """
+        await self.connect()
+        async with self.pool.acquire() as conn:  # type: ignore
+            await conn.execute(
+                """
+                INSERT INTO embed_retry_queue (
+                    message_id, channel_id, server_id, user_id, platform,
+                    original_url, post_key, last_error, first_failed_at, next_attempt_at
+                )
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, NOW(), NOW() + make_interval(secs => $9))
+                ON CONFLICT (message_id) DO NOTHING
+                """,
+                message_id, channel_id, server_id, user_id, platform,
+                original_url, post_key, error, float(delay_seconds)
+            )
+    
+    async def claim_embed_retries(self, platform: str, limit: int, lease_seconds: float) -> List[Dict[str, Any]]:
+        """
+        Claim due retries, hiding them from other workers for the lease duration.
+        
+        Rows locked by a concurrent claim are skipped rather than waited on.
+        
+        Args:
+            platform: 'instagram' or 'twitter'
+            limit: Maximum number of rows to claim
+            lease_seconds: How long the claimed rows stay invisible
+            
+        Returns:
+            List of claimed retry rows
+        """
+        await self.connect()
+        async with self.pool.acquire() as conn:  # type: ignore
+            rows = await conn.fetch(
+                """
+                UPDATE embed_retry_queue
+                SET next_attempt_at = NOW() + make_interval(secs => $3)
+                WHERE message_id IN (
+                    SELECT message_id FROM embed_retry_queue
+                    WHERE platform = $1 AND next_attempt_at <= NOW()
+                    ORDER BY next_attempt_at
+                    LIMIT $2
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING *
+                """,
+                platform, limit, float(lease_seconds)
+            )
+            return [dict(row) for row in rows]
+    
+    async def reschedule_embed_retry(self, message_id: int, error: Optional[str], delay_seconds: float, count_attempt: bool = True):
+        """
+        Schedule the next retry of a queued link.
+        
+        Args:
+            message_id: Discord message ID (original message)
+            error: Error of the last attempt
+            delay_seconds: Delay before the next retry
+            count_attempt: Whether the last attempt counts towards the backoff
+        """
+        await self.connect()
+        async with self.pool.acquire() as conn:  # type: ignore
+            await conn.execute(
+                """
+                UPDATE embed_retry_queue
+                SET attempts = attempts + $4, last_error = COALESCE($2, last_error),
+                    next_attempt_at = NOW() + make_interval(secs => $3)
+                WHERE message_id = $1
+                """,
+                message_id, error, float(delay_seconds), 1 if count_attempt else 0
+            )
+    
+    async def delete_embed_retry(self, message_id: int):
+        """
+        Remove a link from the retry queue.
+        
+        Args:
+            message_id: Discord message ID (original message)
+        """
+        await self.connect()
+        async with self.pool.acquire() as conn:  # type: ignore
+            await conn.execute("DELETE FROM embed_retry_queue WHERE message_id = $1", message_id)
+    
+    async def insert_link_jobs(self, jobs: List[Dict[str, Any]]):
+        """
+        Insert a batch of link jobs in one round trip (duplicates are ignored).
+        
+        Args:
+            jobs: Dicts with platform, message_id, channel_id, server_id, original_url, post_id and enqueued_at
+        """
+        if not jobs:
+            return
+        await self.connect()
+        async with self.pool.acquire() as conn:  # type: ignore
+            await conn.execute(
+                """
+                INSERT INTO link_jobs (platform, message_id, channel_id, server_id, original_url, post_id, enqueued_at)
+                SELECT * FROM unnest($1::varchar[], $2::bigint[], $3::bigint[], $4::bigint[], $5::text[], $6::varchar[], $7::timestamptz[])
+                ON CONFLICT (message_id, platform) DO NOTHING
+                """,
+                [job['platform'] for job in jobs],
+                [job['message_id'] for job in jobs],
+                [job['channel_id'] for job in jobs],
+                [job['server_id'] for job in jobs],
+                [job['original_url'] for job in jobs],
+                [job['post_id'] for job in jobs],
+                [job['enqueued_at'] for job in jobs]
+            )
+    
+    async def claim_link_jobs(self, platform: str, limit: int, lease_seconds: float, locked_by: str) -> List[Dict[str, Any]]:
+        """
+        Claim the oldest unleased link jobs of a platform.
+        
+        Jobs whose lease expired (worker crashed) are claimed again; rows
+        locked by a concurrent claim are skipped rather than waited on.
+        
+        Args:
+            platform: 'instagram' or 'twitter'
+            limit: Maximum number of jobs to claim
+            lease_seconds: How long the claimed jobs stay invisible to other workers
+            locked_by: Instance ID of the claiming worker
+            
+        Returns:
+            List of claimed job rows
+        """
+        await self.connect()
+        async with self.pool.acquire() as conn:  # type: ignore
+            rows = await conn.fetch(
+                """
+                UPDATE link_jobs
+                SET locked_by = $4, locked_until = NOW() + make_interval(secs => $3), attempts = attempts + 1
+                WHERE id IN (
+                    SELECT id FROM link_jobs
+                    WHERE platform = $1 AND (locked_until IS NULL OR locked_until < NOW())
+                    ORDER BY id
+                    LIMIT $2
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING *
+                """,
+                platform, limit, float(lease_seconds), locked_by
+            )
+            return [dict(row) for row in sorted(rows, key=lambda row: row['id'])]
+    
+    async def delete_link_job(self, job_id: int):
+        """
+        Acknowledge a processed link job.
+        
+        Args:
+            job_id: link_jobs row ID
+        """
+        await self.connect()
+        async with self.pool.acquire() as conn:  # type: ignore
+            await conn.execute("DELETE FROM link_jobs WHERE id = $1", job_id)
+    
+    async def release_link_jobs(self, locked_by: str) -> int:
+        """
+        Release the leases held by an instance so its jobs are picked up right away.
+        
+        Args:
+            locked_by: Instance ID
+            
+        Returns:
+            Number of released jobs
+        """
+        await self.connect()
+        async with self.pool.acquire() as conn:  # type: ignore
+            result = await conn.execute(
+                "UPDATE link_jobs SET locked_by = NULL, locked_until = NULL WHERE locked_by = $1",
+                locked_by
+            )
+            return int(result.split()[-1])
+    
+    async def get_queue_depths(self, server_id: int) -> Dict[str, int]:
+        """
+        Count a server's links waiting in the durable queues.
+        
+        Args:
+            server_id: Discord server ID
+            
+        Returns:
+            Dictionary with link_jobs (queued or being processed) and embed_retries counts
+        """
+        await self.connect()
+        async with self.pool.acquire() as conn:  # type: ignore
+            row = await conn.fetchrow(
+                """
+                SELECT
+                    (SELECT COUNT(*) FROM link_jobs WHERE server_id = $1) AS link_jobs,
+                    (SELECT COUNT(*) FROM embed_retry_queue WHERE server_id = $1) AS embed_retries
+                """,
+                server_id
+            )
+            return {'link_jobs': row['link_jobs'], 'embed_retries': row['embed_retries']}
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        Connection pool statistics.
+        
+        Returns:
+            Dictionary with backend, size (open connections), idle, min and max
+        """
+        if not self.pool:
+            return {'backend': 'postgres', 'size': 0, 'idle': 0, 'min': 0, 'max': 0}
+        return {
+            'backend': 'postgres',
+            'size': self.pool.get_size(),
+            'idle': self.pool.get_idle_size(),
+            'min': self.pool.get_min_size(),
+            'max': self.pool.get_max_size()
+        }
+    
+    async def get_channel_watermarks(self) -> Dict[int, int]:
+        """
+        Get the newest message ID seen in each channel.
+        
+        Returns:
+            Dict of channel_id -> last_message_id
+        """
+        await self.connect()
+        async with self.pool.acquire() as conn:  # type: ignore
+            rows = await conn.fetch("SELECT channel_id, last_message_id FROM channel_watermarks")
+            return {row['channel_id']: row['last_message_id'] for row in rows}
+    
+    async def save_channel_watermarks(self, watermarks: Dict[int, tuple]):
+        """
+        Advance channel watermarks in one round trip (never moves one backwards).
+        
+        Args:
+            watermarks: Dict of channel_id -> (server_id, last_message_id)
+        """
+        if not watermarks:
+            return
+        await self.connect()
+        async with self.pool.acquire() as conn:  # type: ignore
+            await conn.execute(
+                """
+                INSERT INTO channel_watermarks (channel_id, server_id, last_message_id, updated_at)
+                SELECT channel_id, server_id, last_message_id, NOW()
+                FROM unnest($1::bigint[], $2::bigint[], $3::bigint[]) AS t(channel_id, server_id, last_message_id)
+                ON CONFLICT (channel_id) DO UPDATE SET
+                    last_message_id = GREATEST(channel_watermarks.last_message_id, EXCLUDED.last_message_id),
+                    updated_at = NOW()
+                """,
+                list(watermarks.keys()),
+                [server_id for server_id, _ in watermarks.values()],
+                [message_id for _, message_id in watermarks.values()]
+            )
+    
+    async def get_processed_message_ids(self, message_ids: List[int]) -> set:
+        """
+        Get which of the given messages already have a message_data record.
+        
+        Args:
+            message_ids: Discord message IDs
+            
+        Returns:
+            Set of message IDs present in message_data
+        """
+        if not message_ids:
+            return set()
+        await self.connect()
+        async with self.pool.acquire() as conn:  # type: ignore
+            rows = await conn.fetch(
+                "SELECT message_id FROM message_data WHERE message_id = ANY($1::bigint[])",
+                message_ids
+            )
+            return {row['message_id'] for row in rows}
+    
+    async def prune_cached_lookups(self, older_than_days: int) -> int:
+        """
+        Delete cached link resolutions and post metadata older than a number of days.
+        
+        Args:
+            older_than_days: Retention in days
+            
+        Returns:
+            Number of deleted rows
+        """
+        await self.connect()
+        async with self.pool.acquire() as conn:  # type: ignore
+            links = await conn.execute(
+                "DELETE FROM resolved_links WHERE resolved_at < NOW() - make_interval(days => $1)",
+                older_than_days
+            )
+            metadata = await conn.execute(
+                "DELETE FROM post_metadata WHERE fetched_at < NOW() - make_interval(days => $1)",
+                older_than_days
+            )
+            return int(links.split()[-1]) + int(metadata.split()[-1])
+    
     async def insert_audit_log(
         self,
         server_id: int,
@@ -222,7 +802,7 @@ class Database:
                 INSERT INTO audit_logs (server_id, user_id, action, target_type, target_id, details)
                 VALUES ($1, $2, $3, $4, $5, $6)
                 """,
-                server_id, user_id, action, target_type, target_id, details
+                server_id, user_id, action, target_type, target_id, encode_json(details)
             )
 
     async def get_bot_setting(self, key: str) -> Optional[str]:
@@ -0,0 +1,65 @@
+import os
+import time
+from typing import Optional
+
+# Default upper bound on time-to-embed when a guild has not configured one
+DEFAULT_EMBED_DEADLINE = float(os.getenv('EMBED_DEADLINE_SECONDS', '15'))
+
+# Bounds for a single validation attempt
+MIN_ATTEMPT_TIMEOUT = float(os.getenv('MIN_VALIDATION_TIMEOUT', '0.5'))
+MAX_ATTEMPT_TIMEOUT = float(os.getenv('MAX_VALIDATION_TIMEOUT', '5'))
+
+# Headroom multiplier applied to a prefix's observed p95 latency
+P95_TIMEOUT_MULTIPLIER = 2.0
+
+
+class Deadline:
+    """Absolute time budget for processing a single link job."""
+
+    def __init__(self, seconds: float, started_at: Optional[float] = None):
+        """
+        Initialize deadline.
+
+        Args:
+            seconds: Total budget in seconds
+            started_at: Wall-clock start time (defaults to now)
+        """
+        self.started_at = started_at if started_at is not None else time.time()
+        self.expires_at = self.started_at + seconds
+
+    @classmethod
+    def from_config(cls, config: dict, started_at: Optional[float] = None) -> 'Deadline':
+        """Build a deadline from a per-guild embed config, falling back to the bot default."""
+        seconds = config.get('embed_deadline_seconds') or DEFAULT_EMBED_DEADLINE
+        return cls(float(seconds), started_at=started_at)
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (never negative)."""
+        return max(0.0, self.expires_at - time.time())
+
+    def elapsed(self) -> float:
+        """Seconds since the job was enqueued."""
+        return time.time() - self.started_at
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def attempt_timeout(self, p95_latency: Optional[float] = None) -> float:
+        """
+        Compute the timeout for one validation attempt.
+
+        Uses the prefix's observed p95 latency (with headroom) when known,
+        otherwise the maximum attempt timeout, and never exceeds the remaining budget.
+
+        Args:
+            p95_latency: Observed p95 latency of the prefix in seconds
+
+        Returns:
+            Timeout in seconds (0 if the deadline has passed)
+        """
+        if p95_latency is None:
+            timeout = MAX_ATTEMPT_TIMEOUT
+        else:
+            timeout = min(MAX_ATTEMPT_TIMEOUT, max(MIN_ATTEMPT_TIMEOUT, p95_latency * P95_TIMEOUT_MULTIPLIER))
+        return min(timeout, self.remaining())
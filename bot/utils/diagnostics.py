@@ -0,0 +1,144 @@
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import discord
+
+from utils.metrics import Metrics
+
+logger = logging.getLogger('gfcbot.diagnostics')
+
+# Recent embeds kept per guild for its time-to-embed percentiles
+EMBED_LATENCY_WINDOW = int(os.getenv('EMBED_LATENCY_WINDOW', '200'))
+# Embeds posted longer than this after their message (deferred retries, links backfilled after
+# a disconnect) are counted separately; the percentiles describe the live pipeline
+EMBED_LATENCY_MAX_SECONDS = float(os.getenv('EMBED_LATENCY_MAX_SECONDS', '300'))
+
+# Cache -> (counter, label holding the outcome, outcomes that are hits, other label filters)
+CACHE_COUNTERS = {
+    'Short links': ('link_resolutions_total', 'source', ('memory', 'database'), {}),
+    'Post metadata': ('post_metadata_lookups_total', 'source', ('memory', 'database'), {}),
+    'Embed config': ('embed_config_cache_total', 'result', ('hit',), {}),
+    'Validations (coalesced)': ('singleflight_calls_total', 'result', ('coalesced',), {'group': 'validation'}),
+    'HTTP connections (reused)': ('http_connections_total', 'kind', ('reused',), {}),
+    'DNS': ('http_dns_cache_total', 'result', ('hit',), {})
+}
+
+
+def hit_rate(metrics: Metrics, name: str, label: str, hits: Tuple[str, ...], **labels) -> Tuple[Optional[float], int]:
+    """
+    Share of a counter's increments whose outcome label is a hit.
+
+    Args:
+        metrics: Metrics registry
+        name: Counter name
+        label: Label holding the outcome (e.g. 'result')
+        hits: Outcomes counted as hits
+        **labels: Other labels the series must have
+
+    Returns:
+        Tuple of (hit rate or None if nothing was counted, total count)
+    """
+    total = metrics.total(name, **labels)
+    if not total:
+        return None, 0
+    hit = sum(metrics.total(name, **{label: outcome}, **labels) for outcome in hits)
+    return hit / total, int(total)
+
+
+def cache_hit_rates(metrics: Metrics) -> Dict[str, Tuple[Optional[float], int]]:
+    """Hit rate and lookup count of every cache in CACHE_COUNTERS, since startup."""
+    return {
+        cache: hit_rate(metrics, name, label, hits, **labels)
+        for cache, (name, label, hits, labels) in CACHE_COUNTERS.items()
+    }
+
+
+class EmbedLatency:
+    """
+    Time from a link's message being posted to its embed being posted, per guild.
+
+    Measured from the message's snowflake timestamp, so it includes gateway
+    delivery and queueing as well as validation and the Discord calls.
+    """
+
+    def __init__(
+        self,
+        metrics: Optional[Metrics] = None,
+        window_size: int = EMBED_LATENCY_WINDOW,
+        max_seconds: float = EMBED_LATENCY_MAX_SECONDS
+    ):
+        """
+        Initialize embed latency tracker.
+
+        Args:
+            metrics: Metrics registry for the process-wide time_to_embed_seconds histogram
+            window_size: Recent embeds kept per guild
+            max_seconds: Embeds slower than this count as deferred instead of as samples
+        """
+        self.metrics = metrics
+        self.window_size = window_size
+        self.max_seconds = max_seconds
+        # guild_id -> deque of (timestamp, seconds)
+        self.samples: Dict[int, Deque[Tuple[float, float]]] = {}
+        self.deferred: Dict[int, int] = {}
+
+    def record(self, platform: str, message: Any) -> Optional[float]:
+        """
+        Record that a message's embed was just posted.
+
+        Args:
+            platform: 'instagram' or 'twitter'
+            message: The message containing the link
+
+        Returns:
+            Seconds from the message to its embed, or None if the message has no guild
+        """
+        guild = message.guild
+        if not guild:
+            return None
+        now = time.time()
+        seconds = max(0.0, now - discord.utils.snowflake_time(message.id).timestamp())
+        if seconds > self.max_seconds:
+            self.deferred[guild.id] = self.deferred.get(guild.id, 0) + 1
+            if self.metrics:
+                self.metrics.incr('embeds_deferred_total', platform=platform)
+            return seconds
+        window = self.samples.get(guild.id)
+        if window is None:
+            window = self.samples[guild.id] = deque(maxlen=self.window_size)
+        window.append((now, seconds))
+        if self.metrics:
+            self.metrics.observe('time_to_embed_seconds', seconds, platform=platform)
+        return seconds
+
+    def summary(self, guild_id: int) -> Dict[str, Any]:
+        """
+        Recent time-to-embed of a guild.
+
+        Returns:
+            Dictionary with count, p50 and p95 (seconds, None without samples),
+            since (timestamp of the oldest sample) and deferred
+        """
+        window = self.samples.get(guild_id)
+        latencies = sorted(seconds for _, seconds in window) if window else []
+
+        def percentile(q: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(round(q * (len(latencies) - 1))))]
+
+        return {
+            'count': len(latencies),
+            'p50': percentile(0.5),
+            'p95': percentile(0.95),
+            'since': window[0][0] if window else None,
+            'deferred': self.deferred.get(guild_id, 0)
+        }
+
+    def evict(self, guild_id: int):
+        """Forget a guild this process no longer serves."""
+        self.samples.pop(guild_id, None)
+        self.deferred.pop(guild_id, None)
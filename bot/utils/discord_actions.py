@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+import discord
+
+from utils.metrics import Metrics
+
+logger = logging.getLogger('gfcbot.discord_actions')
+
+# Rate-limited calls are retried this many times before the 429 is raised
+MAX_RATE_LIMIT_RETRIES = 3
+# A Retry-After longer than this is raised straight away (the link is better off in the retry queue)
+MAX_RATE_LIMIT_WAIT = 10.0
+# Wait when a 429 carries no Retry-After, doubled per attempt
+FALLBACK_RETRY_AFTER = 1.0
+
+
+class ActionSkipped(Exception):
+    """An action did not run because an action it runs after failed."""
+
+
+class DiscordExecutor:
+    """
+    Runs the bot's Discord REST calls, retrying the ones that come back rate limited.
+
+    discord.py already waits out ordinary per-route 429s itself; what reaches
+    the bot is a 429 it gave up on (shared/global limits, or RateLimited when
+    the wait exceeds max_ratelimit_timeout). Those are retried after their
+    Retry-After, and the wait is shared per (action, bucket) so concurrent
+    calls to the same route hold back instead of each hitting the limit.
+    """
+
+    def __init__(
+        self,
+        metrics: Optional[Metrics] = None,
+        max_retries: int = MAX_RATE_LIMIT_RETRIES,
+        max_wait: float = MAX_RATE_LIMIT_WAIT
+    ):
+        """
+        Initialize executor.
+
+        Args:
+            metrics: Metrics registry for call latency, results and rate limits
+            max_retries: Retries of a rate-limited call before giving up
+            max_wait: Longest Retry-After worth waiting for
+        """
+        self.metrics = metrics
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        # (action, bucket) -> monotonic time its cooldown ends
+        self.cooldowns: Dict[Tuple[str, Hashable], float] = {}
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        """Seconds to wait before retrying a rate-limited call, 0 if unknown, or None if it was not rate limited."""
+        if isinstance(error, discord.RateLimited):
+            return error.retry_after
+        if not isinstance(error, discord.HTTPException) or error.status != 429:
+            return None
+        headers = getattr(error.response, 'headers', None) or {}
+        for header in ('Retry-After', 'X-RateLimit-Reset-After'):
+            try:
+                return float(headers[header])
+            except (KeyError, TypeError, ValueError):
+                continue
+        return 0.0
+
+    async def call(self, action: str, func: Callable[[], Awaitable[Any]], bucket: Hashable = None) -> Any:
+        """
+        Run a Discord call, retrying it while it is rate limited.
+
+        Args:
+            action: Action name (e.g. 'reply', 'suppress'), used for metrics and cooldowns
+            func: Zero-argument coroutine factory making the call
+            bucket: What the rate limit is scoped to (e.g. the channel ID)
+
+        Returns:
+            The call's result
+
+        Raises:
+            The call's exception, including the 429 once retries run out
+        """
+        key = (action, bucket)
+        attempt = 0
+        while True:
+            cooldown = self.cooldowns.get(key, 0) - time.monotonic()
+            if cooldown > 0:
+                await asyncio.sleep(cooldown)
+            started = time.monotonic()
+            try:
+                result = await func()
+            except Exception as e:
+                retry_after = self._retry_after(e)
+                if retry_after is None:
+                    self._record(action, started, type(e).__name__)
+                    raise
+                if self.metrics:
+                    self.metrics.incr('discord_rate_limited_total', action=action)
+                if not retry_after:
+                    retry_after = FALLBACK_RETRY_AFTER * 2 ** attempt
+                if attempt >= self.max_retries or retry_after > self.max_wait:
+                    self._record(action, started, 'rate_limited')
+                    raise
+                attempt += 1
+                # Jitter so calls released by the same cooldown don't arrive together
+                retry_at = time.monotonic() + retry_after + random.uniform(0, 0.1 * retry_after)
+                self.cooldowns[key] = max(self.cooldowns.get(key, 0), retry_at)
+                logger.warning(f'{action} rate limited (bucket {bucket}); retry {attempt} in {retry_after:.2f}s')
+                continue
+            self._record(action, started, 'success')
+            if self.cooldowns.get(key, 0) <= time.monotonic():
+                self.cooldowns.pop(key, None)
+            return result
+
+    def _record(self, action: str, started: float, result: str):
+        if self.metrics:
+            self.metrics.observe('discord_call_seconds', time.monotonic() - started, action=action)
+            self.metrics.incr('discord_calls_total', action=action, result=result)
+
+
+class ActionPlan:
+    """
+    The side effects of posting one link, as a small dependency graph.
+
+    Each action starts as soon as the actions it runs after have succeeded,
+    so independent ones (suppressing the original embed and sending the
+    reply) overlap instead of costing a REST round trip each. Discord calls
+    go through the executor; database writes and other local work don't.
+    """
+
+    def __init__(self, executor: DiscordExecutor, bucket: Hashable = None):
+        """
+        Initialize plan.
+
+        Args:
+            executor: Executor the plan's Discord calls go through
+            bucket: Rate limit scope of the plan's Discord calls (e.g. the channel ID)
+        """
+        self.executor = executor
+        self.bucket = bucket
+        # name -> (coroutine factory, names it runs after, names it waits out, whether it is a Discord call)
+        self.actions: Dict[str, Tuple[Callable[[], Awaitable[Any]], Tuple[str, ...], Tuple[str, ...], bool]] = {}
+        self.tasks: Dict[str, asyncio.Task] = {}
+
+    def add(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[Any]],
+        after: Iterable[str] = (),
+        settled_after: Iterable[str] = (),
+        discord_call: bool = True
+    ) -> 'ActionPlan':
+        """
+        Add an action.
+
+        Args:
+            name: Action name, unique within the plan
+            func: Zero-argument coroutine factory; it can read earlier results with result()
+            after: Actions that must succeed before this one starts
+            settled_after: Actions that must finish, successfully or not, before this one starts
+            discord_call: Whether func makes a Discord call (and goes through the executor)
+
+        Returns:
+            The plan, for chaining
+        """
+        after = tuple(after)
+        settled_after = tuple(settled_after)
+        if name in self.actions:
+            raise ValueError(f'Duplicate action {name!r}')
+        # Dependencies have to be added first, which also keeps the graph acyclic
+        for dependency in after + settled_after:
+            if dependency not in self.actions:
+                raise ValueError(f'Action {name!r} runs after unknown action {dependency!r}')
+        self.actions[name] = (func, after, settled_after, discord_call)
+        return self
+
+    async def _run_action(self, name: str) -> Any:
+        func, after, settled_after, discord_call = self.actions[name]
+        for dependency in after + settled_after:
+            task = self.tasks[dependency]
+            await asyncio.wait((task,))
+            error = task.exception()
+            if error is not None and dependency in after:
+                raise ActionSkipped(f'{dependency} failed: {error}')
+        if discord_call:
+            return await self.executor.call(name, func, self.bucket)
+        return await func()
+
+    async def run(self):
+        """Run every action and wait for all of them; failures are kept per action (see error())."""
+        for name in self.actions:
+            self.tasks[name] = asyncio.ensure_future(self._run_action(name))
+        try:
+            await asyncio.wait(self.tasks.values())
+        except asyncio.CancelledError:
+            for task in self.tasks.values():
+                task.cancel()
+            raise
+        # Failures are the caller's to inspect; retrieve them so asyncio doesn't log them as unhandled
+        for task in self.tasks.values():
+            task.exception()
+
+    def has(self, name: str) -> bool:
+        """Whether the plan has an action."""
+        return name in self.actions
+
+    def result(self, name: str) -> Any:
+        """An action's result; raises the action's exception if it failed."""
+        return self.tasks[name].result()
+
+    def error(self, name: str) -> Optional[BaseException]:
+        """The exception an action failed with (ActionSkipped if it did not run), or None."""
+        return self.tasks[name].exception()
@@ -0,0 +1,174 @@
+import logging
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger('gfcbot.embed_policy')
+
+DEFAULT_REACTION_EMOJI = '🙏'
+
+# Domains an embed prefix is prepended to (or a replacement domain stands in for), per platform
+PLATFORM_DOMAINS = {
+    'instagram': ('instagram.com',),
+    'twitter': ('twitter.com', 'x.com')
+}
+
+# Scheme, subdomain/prefix part and platform domain of a post URL's host
+_HOST_PATTERNS = {
+    platform: re.compile(
+        r'^(https?://)([^/?#]*?)(' + '|'.join(re.escape(domain) for domain in domains) + r')(?=[/?#:]|$)',
+        re.IGNORECASE
+    )
+    for platform, domains in PLATFORM_DOMAINS.items()
+}
+
+
+def resolve_emoji(emoji_str: Optional[str], emojis: Iterable[Any], guild_id: Optional[int] = None):
+    """
+    Resolve a reaction emoji setting to something add_reaction accepts.
+
+    Args:
+        emoji_str: Unicode emoji or a custom emoji code like :emoji_name:
+        emojis: The guild's custom emojis
+        guild_id: Guild ID, for the log message when a custom emoji is missing
+
+    Returns:
+        Custom emoji object, or the unicode emoji (the default one if the custom emoji is missing)
+    """
+    if not emoji_str:
+        return DEFAULT_REACTION_EMOJI
+    if not (emoji_str.startswith(':') and emoji_str.endswith(':')):
+        return emoji_str
+    emoji_name = emoji_str[1:-1]
+    for emoji in emojis:
+        if emoji.name == emoji_name:
+            return emoji
+    logger.warning(f'Custom emoji :{emoji_name}: not found in guild {guild_id}')
+    return DEFAULT_REACTION_EMOJI
+
+
+class EmbedRewrite:
+    """One embed config (prefix or replacement domain) with its host rewrites precomputed."""
+
+    __slots__ = ('platform', 'prefix', 'embed_type', 'hosts')
+
+    def __init__(self, platform: str, prefix: str, embed_type: str = 'prefix'):
+        """
+        Initialize embed rewrite.
+
+        Args:
+            platform: 'instagram' or 'twitter'
+            prefix: Configured prefix (e.g. 'fx') or replacement domain (e.g. 'fixupx.com')
+            embed_type: 'prefix' or 'replacement'
+        """
+        self.platform = platform
+        self.prefix = prefix
+        self.embed_type = embed_type or 'prefix'
+        # Platform domain -> domain of the embedded URL (e.g. x.com -> fxx.com)
+        self.hosts = {
+            domain: prefix if self.embed_type == 'replacement' else f'{prefix}{domain}'
+            for domain in PLATFORM_DOMAINS[platform]
+        }
+
+    def apply(self, url: str) -> str:
+        """
+        Build the embedded URL of a post URL.
+
+        Only the host is rewritten, so 'x.com' elsewhere in the URL is left alone.
+
+        Args:
+            url: Post URL (canonical or as posted)
+
+        Returns:
+            Embedded URL, or the URL unchanged if its host is not a platform domain
+        """
+        match = _HOST_PATTERNS[self.platform].match(url)
+        if not match:
+            return url
+        return f'{match.group(1)}{match.group(2)}{self.hosts[match.group(3).lower()]}{url[match.end():]}'
+
+
+class GuildEmbedPolicy:
+    """
+    A guild's embed settings for one platform, compiled for the per-link hot path.
+
+    Built from the guild's embed config and embed configs whenever either
+    changes (and when the guild's emojis change) and immutable afterwards,
+    so evaluating it per link involves no dict lookups or string scans.
+    """
+
+    __slots__ = (
+        'platform', 'guild_id', 'config', 'embeds', 'already_embedded_pattern', 'reaction_enabled',
+        'reaction_emoji', 'webhook_repost_enabled', 'webhook_reply_notifications',
+        'suppress_original_embed', 'optimistic_posting_enabled', 'repost_dedupe_minutes'
+    )
+
+    def __init__(
+        self,
+        platform: str,
+        guild: Any,
+        config: Dict[str, Any],
+        embed_configs: List[Dict[str, Any]]
+    ):
+        """
+        Compile a policy.
+
+        Args:
+            platform: 'instagram' or 'twitter'
+            guild: Discord guild (anything with an id; its emojis are used when present)
+            config: Per-server embed config from the backend API
+            embed_configs: Active embed configs of the server in priority order
+        """
+        embeds = tuple(
+            EmbedRewrite(platform, embed_config['prefix'], embed_config.get('embed_type', 'prefix'))
+            for embed_config in embed_configs
+        )
+        set_slot = object.__setattr__
+        set_slot(self, 'platform', platform)
+        set_slot(self, 'guild_id', guild.id)
+        set_slot(self, 'config', config)
+        set_slot(self, 'embeds', embeds)
+        set_slot(self, 'already_embedded_pattern', self._compile_already_embedded(embeds))
+        set_slot(self, 'reaction_enabled', bool(config.get('reaction_enabled', True)))
+        set_slot(self, 'reaction_emoji', resolve_emoji(
+            config.get('reaction_emoji', DEFAULT_REACTION_EMOJI),
+            getattr(guild, 'emojis', ()),
+            guild.id
+        ))
+        set_slot(self, 'webhook_repost_enabled', bool(config.get('webhook_repost_enabled', False)))
+        set_slot(self, 'webhook_reply_notifications', bool(config.get('webhook_reply_notifications', True)))
+        set_slot(self, 'suppress_original_embed', bool(config.get('suppress_original_embed', True)))
+        set_slot(self, 'optimistic_posting_enabled', bool(config.get('optimistic_posting_enabled', False)))
+        set_slot(self, 'repost_dedupe_minutes', int(config.get('repost_dedupe_minutes') or 0))
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __repr__(self) -> str:
+        prefixes = ', '.join(embed.prefix for embed in self.embeds)
+        return f'<GuildEmbedPolicy {self.platform} guild={self.guild_id} embeds=[{prefixes}]>'
+
+    @staticmethod
+    def _compile_already_embedded(embeds: Tuple[EmbedRewrite, ...]) -> Optional['re.Pattern']:
+        """One pattern matching a URL whose host is (a subdomain of) any of the embeds' domains."""
+        # Replacement domains (e.g. fixupx.com) and prefixed platform domains (e.g. fxx.com, fxtwitter.com)
+        domains = sorted({domain.lower() for embed in embeds for domain in embed.hosts.values()}, key=len, reverse=True)
+        if not domains:
+            return None
+        # Anchored at the host, so a miss fails within the first few characters
+        return re.compile(
+            r'https?://(?:[\w-]+\.)*?(?:' + '|'.join(re.escape(domain) for domain in domains) + r')(?![\w.-])',
+            re.IGNORECASE
+        )
+
+    def rebind(self, guild: Any) -> 'GuildEmbedPolicy':
+        """The same policy compiled against a guild's current emojis."""
+        embed_configs = [{'prefix': embed.prefix, 'embed_type': embed.embed_type} for embed in self.embeds]
+        return GuildEmbedPolicy(self.platform, guild, self.config, embed_configs)
+
+    def is_already_embedded(self, url: str) -> bool:
+        """Whether a URL (as matched in a message, starting with its scheme) already uses one of the guild's embeds."""
+        pattern = self.already_embedded_pattern
+        return pattern is not None and pattern.match(url) is not None
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import os
+import re
+from typing import Dict, Any
+
+import aiohttp
+
+logger = logging.getLogger('gfcbot.embed_probe')
+
+# Validation mode: 'head' (HEAD first, bounded GET fallback) or 'bounded' (bounded GET only)
+VALIDATION_MODE = os.getenv('VALIDATION_MODE', 'head').lower()
+
+# Maximum bytes of an embed page read while looking for meta tags
+MAX_READ_BYTES = int(os.getenv('BOUNDED_VALIDATION_MAX_KB', '64')) * 1024
+
+CHUNK_SIZE = 4096
+
+# Verdicts
+UNREACHABLE = 'unreachable'
+REACHABLE = 'reachable'
+REACHABLE_WITH_MEDIA = 'reachable_with_media'
+REACHABLE_BUT_EMPTY = 'reachable_but_empty'
+
+# Meta tags that indicate the embed service produced a usable preview
+MEDIA_TAGS = ('og:video', 'og:video:url', 'og:video:secure_url', 'og:image', 'twitter:player', 'twitter:image')
+
+META_TAG_PATTERN = re.compile(rb'<meta\b[^>]*>', re.IGNORECASE)
+ATTRIBUTE_PATTERN = re.compile(rb'([a-zA-Z_:-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+HEAD_END_PATTERN = re.compile(rb'</head\s*>|<body\b', re.IGNORECASE)
+
+
+def parse_meta_tags(html: bytes) -> Dict[str, str]:
+    """
+    Extract og:/twitter: meta tags from an HTML fragment.
+
+    Args:
+        html: Raw (possibly truncated) HTML bytes
+
+    Returns:
+        Dict of property/name -> content (first occurrence wins)
+    """
+    tags: Dict[str, str] = {}
+    for match in META_TAG_PATTERN.finditer(html):
+        attributes = {}
+        for attr in ATTRIBUTE_PATTERN.finditer(match.group(0)):
+            value = attr.group(2) if attr.group(2) is not None else attr.group(3)
+            attributes[attr.group(1).decode('ascii', 'ignore').lower()] = value
+        key = attributes.get('property') or attributes.get('name')
+        content = attributes.get('content')
+        if key is None or content is None:
+            continue
+        key_str = key.decode('utf-8', 'ignore').lower()
+        if key_str.startswith(('og:', 'twitter:')) and key_str not in tags:
+            tags[key_str] = content.decode('utf-8', 'ignore')
+    return tags
+
+
+def has_media(tags: Dict[str, str]) -> bool:
+    """Whether the meta tags describe embeddable media."""
+    return any(tags.get(tag) for tag in MEDIA_TAGS)
+
+
+def is_valid_verdict(verdict: str) -> bool:
+    """Whether a verdict counts as a successful validation."""
+    return verdict in (REACHABLE, REACHABLE_WITH_MEDIA)
+
+
+async def probe_url(
+    session: aiohttp.ClientSession,
+    url: str,
+    timeout: float,
+    max_bytes: int = MAX_READ_BYTES
+) -> Dict[str, Any]:
+    """
+    Fetch at most max_bytes of an embed page and classify it.
+
+    Streams the response and stops as soon as the status and the media meta
+    tags are known, the end of <head> is reached, or max_bytes were read.
+
+    Args:
+        session: HTTP session
+        url: Embedded URL to probe
+        timeout: Total timeout in seconds
+        max_bytes: Maximum number of body bytes to read
+
+    Returns:
+        Dict with verdict, status, meta (og:/twitter: tags), bytes_read and error
+    """
+    result: Dict[str, Any] = {'verdict': UNREACHABLE, 'status': None, 'meta': {}, 'bytes_read': 0, 'error': None}
+    try:
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout), allow_redirects=True) as resp:
+            result['status'] = resp.status
+            if resp.status >= 400:
+                result['error'] = f'HTTP {resp.status}'
+                return result
+            content_type = resp.headers.get('Content-Type', '').lower()
+            if content_type.startswith(('image/', 'video/')):
+                # Services that redirect straight to the media file
+                result['verdict'] = REACHABLE_WITH_MEDIA
+                return result
+            if 'html' not in content_type:
+                result['verdict'] = REACHABLE
+                return result
+
+            buffer = b''
+            head_complete = False
+            async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                buffer += chunk
+                if HEAD_END_PATTERN.search(buffer):
+                    head_complete = True
+                    break
+                tags = parse_meta_tags(buffer)
+                if has_media(tags) and 'twitter:card' in tags:
+                    break
+                if len(buffer) >= max_bytes:
+                    break
+            else:
+                head_complete = True
+            buffer = buffer[:max_bytes]
+            result['bytes_read'] = len(buffer)
+            result['meta'] = parse_meta_tags(buffer)
+            if has_media(result['meta']):
+                result['verdict'] = REACHABLE_WITH_MEDIA
+            elif head_complete:
+                result['verdict'] = REACHABLE_BUT_EMPTY
+                result['error'] = 'Embed page has no media'
+            else:
+                # Read cap hit before the end of <head>: reachable but inconclusive
+                result['verdict'] = REACHABLE
+            return result
+    except asyncio.TimeoutError:
+        result['error'] = 'Request timeout'
+    except aiohttp.ClientError as e:
+        result['error'] = f'Client error: {str(e)}'
+    except Exception as e:
+        result['error'] = f'Unexpected error: {str(e)}'
+    return result
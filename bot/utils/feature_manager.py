@@ -22,6 +22,8 @@ class FeatureManager:
         self.cache: Dict[str, Any] = {}
         self.cache_ttl = timedelta(minutes=15)
         self.last_cache_update: Optional[datetime] = None
+        # Feature name -> UUID; feature IDs never change once created
+        self.feature_ids: Dict[str, str] = {}
     
     async def check_permission(
         self,
@@ -53,17 +55,7 @@ class FeatureManager:
                 return self.cache[cache_key]
         
         # Query database
-        await self.db.connect()
-        async with self.db.pool.acquire() as conn:  # type: ignore
-            result = await conn.fetchval(
-                """
-                SELECT check_permission($1, $2, $3, $4)
-                """,
-                server_id,
-                role_ids,
-                feature_name,
-                action
-            )
+        result = await self.db.check_permission(server_id, role_ids, feature_name, action)
         
         # Store in cache if enabled
         if self.cache_enabled:
@@ -85,6 +77,12 @@ class FeatureManager:
         self.last_cache_update = None
         logger.info('Permission cache invalidated')
     
+    def invalidate_guild(self, server_id: int):
+        """Drop the cached permission checks of one server."""
+        prefix = f"{server_id}:"
+        for cache_key in [key for key in self.cache if key.startswith(prefix)]:
+            del self.cache[cache_key]
+    
     async def get_feature_id(self, feature_name: str) -> Optional[str]:
         """
         Get feature ID by name.
@@ -95,15 +93,18 @@ class FeatureManager:
         Returns:
             Feature UUID or None if not found
         """
-        await self.db.connect()
-        async with self.db.pool.acquire() as conn:  # type: ignore
-            result = await conn.fetchrow(
-                """
-                SELECT id FROM features WHERE name = $1 AND active = true
-                """,
-                feature_name
-            )
-            return str(result['id']) if result else None
+        feature_id = self.feature_ids.get(feature_name)
+        if feature_id:
+            return feature_id
+        feature_id = await self.db.get_feature_id(feature_name)
+        if feature_id:
+            self.feature_ids[feature_name] = feature_id
+        return feature_id
+    
+    async def prefetch_feature_ids(self):
+        """Load every active feature's ID in one query, so cogs loading at startup don't each query theirs."""
+        self.feature_ids.update(await self.db.get_feature_ids())
+        logger.info(f'Prefetched {len(self.feature_ids)} feature id(s)')
     
     async def set_role_permissions(
         self,
@@ -135,20 +136,7 @@ class FeatureManager:
             'delete': delete
         }
         
-        await self.db.connect()
-        async with self.db.pool.acquire() as conn:  # type: ignore
-            await conn.execute(
-                """
-                INSERT INTO feature_permissions (server_id, role_id, feature_id, actions)
-                VALUES ($1, $2, $3, $4)
-                ON CONFLICT (server_id, role_id, feature_id)
-                DO UPDATE SET actions = $4, updated_at = NOW()
-                """,
-                server_id,
-                role_id,
-                feature_id,
-                actions
-            )
+        await self.db.set_feature_permissions(server_id, role_id, feature_id, actions)
         
         # Invalidate cache after permission change
         if self.cache_enabled:
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Optional, Iterable
+from types import SimpleNamespace
+
+import aiohttp
+
+from utils.metrics import Metrics
+
+logger = logging.getLogger('gfcbot.http_client')
+
+# Connector tuning
+HTTP_LIMIT = int(os.getenv('HTTP_LIMIT', '100'))
+HTTP_LIMIT_PER_HOST = int(os.getenv('HTTP_LIMIT_PER_HOST', '10'))
+HTTP_DNS_TTL = int(os.getenv('HTTP_DNS_TTL', '300'))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv('HTTP_KEEPALIVE_TIMEOUT', '30'))
+HTTP_PREWARM = os.getenv('HTTP_PREWARM', 'true').lower() == 'true'
+
+
+class HttpClient:
+    """
+    Shared HTTP client owned by the bot for embed validations and backend calls.
+
+    Wraps a single aiohttp.ClientSession on a tuned TCPConnector and publishes
+    connection reuse and DNS/connect timings through aiohttp trace hooks.
+    """
+
+    def __init__(self, metrics: Optional[Metrics] = None):
+        """
+        Initialize HTTP client (the session is created by start()).
+
+        Args:
+            metrics: Metrics registry for connection and timing metrics
+        """
+        self.metrics = metrics
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.connector: Optional[aiohttp.TCPConnector] = None
+
+    async def start(self):
+        """Create the connector and session."""
+        if self.session and not self.session.closed:
+            return
+        self.connector = aiohttp.TCPConnector(
+            limit=HTTP_LIMIT,
+            limit_per_host=HTTP_LIMIT_PER_HOST,
+            ttl_dns_cache=HTTP_DNS_TTL,
+            use_dns_cache=True,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+            enable_cleanup_closed=True
+        )
+        self.session = aiohttp.ClientSession(
+            connector=self.connector,
+            trace_configs=[self._build_trace_config()]
+        )
+        logger.info(
+            f'HTTP client started (limit={HTTP_LIMIT}, limit_per_host={HTTP_LIMIT_PER_HOST}, '
+            f'dns_ttl={HTTP_DNS_TTL}s, keepalive={HTTP_KEEPALIVE_TIMEOUT}s)'
+        )
+
+    async def close(self):
+        """Close the session and its connector."""
+        if self.session and not self.session.closed:
+            await self.session.close()
+            logger.info('HTTP client closed')
+
+    async def prewarm(self, hosts: Iterable[str], timeout: float = 5):
+        """
+        Open keep-alive connections to the given hosts ahead of the first validation.
+
+        Args:
+            hosts: Hostnames to connect to over HTTPS
+            timeout: Timeout per host in seconds
+        """
+        if not HTTP_PREWARM or not self.session:
+            return
+        hosts = sorted(set(host for host in hosts if host))
+        if not hosts:
+            return
+
+        async def warm(host: str):
+            try:
+                async with self.session.head(  # type: ignore
+                    f'https://{host}/',
+                    timeout=aiohttp.ClientTimeout(total=timeout),
+                    allow_redirects=False
+                ):
+                    pass
+            except Exception as e:
+                logger.debug(f'Pre-warming connection to {host} failed: {e}')
+
+        await asyncio.gather(*(warm(host) for host in hosts))
+        logger.info(f'Pre-warmed connections to {len(hosts)} prefix host(s)')
+
+    async def probe(self, host: str, timeout: float = 5) -> Dict[str, Any]:
+        """
+        Time a HEAD request to a host's root, for diagnostics.
+
+        Unlike a validation, nothing is recorded in the prefix health stats.
+
+        Args:
+            host: Hostname to probe over HTTPS
+            timeout: Timeout in seconds
+
+        Returns:
+            Dictionary with latency (seconds), status (HTTP status or None) and error (or None)
+        """
+        if not self.session:
+            return {'latency': None, 'status': None, 'error': 'HTTP session not initialized'}
+        started = time.monotonic()
+        try:
+            async with self.session.head(
+                f'https://{host}/',
+                timeout=aiohttp.ClientTimeout(total=timeout),
+                allow_redirects=False
+            ) as resp:
+                return {'latency': time.monotonic() - started, 'status': resp.status, 'error': None}
+        except asyncio.TimeoutError:
+            return {'latency': None, 'status': None, 'error': 'Timeout'}
+        except Exception as e:
+            return {'latency': None, 'status': None, 'error': str(e) or type(e).__name__}
+
+    def _build_trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+        metrics = self.metrics
+
+        async def on_request_start(session, ctx: SimpleNamespace, params):
+            ctx.started = time.monotonic()
+            ctx.host = params.url.host
+
+        async def on_request_end(session, ctx: SimpleNamespace, params):
+            if metrics:
+                metrics.observe('http_request_seconds', time.monotonic() - ctx.started, host=ctx.host)
+
+        async def on_request_exception(session, ctx: SimpleNamespace, params):
+            if metrics:
+                metrics.incr('http_request_errors_total', host=ctx.host, error=type(params.exception).__name__)
+
+        async def on_connection_create_start(session, ctx: SimpleNamespace, params):
+            ctx.connect_started = time.monotonic()
+
+        async def on_connection_create_end(session, ctx: SimpleNamespace, params):
+            if metrics:
+                # Covers TCP connect plus the TLS handshake for HTTPS
+                metrics.observe('http_connect_seconds', time.monotonic() - ctx.connect_started, host=ctx.host)
+                metrics.incr('http_connections_total', kind='new')
+
+        async def on_connection_reuseconn(session, ctx: SimpleNamespace, params):
+            if metrics:
+                metrics.incr('http_connections_total', kind='reused')
+
+        async def on_dns_resolvehost_start(session, ctx: SimpleNamespace, params):
+            ctx.dns_started = time.monotonic()
+
+        async def on_dns_resolvehost_end(session, ctx: SimpleNamespace, params):
+            if metrics:
+                metrics.observe('http_dns_seconds', time.monotonic() - ctx.dns_started, host=params.host)
+
+        async def on_dns_cache_hit(session, ctx: SimpleNamespace, params):
+            if metrics:
+                metrics.incr('http_dns_cache_total', result='hit')
+
+        async def on_dns_cache_miss(session, ctx: SimpleNamespace, params):
+            if metrics:
+                metrics.incr('http_dns_cache_total', result='miss')
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_end)
+        trace_config.on_request_exception.append(on_request_exception)
+        trace_config.on_connection_create_start.append(on_connection_create_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace_config.on_dns_resolvehost_start.append(on_dns_resolvehost_start)
+        trace_config.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+        trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace_config.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace_config
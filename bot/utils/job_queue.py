@@ -0,0 +1,258 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+import discord
+
+from utils.metrics import Metrics
+
+logger = logging.getLogger('gfcbot.job_queue')
+
+DURABLE_QUEUE_ENABLED = os.getenv('DURABLE_QUEUE_ENABLED', 'false').lower() == 'true'
+
+# 'all' (gateway and embed work in one process), 'gateway' (only classify and queue links)
+# or 'worker' (REST-only process consuming the queue, see worker.py)
+PROCESS_ROLE = os.getenv('PROCESS_ROLE', 'all').lower()
+
+# Identifies this process's leases; must be stable across restarts and unique per process
+INSTANCE_ID = os.getenv('INSTANCE_ID') or socket.gethostname()
+
+# Enqueue batching: flush after this many jobs or this many milliseconds, whichever comes first
+ENQUEUE_BATCH_SIZE = int(os.getenv('JOB_QUEUE_BATCH_SIZE', '50'))
+ENQUEUE_FLUSH_DELAY = float(os.getenv('JOB_QUEUE_FLUSH_MS', '25')) / 1000
+
+# Jobs claimed per dequeue and how long they stay invisible to other workers
+CLAIM_SIZE = int(os.getenv('JOB_QUEUE_CLAIM_SIZE', '5'))
+VISIBILITY_TIMEOUT = float(os.getenv('JOB_QUEUE_VISIBILITY_SECONDS', '120'))
+
+# Jobs delivered this many times without an ack are dropped
+MAX_DELIVERIES = int(os.getenv('JOB_QUEUE_MAX_DELIVERIES', '3'))
+
+# Fallback poll interval for jobs enqueued by other instances
+POLL_INTERVAL = 1.0
+
+# Channels fetched over REST kept per process (workers have no gateway channel cache)
+CHANNEL_CACHE_SIZE = 1024
+
+
+class JobQueue:
+    """
+    Durable queue of detected links backed by the link_jobs table.
+
+    on_message enqueues ids-only jobs, which are written in batches (one
+    INSERT per batch). Workers claim jobs with a lease using
+    FOR UPDATE SKIP LOCKED and delete them once processed, so a job whose
+    worker crashed becomes visible again when its lease expires.
+    """
+
+    def __init__(self, db, metrics: Optional[Metrics] = None):
+        """
+        Initialize job queue.
+
+        Args:
+            db: Database instance
+            metrics: Metrics registry
+        """
+        self.db = db
+        self.metrics = metrics
+        # Split deployments always hand links over through the durable queue
+        self.enabled = DURABLE_QUEUE_ENABLED or PROCESS_ROLE != 'all'
+        # Whether this process validates and posts (the gateway role only produces jobs)
+        self.consumes = PROCESS_ROLE != 'gateway'
+        # Deadlines of jobs queued before this process started count from startup
+        self.started_at = time.time()
+        self.buffer: List[tuple] = []
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+        self.flush_tasks: set = set()
+        self.events: Dict[str, asyncio.Event] = defaultdict(asyncio.Event)
+        self.claimed: Dict[str, int] = defaultdict(int)
+        self.released = False
+        self.channels: 'OrderedDict[int, discord.abc.Messageable]' = OrderedDict()
+
+    async def enqueue(self, platform: str, message: discord.Message, original_url: str, post_id: str) -> bool:
+        """
+        Persist a link job; waits for the batch it joins to be written.
+
+        Args:
+            platform: 'instagram' or 'twitter'
+            message: Discord message containing the URL
+            original_url: Original URL
+            post_id: Platform post ID
+
+        Returns:
+            True if the job was persisted
+        """
+        if not self.enabled or not message.guild:
+            return False
+        job = {
+            'platform': platform,
+            'message_id': message.id,
+            'channel_id': message.channel.id,
+            'server_id': message.guild.id,
+            'original_url': original_url,
+            'post_id': post_id,
+            'enqueued_at': datetime.now(timezone.utc)
+        }
+        future = asyncio.get_running_loop().create_future()
+        self.buffer.append((job, future))
+        if len(self.buffer) >= ENQUEUE_BATCH_SIZE:
+            self._flush_now()
+        elif self.flush_handle is None:
+            self.flush_handle = asyncio.get_running_loop().call_later(ENQUEUE_FLUSH_DELAY, self._flush_now)
+        return await future
+
+    def _flush_now(self):
+        if self.flush_handle:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        batch, self.buffer = self.buffer, []
+        if batch:
+            task = asyncio.create_task(self._flush(batch))
+            self.flush_tasks.add(task)
+            task.add_done_callback(self.flush_tasks.discard)
+
+    async def _flush(self, batch: List[tuple]):
+        try:
+            await self.db.insert_link_jobs([job for job, _ in batch])
+            ok = True
+        except Exception as e:
+            logger.error(f'Failed to persist {len(batch)} link job(s): {e}')
+            ok = False
+        for job, future in batch:
+            if not future.done():
+                future.set_result(ok)
+        if ok:
+            for platform in set(job['platform'] for job, _ in batch):
+                self.events[platform].set()
+            if self.metrics:
+                self.metrics.observe('link_job_batch_size', len(batch))
+
+    async def drain(self, timeout: float):
+        """
+        Write buffered jobs now and wait for in-flight batches (shutdown hook).
+
+        Args:
+            timeout: Seconds to wait for the writes
+        """
+        self._flush_now()
+        if self.flush_tasks:
+            _, pending = await asyncio.wait(set(self.flush_tasks), timeout=timeout)
+            if pending:
+                logger.warning(f'{len(pending)} link job batch(es) still unwritten at shutdown')
+
+    async def claim(self, platform: str) -> List[Dict[str, Any]]:
+        """
+        Wait for and claim the next link jobs of a platform.
+
+        Args:
+            platform: 'instagram' or 'twitter'
+
+        Returns:
+            Non-empty list of claimed job rows
+        """
+        if not self.released:
+            # Resume jobs a previous run of this instance was working on
+            self.released = True
+            try:
+                released = await self.db.release_link_jobs(INSTANCE_ID)
+                if released:
+                    logger.info(f'Resuming {released} link job(s) left in progress by {INSTANCE_ID}')
+            except Exception as e:
+                logger.warning(f'Failed to release link jobs of {INSTANCE_ID}: {e}')
+        event = self.events[platform]
+        while True:
+            event.clear()
+            try:
+                jobs = await self.db.claim_link_jobs(platform, CLAIM_SIZE, VISIBILITY_TIMEOUT, INSTANCE_ID)
+            except Exception as e:
+                logger.warning(f'Failed to claim {platform} link jobs: {e}')
+                jobs = []
+            deliverable = []
+            for job in jobs:
+                if job['attempts'] > MAX_DELIVERIES:
+                    logger.warning(f'Dropping link job {job["id"]} ({job["original_url"]}) after {MAX_DELIVERIES} deliveries')
+                    self._count(platform, 'dropped')
+                    await self.ack(job, counted=False)
+                else:
+                    deliverable.append(job)
+            if deliverable:
+                self.claimed[platform] += len(deliverable)
+                return deliverable
+            try:
+                await asyncio.wait_for(event.wait(), timeout=POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def ack(self, job: Dict[str, Any], counted: bool = True):
+        """
+        Delete a processed job.
+
+        Args:
+            job: Claimed job row
+            counted: Whether the job was handed to a worker by claim()
+        """
+        if counted:
+            self.claimed[job['platform']] -= 1
+            self._count(job['platform'], 'acked')
+        try:
+            await self.db.delete_link_job(job['id'])
+        except Exception as e:
+            # The job is redelivered after its lease expires
+            logger.warning(f'Failed to ack link job {job["id"]}: {e}')
+
+    def nack(self, job: Dict[str, Any]):
+        """Give up on a claimed job without deleting it; it is redelivered once its lease expires."""
+        self.claimed[job['platform']] -= 1
+        self._count(job['platform'], 'nacked')
+
+    async def fetch_message(self, bot, channel_id: int, message_id: int) -> Optional[discord.Message]:
+        """
+        Get a job's message from the gateway cache or the REST API.
+
+        Worker processes have no gateway cache, so channels are fetched once
+        and kept in a small LRU.
+
+        Args:
+            bot: Bot instance
+            channel_id: Discord channel ID
+            message_id: Discord message ID
+
+        Returns:
+            The message, or None if it is gone or inaccessible
+        """
+        message = discord.utils.get(bot.cached_messages, id=message_id)
+        if message:
+            return message
+        try:
+            channel = bot.get_channel(channel_id)
+            if channel is None:
+                channel = self.channels.get(channel_id)
+                if channel is None:
+                    channel = await bot.fetch_channel(channel_id)
+                    self.channels[channel_id] = channel
+                    while len(self.channels) > CHANNEL_CACHE_SIZE:
+                        self.channels.popitem(last=False)
+                else:
+                    self.channels.move_to_end(channel_id)
+            if not hasattr(channel, 'fetch_message'):
+                return None
+            return await channel.fetch_message(message_id)  # type: ignore
+        except (discord.NotFound, discord.Forbidden):
+            return None
+
+    def is_idle(self, platform: str) -> bool:
+        """Whether this instance has no buffered or claimed jobs of a platform."""
+        return self.claimed[platform] == 0 and not any(job['platform'] == platform for job, _ in self.buffer)
+
+    def deadline_start(self, job: Dict[str, Any]) -> float:
+        """Wall-clock time a job's embed deadline counts from."""
+        return max(job['enqueued_at'].timestamp(), self.started_at)
+
+    def _count(self, platform: str, result: str):
+        if self.metrics:
+            self.metrics.incr('link_jobs_total', platform=platform, result=result)
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import os
+from typing import Optional
+
+from utils.metrics import Metrics
+
+logger = logging.getLogger('gfcbot.leader')
+
+# First key of every advisory lock taken by the bot (the second is a hash of the election name)
+LOCK_NAMESPACE = 0x67666362
+
+# How often the leader checks its lock session and followers try to take over
+RENEW_INTERVAL = float(os.getenv('LEADER_RENEW_SECONDS', '10'))
+
+
+class LeaderElection:
+    """
+    Elects one leader across all bot processes using a Postgres advisory lock.
+
+    The leader holds a session-level advisory lock on a dedicated connection,
+    so the lock is released by Postgres as soon as the leader's process or
+    connection dies. The leader renews its lease by checking the session is
+    still alive; followers retry the lock every RENEW_INTERVAL, which bounds
+    failover time. Leader-only jobs must tolerate a brief overlap when a
+    leader loses its connection without noticing before the next renewal.
+    """
+
+    def __init__(self, db, name: str, metrics: Optional[Metrics] = None):
+        """
+        Initialize leader election.
+
+        Args:
+            db: Database instance
+            name: Election name; processes campaigning under the same name elect one leader
+            metrics: Metrics registry
+        """
+        self.db = db
+        self.name = name
+        self.metrics = metrics
+        self.conn = None
+        self.is_leader = False
+        self.leader_event = asyncio.Event()
+        self.follower_event = asyncio.Event()
+        self.follower_event.set()
+
+    async def run(self):
+        """Campaign for leadership and renew it until cancelled."""
+        try:
+            if self.db.single_node:
+                # An embedded database belongs to this one process, so there is nobody to elect against
+                self._set_leader(True)
+                await asyncio.Event().wait()
+            while True:
+                if self.is_leader:
+                    await self._renew()
+                else:
+                    await self._try_acquire()
+                await asyncio.sleep(RENEW_INTERVAL)
+        finally:
+            await self._close()
+            self._set_leader(False)
+
+    async def wait_until_leader(self):
+        """Wait until this process is the leader."""
+        await self.leader_event.wait()
+
+    async def wait_until_follower(self):
+        """Wait until this process is not (or no longer) the leader."""
+        await self.follower_event.wait()
+
+    async def _try_acquire(self):
+        try:
+            if self.conn is None or self.conn.is_closed():
+                self.conn = await self.db.connect_dedicated()
+            acquired = await asyncio.wait_for(
+                self.conn.fetchval('SELECT pg_try_advisory_lock($1, hashtext($2))', LOCK_NAMESPACE, self.name),
+                timeout=RENEW_INTERVAL
+            )
+        except Exception as e:
+            logger.warning(f'Leader election {self.name}: failed to try the lock: {e}')
+            await self._close()
+            return
+        if acquired:
+            self._set_leader(True)
+
+    async def _renew(self):
+        try:
+            # A session-level advisory lock is held for as long as its session is alive
+            await asyncio.wait_for(self.conn.fetchval('SELECT 1'), timeout=RENEW_INTERVAL)  # type: ignore
+        except Exception as e:
+            logger.warning(f'Leader election {self.name}: lost the lock session: {e}')
+            await self._close()
+            self._set_leader(False)
+
+    async def _close(self):
+        if self.conn is not None and not self.conn.is_closed():
+            try:
+                # Closing the session releases the lock
+                await asyncio.wait_for(self.conn.close(), timeout=RENEW_INTERVAL)
+            except Exception:
+                self.conn.terminate()
+        self.conn = None
+
+    def _set_leader(self, leader: bool):
+        if leader != self.is_leader:
+            logger.info(f'Leader election {self.name}: {"became leader" if leader else "stepped down"}')
+        self.is_leader = leader
+        if leader:
+            self.follower_event.clear()
+            self.leader_event.set()
+        else:
+            self.leader_event.clear()
+            self.follower_event.set()
+        if self.metrics:
+            self.metrics.gauge('leader', 1 if leader else 0, election=self.name)
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from typing import Callable, Optional
+from urllib.parse import urljoin
+
+import aiohttp
+
+from utils.metrics import Metrics
+from utils.single_flight import SingleFlight
+
+logger = logging.getLogger('gfcbot.link_resolver')
+
+# Maximum redirects followed when resolving a share/short link
+MAX_HOPS = int(os.getenv('LINK_RESOLVER_MAX_HOPS', '5'))
+
+# Number of resolutions kept in memory
+LRU_SIZE = int(os.getenv('LINK_RESOLVER_CACHE_SIZE', '2048'))
+
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+
+class LinkResolver:
+    """
+    Resolves share and shortened links to the canonical post URL.
+
+    Follows redirects with HEAD-only requests and a bounded hop count. Results
+    are cached in an in-memory LRU and in the resolved_links table so each
+    link is resolved once across restarts and guilds.
+    """
+
+    def __init__(self, http_client, db, metrics: Optional[Metrics] = None):
+        """
+        Initialize link resolver.
+
+        Args:
+            http_client: Shared HttpClient
+            db: Database instance
+            metrics: Metrics registry
+        """
+        self.http_client = http_client
+        self.db = db
+        self.metrics = metrics
+        # Only final resolutions; failures and partial results are retried on the next resolve()
+        self.cache: 'OrderedDict[str, str]' = OrderedDict()
+        self.flight = SingleFlight('resolve', metrics=metrics)
+
+    def peek(self, url: str) -> Optional[str]:
+        """Return the cached resolution of a link without any I/O."""
+        resolved = self.cache.get(url)
+        if resolved is not None:
+            self.cache.move_to_end(url)
+        return resolved
+
+    def _remember(self, url: str, resolved: str):
+        self.cache[url] = resolved
+        self.cache.move_to_end(url)
+        while len(self.cache) > LRU_SIZE:
+            self.cache.popitem(last=False)
+
+    async def resolve(
+        self,
+        url: str,
+        timeout: float = 5,
+        is_final: Optional[Callable[[str], object]] = None
+    ) -> Optional[str]:
+        """
+        Resolve a share/short link.
+
+        Args:
+            url: Link as posted
+            timeout: Total timeout in seconds for following the redirects
+            is_final: Predicate that stops following once a URL is recognized (e.g. a post URL pattern)
+
+        Returns:
+            The final URL after redirects, or None if it could not be resolved
+        """
+        resolved = self.peek(url)
+        if resolved:
+            self._count('memory')
+            return resolved
+        return await self.flight.do(url, lambda: self._resolve_uncached(url, timeout, is_final))
+
+    async def _resolve_uncached(self, url: str, timeout: float, is_final) -> Optional[str]:
+        try:
+            resolved = await self.db.get_resolved_link(url)
+        except Exception as e:
+            logger.warning(f'Failed to read resolved link cache for {url}: {e}')
+            resolved = None
+        if resolved:
+            self._count('database')
+            self._remember(url, resolved)
+            return resolved
+
+        self._count('network')
+        resolved = await self._follow_redirects(url, timeout, is_final)
+        # Failures and partial results (a timeout mid-chain) are not cached, so the next resolve() retries them
+        if resolved and (is_final is None or is_final(resolved)):
+            self._remember(url, resolved)
+            try:
+                await self.db.save_resolved_link(url, resolved)
+            except Exception as e:
+                logger.warning(f'Failed to store resolved link for {url}: {e}')
+            logger.info(f'Resolved {url} -> {resolved}')
+        return resolved
+
+    async def _follow_redirects(self, url: str, timeout: float, is_final) -> Optional[str]:
+        session = self.http_client.session
+        if not session:
+            return None
+        current = url
+        try:
+            async with asyncio.timeout(timeout):
+                for _ in range(MAX_HOPS):
+                    async with session.head(current, allow_redirects=False) as resp:
+                        location = resp.headers.get('Location')
+                        if resp.status not in REDIRECT_STATUSES or not location:
+                            break
+                    current = urljoin(current, location)
+                    if is_final and is_final(current):
+                        break
+                else:
+                    logger.warning(f'Gave up resolving {url} after {MAX_HOPS} redirects')
+        except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+            # Keep whatever the redirects revealed before the failure
+            logger.warning(f'Failed to resolve {url} past {current}: {e}')
+        return current if current != url else None
+
+    def _count(self, source: str):
+        if self.metrics:
+            self.metrics.incr('link_resolutions_total', source=source)
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from utils.metrics import Metrics
+
+logger = logging.getLogger('gfcbot.loop_monitor')
+
+LOOP_MONITOR_ENABLED = os.getenv('LOOP_MONITOR_ENABLED', 'true').lower() == 'true'
+# How often scheduling lag is sampled
+LOOP_LAG_INTERVAL_SECONDS = float(os.getenv('LOOP_LAG_INTERVAL_SECONDS', '0.25'))
+# A callback holding the loop longer than this is a slow callback (logged with the loop thread's stack)
+LOOP_SLOW_CALLBACK_MS = float(os.getenv('LOOP_SLOW_CALLBACK_MS', '100'))
+# asyncio debug mode, where asyncio also logs every slow callback itself (adds overhead to every task)
+LOOP_ASYNCIO_DEBUG = os.getenv('LOOP_ASYNCIO_DEBUG', 'false').lower() == 'true'
+# Run on uvloop instead of asyncio's default event loop (needs uvloop installed)
+USE_UVLOOP = os.getenv('USE_UVLOOP', 'false').lower() == 'true'
+
+# Most recent slow-callback stacks kept for inspection
+STACKS_KEPT = 10
+
+
+def install_uvloop() -> bool:
+    """
+    Make asyncio.run() use uvloop, if it is installed.
+
+    Returns:
+        Whether uvloop is now the event loop implementation
+    """
+    try:
+        import uvloop
+    except ImportError:
+        logger.warning('USE_UVLOOP is set but uvloop is not installed; using the default event loop')
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.info(f'Using uvloop {uvloop.__version__}')
+    return True
+
+
+class LoopMonitor:
+    """
+    Measures event loop scheduling lag and captures what blocks the loop.
+
+    A sampler task sleeps for a fixed interval and records how late it wakes
+    up, which is the delay every other callback (gateway heartbeats included)
+    sees at that moment. A watchdog thread checks that the sampler is on
+    time; once it is late by more than the slow-callback threshold the loop
+    is blocked right now, so the loop thread's current stack (the offending
+    coroutine's frames) is captured and logged while it is still running.
+    """
+
+    def __init__(
+        self,
+        metrics: Optional[Metrics] = None,
+        interval: float = LOOP_LAG_INTERVAL_SECONDS,
+        slow_callback_threshold: float = LOOP_SLOW_CALLBACK_MS / 1000,
+        asyncio_debug: bool = LOOP_ASYNCIO_DEBUG
+    ):
+        """
+        Initialize loop monitor.
+
+        Args:
+            metrics: Metrics registry for lag percentiles and slow callback counts
+            interval: Seconds between lag samples
+            slow_callback_threshold: Seconds a callback may hold the loop before it is reported
+            asyncio_debug: Also turn on asyncio's debug mode (its own slow callback logging)
+        """
+        self.metrics = metrics
+        self.interval = interval
+        self.slow_callback_threshold = slow_callback_threshold
+        self.asyncio_debug = asyncio_debug
+        self.due: Optional[float] = None  # Monotonic time the sampler should wake up next
+        self.reported_due: Optional[float] = None  # Sample already reported as blocked
+        self.slow_callbacks = 0
+        self.max_lag = 0.0
+        self.stacks: Deque[Dict[str, Any]] = deque(maxlen=STACKS_KEPT)
+
+    async def run(self):
+        """Sample lag until cancelled, with the watchdog thread running alongside."""
+        loop = asyncio.get_running_loop()
+        # Threshold for asyncio's own slow callback warnings (logged in debug mode)
+        loop.slow_callback_duration = self.slow_callback_threshold
+        if self.asyncio_debug:
+            loop.set_debug(True)
+        stop = threading.Event()
+        watchdog = threading.Thread(
+            target=self._watch,
+            args=(loop, threading.get_ident(), stop),
+            name='gfcbot-loop-watchdog',
+            daemon=True
+        )
+        watchdog.start()
+        logger.info(
+            f'Loop monitor started ({type(loop).__module__}.{type(loop).__name__}, '
+            f'slow callback threshold {self.slow_callback_threshold * 1000:.0f}ms)'
+        )
+        try:
+            while True:
+                self.due = time.monotonic() + self.interval
+                await asyncio.sleep(self.interval)
+                lag = max(0.0, time.monotonic() - self.due)
+                self.max_lag = max(self.max_lag, lag)
+                if self.metrics:
+                    self.metrics.observe('event_loop_lag_seconds', lag)
+        finally:
+            self.due = None
+            stop.set()
+
+    def _watch(self, loop: asyncio.AbstractEventLoop, loop_thread: int, stop: threading.Event):
+        """Watchdog thread: capture the loop thread's stack while the sampler is overdue."""
+        while not stop.wait(self.slow_callback_threshold / 2):
+            due = self.due
+            if due is None or due == self.reported_due:
+                continue
+            blocked = time.monotonic() - due
+            if blocked <= self.slow_callback_threshold:
+                continue
+            # Once per blocked sample; the stack is whatever holds the loop right now
+            self.reported_due = due
+            frame = sys._current_frames().get(loop_thread)
+            stack = ''.join(traceback.format_stack(frame)) if frame else ''
+            self.stacks.append({'at': time.time(), 'blocked_seconds': blocked, 'stack': stack})
+            logger.warning(f'Event loop blocked for over {blocked * 1000:.0f}ms; loop thread stack:\n{stack}')
+            # Metrics are only touched from the loop thread
+            loop.call_soon_threadsafe(self._record_slow_callback)
+
+    def _record_slow_callback(self):
+        self.slow_callbacks += 1
+        if self.metrics:
+            self.metrics.incr('event_loop_slow_callbacks_total')
+
+    def lag_percentiles(self) -> Dict[float, Optional[float]]:
+        """p50/p95/p99 of the recent lag samples, in seconds."""
+        if not self.metrics:
+            return {}
+        return self.metrics.percentiles('event_loop_lag_seconds')
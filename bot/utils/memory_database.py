@@ -0,0 +1,377 @@
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any
+
+from utils.storage import Storage
+
+logger = logging.getLogger('gfcbot.memory_database')
+
+# Features seeded by the migrations
+DEFAULT_FEATURES = ['instagram_embed', 'twitter_embed']
+
+# Actions that grant each requested action (delete > manage > read)
+GRANTING_ACTIONS = {
+    'read': ('read', 'manage', 'delete'),
+    'manage': ('manage', 'delete'),
+    'delete': ('delete',)
+}
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class MemoryDatabase(Storage):
+    """
+    In-memory storage backend with the same methods and semantics as Database.
+
+    Nothing is persisted; meant for benchmarks, tests and throwaway runs
+    (DATABASE_URL=memory://). See Database for the method documentation.
+    """
+
+    # State lives in this process, so it is always the leader
+    single_node = True
+
+    def __init__(self, database_url: str = 'memory://'):
+        """
+        Initialize in-memory database.
+
+        Args:
+            database_url: Ignored; accepted for parity with the other backends
+        """
+        self.features: Dict[str, Dict[str, Any]] = {}  # name -> {id, active}
+        self.feature_permissions: Dict[tuple, Dict[str, bool]] = {}  # (server_id, role_id, feature_id) -> actions
+        self.embed_configs: Dict[tuple, Dict[str, Any]] = {}  # (server_id, feature_id, prefix) -> config
+        self.message_data: Dict[int, Dict[str, Any]] = {}
+        self.audit_logs: List[Dict[str, Any]] = []
+        self.users: Dict[int, str] = {}
+        self.channels: Dict[int, str] = {}
+        self.pruning_config: Dict[int, Dict[str, Any]] = {}
+        self.resolved_links: Dict[str, Dict[str, Any]] = {}
+        self.post_metadata: Dict[str, Dict[str, Any]] = {}
+        self.embed_retries: Dict[int, Dict[str, Any]] = {}
+        self.link_jobs: Dict[int, Dict[str, Any]] = {}
+        self.next_link_job_id = 1
+        self.channel_watermarks: Dict[int, Dict[str, Any]] = {}
+        self.bot_settings: Dict[str, str] = {'bot_status': 'Currently freeing your Instagram links'}
+        for name in DEFAULT_FEATURES:
+            self.add_feature(name)
+
+    def add_feature(self, name: str, active: bool = True) -> str:
+        """
+        Seed a feature (the dashboard manages these in Postgres deployments).
+
+        Returns:
+            Feature ID
+        """
+        feature = self.features.setdefault(name, {'id': str(uuid.uuid4()), 'active': active})
+        feature['active'] = active
+        return feature['id']
+
+    def add_embed_config(self, server_id: int, feature_id: str, prefix: str, priority: int, embed_type: str = 'prefix'):
+        """Seed an active embed config (the dashboard manages these in Postgres deployments)."""
+        self.embed_configs[(server_id, feature_id, prefix)] = {
+            'id': str(uuid.uuid4()),
+            'server_id': server_id,
+            'feature_id': feature_id,
+            'prefix': prefix,
+            'priority': priority,
+            'active': True,
+            'embed_type': embed_type
+        }
+
+    async def connect(self):
+        """Nothing to connect to."""
+
+    async def close(self):
+        """Nothing to close."""
+
+    async def upsert_user(self, user_id: int, username: str):
+        self.users[user_id] = username
+
+    async def upsert_channel(self, channel_id: int, channel_name: str):
+        self.channels[channel_id] = channel_name
+
+    async def ensure_pruning_config(self, server_id: int):
+        self.pruning_config.setdefault(server_id, {'enabled': True, 'max_days': 90})
+
+    async def get_embed_configs(self, server_id: int, feature_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        configs = [
+            config for config in self.embed_configs.values()
+            if config['server_id'] == server_id and config['active']
+            and (not feature_id or config['feature_id'] == feature_id)
+        ]
+        return [
+            {key: config[key] for key in ('id', 'prefix', 'priority', 'active', 'embed_type', 'feature_id')}
+            for config in sorted(configs, key=lambda config: config['priority'])
+        ]
+
+    async def get_feature_embed_prefixes(self, feature_id: str, server_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        prefixes = {
+            (config['prefix'], config['embed_type'])
+            for config in self.embed_configs.values()
+            if config['feature_id'] == feature_id and config['active']
+            and (server_ids is None or config['server_id'] in server_ids)
+        }
+        return [{'prefix': prefix, 'embed_type': embed_type} for prefix, embed_type in prefixes]
+
+    async def get_feature_id(self, feature_name: str) -> Optional[str]:
+        feature = self.features.get(feature_name)
+        return feature['id'] if feature and feature['active'] else None
+
+    async def get_feature_ids(self) -> Dict[str, str]:
+        return {name: feature['id'] for name, feature in self.features.items() if feature['active']}
+
+    async def check_permission(self, server_id: int, role_ids: List[int], feature_name: str, action: str) -> bool:
+        feature_id = await self.get_feature_id(feature_name)
+        if not feature_id:
+            return False
+        granting = GRANTING_ACTIONS.get(action, ())
+        for role_id in role_ids:
+            actions = self.feature_permissions.get((server_id, role_id, feature_id), {})
+            if any(actions.get(granted) for granted in granting):
+                return True
+        return False
+
+    async def set_feature_permissions(self, server_id: int, role_id: int, feature_id: str, actions: Dict[str, bool]):
+        self.feature_permissions[(server_id, role_id, feature_id)] = dict(actions)
+
+    async def insert_message_data(
+        self,
+        message_id: int,
+        channel_id: int,
+        server_id: int,
+        user_id: int,
+        original_url: str,
+        embedded_url: Optional[str],
+        embed_prefix_used: Optional[str],
+        validation_status: str,
+        validation_error: Optional[str],
+        webhook_message_id: Optional[int] = None,
+        post_key: Optional[str] = None
+    ):
+        now = _now()
+        self.message_data.setdefault(message_id, {
+            'message_id': message_id,
+            'channel_id': channel_id,
+            'server_id': server_id,
+            'user_id': user_id,
+            'original_url': original_url,
+            'embedded_url': embedded_url,
+            'embed_prefix_used': embed_prefix_used,
+            'validation_status': validation_status,
+            'validation_error': validation_error,
+            'checked_at': now,
+            'created_at': now,
+            'webhook_message_id': webhook_message_id,
+            'post_key': post_key
+        })
+
+    async def update_message_embed(
+        self,
+        message_id: int,
+        embedded_url: Optional[str],
+        embed_prefix_used: Optional[str],
+        validation_status: str,
+        validation_error: Optional[str]
+    ):
+        row = self.message_data.get(message_id)
+        if row:
+            row.update(
+                embedded_url=embedded_url,
+                embed_prefix_used=embed_prefix_used,
+                validation_status=validation_status,
+                validation_error=validation_error,
+                checked_at=_now()
+            )
+
+    async def get_recent_embed(self, channel_id: int, post_key: str, within_minutes: int) -> Optional[Dict[str, Any]]:
+        since = _now() - timedelta(minutes=within_minutes)
+        rows = [
+            row for row in self.message_data.values()
+            if row['channel_id'] == channel_id and row['post_key'] == post_key
+            and row['validation_status'] == 'success' and row['created_at'] > since
+        ]
+        if not rows:
+            return None
+        row = max(rows, key=lambda row: row['created_at'])
+        return {'message_id': row['message_id'], 'webhook_message_id': row['webhook_message_id']}
+
+    async def get_original_user_from_webhook(self, webhook_message_id: int) -> Optional[int]:
+        for row in self.message_data.values():
+            if row['webhook_message_id'] == webhook_message_id:
+                return row['user_id']
+        return None
+
+    async def get_resolved_link(self, short_url: str) -> Optional[str]:
+        row = self.resolved_links.get(short_url)
+        return row['resolved_url'] if row else None
+
+    async def save_resolved_link(self, short_url: str, resolved_url: str):
+        self.resolved_links[short_url] = {'resolved_url': resolved_url, 'resolved_at': _now()}
+
+    async def get_post_metadata(self, post_key: str) -> Optional[Dict[str, Any]]:
+        row = self.post_metadata.get(post_key)
+        if not row:
+            return None
+        return {key: row[key] for key in ('title', 'author', 'description', 'media_url', 'media_type', 'source')}
+
+    async def save_post_metadata(self, post_key: str, metadata: Dict[str, Any]):
+        self.post_metadata[post_key] = {
+            'title': metadata.get('title'),
+            'author': metadata.get('author'),
+            'description': metadata.get('description'),
+            'media_url': metadata.get('media_url'),
+            'media_type': metadata.get('media_type'),
+            'source': metadata.get('source', 'provider'),
+            'fetched_at': _now()
+        }
+
+    async def enqueue_embed_retry(
+        self,
+        message_id: int,
+        channel_id: int,
+        server_id: int,
+        user_id: int,
+        platform: str,
+        original_url: str,
+        post_key: Optional[str],
+        error: Optional[str],
+        delay_seconds: float
+    ):
+        now = _now()
+        self.embed_retries.setdefault(message_id, {
+            'message_id': message_id,
+            'channel_id': channel_id,
+            'server_id': server_id,
+            'user_id': user_id,
+            'platform': platform,
+            'original_url': original_url,
+            'post_key': post_key,
+            'attempts': 0,
+            'last_error': error,
+            'first_failed_at': now,
+            'next_attempt_at': now + timedelta(seconds=delay_seconds)
+        })
+
+    async def claim_embed_retries(self, platform: str, limit: int, lease_seconds: float) -> List[Dict[str, Any]]:
+        now = _now()
+        due = sorted(
+            (row for row in self.embed_retries.values() if row['platform'] == platform and row['next_attempt_at'] <= now),
+            key=lambda row: row['next_attempt_at']
+        )[:limit]
+        for row in due:
+            row['next_attempt_at'] = now + timedelta(seconds=lease_seconds)
+        return [dict(row) for row in due]
+
+    async def reschedule_embed_retry(self, message_id: int, error: Optional[str], delay_seconds: float, count_attempt: bool = True):
+        row = self.embed_retries.get(message_id)
+        if row:
+            row['attempts'] += 1 if count_attempt else 0
+            row['last_error'] = error if error is not None else row['last_error']
+            row['next_attempt_at'] = _now() + timedelta(seconds=delay_seconds)
+
+    async def delete_embed_retry(self, message_id: int):
+        self.embed_retries.pop(message_id, None)
+
+    async def insert_link_jobs(self, jobs: List[Dict[str, Any]]):
+        queued = {(job['message_id'], job['platform']) for job in self.link_jobs.values()}
+        for job in jobs:
+            if (job['message_id'], job['platform']) in queued:
+                continue
+            queued.add((job['message_id'], job['platform']))
+            self.link_jobs[self.next_link_job_id] = {
+                'id': self.next_link_job_id,
+                'platform': job['platform'],
+                'message_id': job['message_id'],
+                'channel_id': job['channel_id'],
+                'server_id': job['server_id'],
+                'original_url': job['original_url'],
+                'post_id': job['post_id'],
+                'attempts': 0,
+                'locked_by': None,
+                'locked_until': None,
+                'enqueued_at': job['enqueued_at']
+            }
+            self.next_link_job_id += 1
+
+    async def claim_link_jobs(self, platform: str, limit: int, lease_seconds: float, locked_by: str) -> List[Dict[str, Any]]:
+        now = _now()
+        claimed = [
+            job for job in self.link_jobs.values()
+            if job['platform'] == platform and (job['locked_until'] is None or job['locked_until'] < now)
+        ][:limit]
+        for job in claimed:
+            job['locked_by'] = locked_by
+            job['locked_until'] = now + timedelta(seconds=lease_seconds)
+            job['attempts'] += 1
+        return [dict(job) for job in claimed]
+
+    async def delete_link_job(self, job_id: int):
+        self.link_jobs.pop(job_id, None)
+
+    async def release_link_jobs(self, locked_by: str) -> int:
+        released = 0
+        for job in self.link_jobs.values():
+            if job['locked_by'] == locked_by:
+                job['locked_by'] = None
+                job['locked_until'] = None
+                released += 1
+        return released
+
+    async def get_queue_depths(self, server_id: int) -> Dict[str, int]:
+        return {
+            'link_jobs': sum(1 for job in self.link_jobs.values() if job['server_id'] == server_id),
+            'embed_retries': sum(1 for row in self.embed_retries.values() if row['server_id'] == server_id)
+        }
+
+    def pool_stats(self) -> Dict[str, Any]:
+        return {'backend': 'memory', 'size': 0, 'idle': 0, 'min': 0, 'max': 0}
+
+    async def get_channel_watermarks(self) -> Dict[int, int]:
+        return {channel_id: row['last_message_id'] for channel_id, row in self.channel_watermarks.items()}
+
+    async def save_channel_watermarks(self, watermarks: Dict[int, tuple]):
+        for channel_id, (server_id, last_message_id) in watermarks.items():
+            row = self.channel_watermarks.setdefault(channel_id, {'server_id': server_id, 'last_message_id': last_message_id})
+            row['last_message_id'] = max(row['last_message_id'], last_message_id)
+            row['updated_at'] = _now()
+
+    async def get_processed_message_ids(self, message_ids: List[int]) -> set:
+        return {message_id for message_id in message_ids if message_id in self.message_data}
+
+    async def prune_cached_lookups(self, older_than_days: int) -> int:
+        cutoff = _now() - timedelta(days=older_than_days)
+        stale_links = [url for url, row in self.resolved_links.items() if row['resolved_at'] < cutoff]
+        stale_metadata = [key for key, row in self.post_metadata.items() if row['fetched_at'] < cutoff]
+        for url in stale_links:
+            del self.resolved_links[url]
+        for key in stale_metadata:
+            del self.post_metadata[key]
+        return len(stale_links) + len(stale_metadata)
+
+    async def insert_audit_log(
+        self,
+        server_id: int,
+        user_id: int,
+        action: str,
+        target_type: str,
+        target_id: str,
+        details: Optional[Dict[str, Any]] = None
+    ):
+        self.audit_logs.append({
+            'server_id': server_id,
+            'user_id': user_id,
+            'action': action,
+            'target_type': target_type,
+            'target_id': target_id,
+            'details': dict(details) if details else None,
+            'timestamp': _now()
+        })
+
+    async def get_bot_setting(self, key: str) -> Optional[str]:
+        return self.bot_settings.get(key)
+
+    async def set_bot_setting(self, key: str, value: str):
+        self.bot_settings[key] = value
@@ -0,0 +1,111 @@
+import logging
+from collections import deque
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, Deque, Tuple, Iterable
+
+logger = logging.getLogger('gfcbot.metrics')
+
+# Number of recent observations kept per histogram series
+RESERVOIR_SIZE = 1024
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Labels bound to the current task with Metrics.bind()
+_context_labels: ContextVar[Dict[str, Any]] = ContextVar('metric_labels', default={})
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _percentile(sorted_values, q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Metrics:
+    """In-process counters and rolling histograms with labels."""
+
+    def __init__(self, reservoir_size: int = RESERVOIR_SIZE):
+        """
+        Initialize metrics registry.
+
+        Args:
+            reservoir_size: Number of recent observations kept per histogram series
+        """
+        self.reservoir_size = reservoir_size
+        self.default_labels: Dict[str, Any] = {}
+        self.counters: Dict[Tuple[str, LabelKey], float] = {}
+        self.histograms: Dict[Tuple[str, LabelKey], Deque[float]] = {}
+        self.gauges: Dict[Tuple[str, LabelKey], float] = {}
+
+    def _key(self, name: str, labels: Dict[str, Any]) -> Tuple[str, LabelKey]:
+        context_labels = _context_labels.get()
+        if self.default_labels or context_labels:
+            labels = {**self.default_labels, **context_labels, **labels}
+        return name, _label_key(labels)
+
+    def bind(self, **labels):
+        """Add labels to every metric recorded by the current task and the tasks it starts."""
+        _context_labels.set({**_context_labels.get(), **labels})
+
+    def incr(self, name: str, value: float = 1, **labels):
+        """Increment a counter."""
+        key = self._key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """Record an observation (e.g. a latency in seconds) in a histogram."""
+        key = self._key(name, labels)
+        series = self.histograms.get(key)
+        if series is None:
+            series = self.histograms[key] = deque(maxlen=self.reservoir_size)
+        series.append(value)
+
+    def gauge(self, name: str, value: float, **labels):
+        """Set a gauge to its current value."""
+        self.gauges[self._key(name, labels)] = value
+
+    def _matching(self, store: Dict, name: str, labels: Dict[str, Any]) -> Iterable:
+        wanted = set(_label_key(labels))
+        for (series_name, label_key), value in store.items():
+            if series_name == name and wanted.issubset(label_key):
+                yield value
+
+    def total(self, name: str, **labels) -> float:
+        """Sum of a counter across all series matching the given labels."""
+        return sum(self._matching(self.counters, name, labels))
+
+    def percentiles(self, name: str, quantiles=(0.5, 0.95, 0.99), **labels) -> Dict[float, Optional[float]]:
+        """Percentiles of a histogram across all series matching the given labels."""
+        values = sorted(value for series in self._matching(self.histograms, name, labels) for value in series)
+        return {q: _percentile(values, q) for q in quantiles}
+
+    def count(self, name: str, **labels) -> int:
+        """Number of retained observations of a histogram matching the given labels."""
+        return sum(len(series) for series in self._matching(self.histograms, name, labels))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Flat summary of all counters and histogram percentiles."""
+        counters = {}
+        for (name, label_key), value in self.counters.items():
+            counters[self._format(name, label_key)] = value
+        histograms = {}
+        for (name, label_key), series in self.histograms.items():
+            values = sorted(series)
+            histograms[self._format(name, label_key)] = {
+                'count': len(values),
+                'p50': _percentile(values, 0.5),
+                'p95': _percentile(values, 0.95),
+                'p99': _percentile(values, 0.99)
+            }
+        gauges = {self._format(name, label_key): value for (name, label_key), value in self.gauges.items()}
+        return {'counters': counters, 'histograms': histograms, 'gauges': gauges}
+
+    @staticmethod
+    def _format(name: str, label_key: LabelKey) -> str:
+        if not label_key:
+            return name
+        return name + '{' + ','.join(f'{key}={value}' for key, value in label_key) + '}'
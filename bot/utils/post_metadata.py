@@ -0,0 +1,242 @@
+import logging
+import os
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+import aiohttp
+import discord
+
+from utils.metrics import Metrics
+from utils.single_flight import SingleFlight
+
+logger = logging.getLogger('gfcbot.post_metadata')
+
+# Provider endpoints; {post_id} and {url} are substituted. Empty disables provider fetches
+# for that platform (metadata then only comes from og: tags seen during validation).
+METADATA_ENDPOINTS = {
+    'twitter': os.getenv('TWITTER_METADATA_URL', 'https://api.fxtwitter.com/status/{post_id}'),
+    'instagram': os.getenv('INSTAGRAM_METADATA_URL', '')
+}
+
+METADATA_ENABLED = os.getenv('POST_METADATA_ENABLED', 'true').lower() == 'true'
+
+# Number of posts kept in memory
+LRU_SIZE = int(os.getenv('POST_METADATA_CACHE_SIZE', '2048'))
+
+PLATFORM_COLORS = {
+    'twitter': discord.Color.from_rgb(29, 155, 240),
+    'instagram': discord.Color.from_rgb(225, 48, 108)
+}
+
+
+def metadata_from_og_tags(tags: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    Build post metadata from og:/twitter: meta tags of an embed page.
+
+    Args:
+        tags: Meta tags as returned by the bounded validator
+
+    Returns:
+        Metadata dict, or None if the tags don't describe any media
+    """
+    video = tags.get('og:video:secure_url') or tags.get('og:video:url') or tags.get('og:video')
+    image = tags.get('og:image') or tags.get('twitter:image')
+    if not video and not image:
+        return None
+    return {
+        'title': tags.get('og:title') or tags.get('twitter:title'),
+        'author': tags.get('twitter:creator') or tags.get('og:site_name'),
+        'description': tags.get('og:description') or tags.get('twitter:description'),
+        'media_url': image or video,
+        'media_type': 'video' if video else 'image',
+        'source': 'og_tags'
+    }
+
+
+def metadata_from_provider(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Build post metadata from a provider JSON response.
+
+    Understands oEmbed responses and FxTwitter-style status responses.
+
+    Args:
+        data: Decoded JSON body
+
+    Returns:
+        Metadata dict, or None if nothing usable was found
+    """
+    tweet = data.get('tweet')
+    if isinstance(tweet, dict):
+        author = tweet.get('author') or {}
+        media = tweet.get('media') or {}
+        videos = media.get('videos') or []
+        photos = media.get('photos') or []
+        media_url = None
+        media_type = None
+        if videos:
+            media_url = videos[0].get('thumbnail_url') or videos[0].get('url')
+            media_type = 'video'
+        elif photos:
+            media_url = photos[0].get('url')
+            media_type = 'image'
+        return {
+            'title': f"{author.get('name', '')} (@{author.get('screen_name', '')})".strip(),
+            'author': author.get('screen_name'),
+            'description': tweet.get('text'),
+            'media_url': media_url,
+            'media_type': media_type,
+            'source': 'provider'
+        }
+    if 'author_name' in data or 'thumbnail_url' in data:
+        return {
+            'title': data.get('title'),
+            'author': data.get('author_name'),
+            'description': data.get('title'),
+            'media_url': data.get('thumbnail_url'),
+            'media_type': 'video' if data.get('type') == 'video' else 'image',
+            'source': 'provider'
+        }
+    return None
+
+
+def build_native_embed(platform: str, url: str, metadata: Dict[str, Any]) -> discord.Embed:
+    """
+    Build a native Discord embed for a post from cached metadata.
+
+    Args:
+        platform: 'instagram' or 'twitter'
+        url: Canonical post URL
+        metadata: Post metadata
+
+    Returns:
+        discord.Embed linking to the post
+    """
+    embed = discord.Embed(
+        title=(metadata.get('title') or 'View post')[:256],
+        url=url,
+        description=(metadata.get('description') or '')[:4096] or None,
+        color=PLATFORM_COLORS.get(platform, discord.Color.blurple())
+    )
+    if metadata.get('author'):
+        embed.set_author(name=str(metadata['author'])[:256])
+    if metadata.get('media_url'):
+        embed.set_image(url=metadata['media_url'])
+    if metadata.get('media_type') == 'video':
+        embed.set_footer(text='▶ Video - open the post to play')
+    return embed
+
+
+class PostMetadataCache:
+    """
+    Post metadata (title, author, media URL and type) keyed by canonical post key.
+
+    Populated from the embed provider's JSON/oEmbed endpoint or from og: tags
+    seen during validation, and cached in an in-memory LRU plus the
+    post_metadata table.
+    """
+
+    def __init__(self, http_client, db, metrics: Optional[Metrics] = None):
+        """
+        Initialize metadata cache.
+
+        Args:
+            http_client: Shared HttpClient
+            db: Database instance
+            metrics: Metrics registry
+        """
+        self.http_client = http_client
+        self.db = db
+        self.metrics = metrics
+        self.cache: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self.flight = SingleFlight('metadata', metrics=metrics)
+
+    def _remember(self, key: str, metadata: Dict[str, Any]):
+        self.cache[key] = metadata
+        self.cache.move_to_end(key)
+        while len(self.cache) > LRU_SIZE:
+            self.cache.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get cached metadata for a post from memory or the database."""
+        metadata = self.cache.get(key)
+        if metadata is not None:
+            self.cache.move_to_end(key)
+            self._count('memory')
+            return metadata
+        try:
+            metadata = await self.db.get_post_metadata(key)
+        except Exception as e:
+            logger.warning(f'Failed to read post metadata for {key}: {e}')
+            return None
+        if metadata:
+            self._count('database')
+            self._remember(key, metadata)
+        return metadata
+
+    async def get_or_fetch(self, platform: str, post_id: str, url: str, timeout: float = 5) -> Optional[Dict[str, Any]]:
+        """
+        Get cached metadata for a post, fetching it from the provider on a miss.
+
+        Args:
+            platform: 'instagram' or 'twitter'
+            post_id: Platform post ID
+            url: Canonical post URL
+            timeout: Provider request timeout in seconds
+
+        Returns:
+            Metadata dict, or None if unavailable
+        """
+        if not METADATA_ENABLED:
+            return None
+        key = f'{platform}:{post_id}'
+        return await self.flight.do(key, lambda: self._get_or_fetch(key, platform, post_id, url, timeout))
+
+    async def _get_or_fetch(self, key: str, platform: str, post_id: str, url: str, timeout: float):
+        metadata = await self.get(key)
+        if metadata:
+            return metadata
+        metadata = await self._fetch_provider(platform, post_id, url, timeout)
+        if metadata:
+            await self.store(key, metadata)
+        return metadata
+
+    async def record_og_tags(self, key: str, tags: Dict[str, str]):
+        """Store metadata derived from og: tags unless richer provider metadata is cached."""
+        if not METADATA_ENABLED:
+            return
+        existing = self.cache.get(key)
+        if existing and existing.get('source') == 'provider':
+            return
+        metadata = metadata_from_og_tags(tags)
+        if metadata:
+            await self.store(key, metadata)
+
+    async def store(self, key: str, metadata: Dict[str, Any]):
+        """Cache metadata in memory and in the database."""
+        self._remember(key, metadata)
+        try:
+            await self.db.save_post_metadata(key, metadata)
+        except Exception as e:
+            logger.warning(f'Failed to store post metadata for {key}: {e}')
+
+    async def _fetch_provider(self, platform: str, post_id: str, url: str, timeout: float) -> Optional[Dict[str, Any]]:
+        endpoint = METADATA_ENDPOINTS.get(platform)
+        session = self.http_client.session
+        if not endpoint or not session:
+            return None
+        self._count('provider')
+        request_url = endpoint.format(post_id=post_id, url=url)
+        try:
+            async with session.get(request_url, timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+                if resp.status != 200:
+                    logger.info(f'Metadata provider returned HTTP {resp.status} for {platform}:{post_id}')
+                    return None
+                data = await resp.json(content_type=None)
+        except Exception as e:
+            logger.warning(f'Failed to fetch metadata for {platform}:{post_id}: {e}')
+            return None
+        return metadata_from_provider(data) if isinstance(data, dict) else None
+
+    def _count(self, source: str):
+        if self.metrics:
+            self.metrics.incr('post_metadata_lookups_total', source=source)
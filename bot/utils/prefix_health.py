@@ -0,0 +1,122 @@
+import logging
+import os
+import time
+from collections import deque
+from typing import Optional, Dict, Any, Deque, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger('gfcbot.prefix_health')
+
+# Number of recent validation attempts kept per prefix host
+WINDOW_SIZE = 200
+
+# Consecutive failures after which a prefix host is reported as down
+DOWN_AFTER_FAILURES = 3
+
+# Rolling success rate (and minimum sample count) above which a prefix is
+# trusted enough to post before validation completes
+OPTIMISTIC_SUCCESS_THRESHOLD = float(os.getenv('OPTIMISTIC_SUCCESS_THRESHOLD', '0.99'))
+OPTIMISTIC_MIN_SAMPLES = int(os.getenv('OPTIMISTIC_MIN_SAMPLES', '50'))
+
+
+def prefix_host(url: str) -> str:
+    """Return the lowercase host of an embedded URL, used as the prefix key."""
+    return (urlsplit(url).hostname or '').lower()
+
+
+class PrefixHealth:
+    """Rolling latency and success statistics per embed prefix host."""
+
+    def __init__(self, window_size: int = WINDOW_SIZE):
+        """
+        Initialize prefix health tracker.
+
+        Args:
+            window_size: Number of recent attempts kept per host
+        """
+        self.window_size = window_size
+        # host -> deque of (timestamp, latency_seconds, ok)
+        self.samples: Dict[str, Deque[Tuple[float, float, bool]]] = {}
+        self.consecutive_failures: Dict[str, int] = {}
+        self.last_error: Dict[str, Optional[str]] = {}
+
+    def record(self, url: str, latency: float, ok: bool, error: Optional[str] = None):
+        """
+        Record the outcome of a validation attempt.
+
+        Args:
+            url: Embedded URL that was validated
+            latency: Time taken in seconds
+            ok: Whether the validation succeeded
+            error: Error message if it failed
+        """
+        host = prefix_host(url)
+        if not host:
+            return
+        window = self.samples.get(host)
+        if window is None:
+            window = self.samples[host] = deque(maxlen=self.window_size)
+        window.append((time.time(), latency, ok))
+        if ok:
+            self.consecutive_failures[host] = 0
+        else:
+            self.consecutive_failures[host] = self.consecutive_failures.get(host, 0) + 1
+            self.last_error[host] = error
+
+    def p95_latency(self, url: str) -> Optional[float]:
+        """Observed p95 latency of successful attempts for the URL's host, or None if unknown."""
+        window = self.samples.get(prefix_host(url))
+        if not window:
+            return None
+        latencies = sorted(latency for _, latency, ok in window if ok)
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1))))
+        return latencies[index]
+
+    def success_rate(self, url: str) -> Tuple[Optional[float], int]:
+        """
+        Rolling success rate for the URL's host.
+
+        Returns:
+            Tuple of (success_rate or None if no samples, sample_count)
+        """
+        window = self.samples.get(prefix_host(url))
+        if not window:
+            return None, 0
+        successes = sum(1 for _, _, ok in window if ok)
+        return successes / len(window), len(window)
+
+    def is_reliable(self, url: str) -> bool:
+        """Whether the URL's host has enough history above the optimistic posting threshold."""
+        rate, count = self.success_rate(url)
+        if rate is None or count < OPTIMISTIC_MIN_SAMPLES:
+            return False
+        return rate >= OPTIMISTIC_SUCCESS_THRESHOLD and self.consecutive_failures.get(prefix_host(url), 0) == 0
+
+    def state(self, url: str) -> str:
+        """Health state of the URL's host: 'unknown', 'healthy', 'degraded' or 'down'."""
+        host = prefix_host(url)
+        if not self.samples.get(host):
+            return 'unknown'
+        if self.consecutive_failures.get(host, 0) >= DOWN_AFTER_FAILURES:
+            return 'down'
+        rate, _ = self.success_rate(url)
+        if rate is not None and rate < 0.9:
+            return 'degraded'
+        return 'healthy'
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Summary of every tracked host for diagnostics."""
+        result = {}
+        for host in self.samples:
+            url = f'https://{host}/'
+            rate, count = self.success_rate(url)
+            result[host] = {
+                'state': self.state(url),
+                'p95_latency': self.p95_latency(url),
+                'success_rate': rate,
+                'samples': count,
+                'last_error': self.last_error.get(host)
+            }
+        return result
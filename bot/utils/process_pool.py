@@ -0,0 +1,67 @@
+import logging
+import multiprocessing
+import signal
+import time
+from typing import Callable, Dict, Tuple
+
+logger = logging.getLogger('gfcbot.process_pool')
+
+
+class ProcessPool:
+    """
+    Runs a fixed set of child processes and restarts any that exit unexpectedly.
+
+    Children are started with the spawn method, so targets must be
+    module-level functions and configure themselves from their arguments.
+    """
+
+    def __init__(self, name: str, restart_delay: float = 5):
+        """
+        Initialize process pool.
+
+        Args:
+            name: Prefix of the child process names
+            restart_delay: Seconds to wait before restarting a child that exited
+        """
+        self.name = name
+        self.restart_delay = restart_delay
+        self.context = multiprocessing.get_context('spawn')
+        self.targets: Dict[int, Tuple[Callable, tuple]] = {}
+        self.processes: Dict[int, multiprocessing.process.BaseProcess] = {}
+        self.stopping = False
+
+    def add(self, index: int, target: Callable, args: tuple = ()):
+        """Register a child process."""
+        self.targets[index] = (target, args)
+
+    def _start(self, index: int):
+        target, args = self.targets[index]
+        process = self.context.Process(target=target, args=args, name=f'{self.name}-{index}')
+        process.start()
+        self.processes[index] = process
+        logger.info(f'Started {self.name} {index} (pid {process.pid})')
+
+    def _stop(self, signum, frame):
+        self.stopping = True
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+
+    def run(self):
+        """Start every child and supervise them until SIGTERM/SIGINT, then wait for them to exit."""
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for index in self.targets:
+            self._start(index)
+        while not self.stopping:
+            time.sleep(1)
+            for index, process in list(self.processes.items()):
+                if not process.is_alive() and not self.stopping:
+                    logger.warning(
+                        f'{self.name} {index} exited with code {process.exitcode}; '
+                        f'restarting in {self.restart_delay}s'
+                    )
+                    time.sleep(self.restart_delay)
+                    self._start(index)
+        for process in self.processes.values():
+            process.join()
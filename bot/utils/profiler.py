@@ -0,0 +1,270 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger('gfcbot.profiler')
+
+# Where collapsed-stack profiles are written (one file per run; the oldest are pruned)
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', '20'))
+PROFILE_DEFAULT_SECONDS = 30
+# Hard cap on a profile's duration
+PROFILE_MAX_SECONDS = float(os.getenv('PROFILE_MAX_SECONDS', '120'))
+# Sampling interval; it backs off when sampling would cost more than PROFILE_MAX_OVERHEAD of wall time
+PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', '10'))
+PROFILE_MAX_OVERHEAD = float(os.getenv('PROFILE_MAX_OVERHEAD', '0.02'))
+# Users allowed to run /profile besides the bot's owner (comma-separated IDs). The profiler sees
+# every guild's work and writes to the host's disk, so guild administrators are not enough
+PROFILE_USER_IDS = {int(user_id) for user_id in os.getenv('PROFILE_USER_IDS', '').split(',') if user_id.strip()}
+
+# GIL switch interval while profiling. The sampler only gets the GIL when the loop thread
+# releases it, which with the default 5ms is mostly while it waits in select(); a short
+# interval lets samples land inside busy stretches too
+PROFILE_SWITCH_INTERVAL = 0.0005
+
+# Leaf frames where asyncio's own event loop waits for I/O, i.e. is idle (see loop_entry_frame for uvloop)
+IDLE_FRAMES = {('selectors.py', 'select'), ('selectors.py', '_select')}
+
+# Frames listed in a summary
+TOP_FRAMES = 10
+
+
+def frame_label(code) -> str:
+    """Label of a code object in collapsed stacks, e.g. 'twitter_embed.py:_post_embed:784'."""
+    return f'{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}'
+
+
+def loop_entry_frame() -> Optional[Tuple[str, str]]:
+    """
+    (file, function) of the frame that started the running event loop, if the loop is uvloop.
+
+    uvloop waits for I/O in C, so its idle samples end in the Python frame
+    that started the loop rather than in selectors.py. That frame is the
+    caller of the running task's outermost coroutine.
+
+    Returns:
+        The frame's (file, function), or None on asyncio's own loop or outside a task
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    task = asyncio.current_task()
+    if task is None or not type(loop).__module__.startswith('uvloop'):
+        return None
+    frame = getattr(task.get_coro(), 'cr_frame', None)
+    caller = frame.f_back if frame is not None else None
+    if caller is None:
+        return None
+    filename, function = frame_label(caller.f_code).split(':')[:2]
+    return filename, function
+
+
+class SamplingProfiler:
+    """
+    In-process sampling profiler for the event loop thread.
+
+    A timer thread snapshots the loop thread's stack at a fixed interval and
+    counts identical stacks; nothing is traced, so the profiled code runs at
+    full speed between samples. Each sample holds the GIL while the stack is
+    walked, so the interval is widened whenever sampling would take more than
+    the overhead cap, and a run always ends after the duration cap. Results
+    are written in the collapsed-stack format (flamegraph.pl, speedscope).
+    """
+
+    def __init__(
+        self,
+        directory: str = PROFILE_DIR,
+        interval: float = PROFILE_INTERVAL_MS / 1000,
+        max_seconds: float = PROFILE_MAX_SECONDS,
+        max_overhead: float = PROFILE_MAX_OVERHEAD,
+        keep: int = PROFILE_KEEP
+    ):
+        """
+        Initialize profiler.
+
+        Args:
+            directory: Directory the profiles are written to
+            interval: Seconds between samples (before any overhead back-off)
+            max_seconds: Longest a profile may run
+            max_overhead: Fraction of wall time sampling may take
+            keep: Profiles kept in the directory
+        """
+        self.directory = directory
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.max_overhead = max_overhead
+        self.keep = keep
+        self.thread: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+        self.started_at: Optional[float] = None
+        self.seconds = 0.0
+        self.result: Optional[Dict[str, Any]] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether a profile is being taken."""
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, seconds: float = PROFILE_DEFAULT_SECONDS, thread_id: Optional[int] = None) -> float:
+        """
+        Start profiling a thread in the background.
+
+        Args:
+            seconds: How long to profile (capped at max_seconds)
+            thread_id: Thread to sample; defaults to the calling thread (the event loop)
+
+        Returns:
+            The duration the profile will run for
+
+        Raises:
+            RuntimeError: If a profile is already running
+        """
+        if self.running:
+            raise RuntimeError('A profile is already running')
+        self.seconds = max(1.0, min(float(seconds), self.max_seconds))
+        idle_frames = set(IDLE_FRAMES)
+        entry = loop_entry_frame() if thread_id is None else None
+        if entry:
+            idle_frames.add(entry)
+        self.stop_event = threading.Event()
+        self.result = None
+        self.started_at = time.monotonic()
+        self.thread = threading.Thread(
+            target=self._run,
+            args=(thread_id or threading.get_ident(), self.seconds, self.stop_event, idle_frames),
+            name='gfcbot-profiler',
+            daemon=True
+        )
+        self.thread.start()
+        logger.info(f'Profiling for {self.seconds:.0f}s')
+        return self.seconds
+
+    def stop(self) -> Optional[Dict[str, Any]]:
+        """
+        Stop the running profile early (or collect the one that just ended).
+
+        Returns:
+            Summary of the profile (see summarize), or None if no profile was taken
+        """
+        thread = self.thread
+        if thread is None:
+            return None
+        self.stop_event.set()
+        # The sampler notices within one interval; writing the file is quick
+        thread.join(timeout=5)
+        self.thread = None
+        return self.result
+
+    def _run(self, thread_id: int, seconds: float, stop_event: threading.Event, idle_frames: Set[Tuple[str, str]]):
+        """Sampler thread: count the target thread's stacks until stopped or out of time."""
+        stacks: Counter = Counter()
+        labels: Dict[Any, str] = {}
+        started = time.monotonic()
+        deadline = started + seconds
+        interval = self.interval
+        sampling_seconds = 0.0
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(switch_interval, PROFILE_SWITCH_INTERVAL))
+        try:
+            while not stop_event.wait(interval) and time.monotonic() < deadline:
+                sample_started = time.perf_counter()
+                frame = sys._current_frames().get(thread_id)
+                if frame is None:
+                    break
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = frame_label(code)
+                    stack.append(label)
+                    frame = frame.f_back
+                del frame
+                stacks[tuple(reversed(stack))] += 1
+                cost = time.perf_counter() - sample_started
+                sampling_seconds += cost
+                # Keep the time spent sampling under the overhead cap
+                interval = max(self.interval, cost / self.max_overhead)
+        finally:
+            sys.setswitchinterval(switch_interval)
+        duration = time.monotonic() - started
+        try:
+            self.result = self.summarize(stacks, duration, sampling_seconds, self._write(stacks), idle_frames)
+        except Exception as e:
+            logger.error(f'Failed to write profile: {e}', exc_info=True)
+            self.result = self.summarize(stacks, duration, sampling_seconds, None, idle_frames)
+        logger.info(f'Profile finished: {self.result["samples"]} samples over {duration:.1f}s')
+
+    def _write(self, stacks: Counter) -> str:
+        """Write stacks in collapsed format ('frame;frame;frame count' per line) and prune old profiles."""
+        os.makedirs(self.directory, exist_ok=True)
+        name = f'profile-{datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")}.collapsed'
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as f:
+            for stack, count in stacks.most_common():
+                f.write(f'{";".join(stack)} {count}\n')
+        profiles = sorted(
+            entry for entry in os.listdir(self.directory)
+            if entry.startswith('profile-') and entry.endswith('.collapsed')
+        )
+        for old in profiles[:-self.keep] if self.keep else []:
+            os.remove(os.path.join(self.directory, old))
+        return path
+
+    @staticmethod
+    def summarize(
+        stacks: Counter,
+        duration: float,
+        sampling_seconds: float,
+        path: Optional[str],
+        idle_frames: Set[Tuple[str, str]] = IDLE_FRAMES
+    ) -> Dict[str, Any]:
+        """
+        Summarize counted stacks.
+
+        Args:
+            stacks: Sample count per stack (root first)
+            duration: Seconds the profile ran
+            sampling_seconds: Seconds spent taking samples
+            path: File the profile was written to
+            idle_frames: (file, function) of the leaf frames where the loop waits for I/O
+
+        Returns:
+            Dictionary with path, duration, samples, overhead, idle (fraction of samples waiting
+            for I/O), top_self and top_total ((label, fraction of busy samples) lists)
+        """
+        samples = sum(stacks.values())
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        idle = 0
+        for stack, count in stacks.items():
+            leaf = stack[-1]
+            filename, function = leaf.split(':')[:2]
+            if (filename, function) in idle_frames:
+                idle += count
+                continue
+            self_counts[leaf] += count
+            for label in set(stack):
+                total_counts[label] += count
+        busy = max(1, samples - idle)
+
+        def top(counts: Counter) -> List[Tuple[str, float]]:
+            return [(label, count / busy) for label, count in counts.most_common(TOP_FRAMES)]
+
+        return {
+            'path': path,
+            'duration': duration,
+            'samples': samples,
+            'overhead': sampling_seconds / duration if duration else 0.0,
+            'idle': idle / samples if samples else 0.0,
+            'top_self': top(self_counts),
+            # Frames every busy sample shares (the loop's own run_forever/_run_once) say nothing
+            'top_total': top(Counter({label: count for label, count in total_counts.items() if count < busy}))
+        }
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import os
+import random
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Any, Optional
+
+import discord
+
+from utils.metrics import Metrics
+
+logger = logging.getLogger('gfcbot.retry_queue')
+
+RETRY_ENABLED = os.getenv('EMBED_RETRY_ENABLED', 'true').lower() == 'true'
+
+# Backoff: RETRY_BASE_DELAY * 2^attempts (with jitter), capped at RETRY_MAX_DELAY
+RETRY_BASE_DELAY = float(os.getenv('EMBED_RETRY_BASE_DELAY_SECONDS', '60'))
+RETRY_MAX_DELAY = float(os.getenv('EMBED_RETRY_MAX_DELAY_SECONDS', '1800'))
+
+# Links older than this are given up on
+RETRY_MAX_AGE = float(os.getenv('EMBED_RETRY_MAX_AGE_HOURS', '6')) * 3600
+
+# Rate limit: at most RETRY_BATCH_SIZE retries per poll, RETRY_SPACING seconds apart
+RETRY_POLL_INTERVAL = float(os.getenv('EMBED_RETRY_POLL_SECONDS', '30'))
+RETRY_BATCH_SIZE = int(os.getenv('EMBED_RETRY_BATCH_SIZE', '5'))
+RETRY_SPACING = float(os.getenv('EMBED_RETRY_SPACING_SECONDS', '2'))
+
+# Claimed rows stay hidden from other workers this long
+RETRY_LEASE = 300
+
+
+def retry_delay(attempts: int) -> float:
+    """
+    Delay before the next retry after a number of failed retries.
+
+    Args:
+        attempts: Retries already made
+
+    Returns:
+        Delay in seconds with +/-10% jitter
+    """
+    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempts))
+    return delay * random.uniform(0.9, 1.1)
+
+
+class RetryQueue:
+    """
+    Persistent queue of links whose embed prefixes all failed.
+
+    Rows live in the embed_retry_queue table and are claimed with
+    FOR UPDATE SKIP LOCKED, so several bot instances can share the queue.
+    Retries only run while the live validation queue is idle and are spaced
+    out so they never compete with new links.
+    """
+
+    def __init__(self, db, metrics: Optional[Metrics] = None):
+        """
+        Initialize retry queue.
+
+        Args:
+            db: Database instance
+            metrics: Metrics registry
+        """
+        self.db = db
+        self.metrics = metrics
+
+    async def schedule(self, message: discord.Message, platform: str, original_url: str, post_key: Optional[str], error: str) -> bool:
+        """
+        Queue a failed link for a deferred retry.
+
+        Args:
+            message: Discord message containing the URL
+            platform: 'instagram' or 'twitter'
+            original_url: Original URL
+            post_key: Canonical post key (platform:post_id)
+            error: Error of the failed attempt
+
+        Returns:
+            True if the link is queued for a retry
+        """
+        if not RETRY_ENABLED or not message.guild:
+            return False
+        try:
+            await self.db.enqueue_embed_retry(
+                message_id=message.id,
+                channel_id=message.channel.id,
+                server_id=message.guild.id,
+                user_id=message.author.id,
+                platform=platform,
+                original_url=original_url,
+                post_key=post_key,
+                error=error,
+                delay_seconds=retry_delay(0)
+            )
+            self._count(platform, 'scheduled')
+            return True
+        except Exception as e:
+            logger.warning(f'Failed to queue retry for message {message.id}: {e}')
+            return False
+
+    async def run(
+        self,
+        platform: str,
+        handler: Callable[[Dict[str, Any]], Awaitable[tuple]],
+        is_idle: Callable[[], bool]
+    ):
+        """
+        Retry loop for one platform; runs until cancelled.
+
+        Args:
+            platform: 'instagram' or 'twitter'
+            handler: Coroutine taking a retry row and returning (done, error);
+                done is True once the embed is posted or the message is gone
+            is_idle: Whether the live validation queue is empty
+        """
+        if not RETRY_ENABLED:
+            return
+        while True:
+            await asyncio.sleep(RETRY_POLL_INTERVAL)
+            if not is_idle():
+                continue
+            try:
+                jobs = await self.db.claim_embed_retries(platform, RETRY_BATCH_SIZE, RETRY_LEASE)
+            except Exception as e:
+                logger.warning(f'Failed to claim {platform} retries: {e}')
+                continue
+            for index, job in enumerate(jobs):
+                if not is_idle():
+                    # Live traffic arrived: hand the rest back without counting an attempt
+                    for pending in jobs[index:]:
+                        await self.db.reschedule_embed_retry(pending['message_id'], None, 0, count_attempt=False)
+                    break
+                await self._attempt(platform, job, handler)
+                await asyncio.sleep(RETRY_SPACING)
+
+    async def _attempt(self, platform: str, job: Dict[str, Any], handler):
+        try:
+            done, error = await handler(job)
+        except Exception as e:
+            logger.error(f'Error retrying embed for message {job["message_id"]}: {e}', exc_info=True)
+            done, error = False, f'Unexpected error: {e}'
+        try:
+            if done:
+                await self.db.delete_embed_retry(job['message_id'])
+                self._count(platform, 'done' if error is None else 'dropped')
+                return
+            age = (datetime.now(timezone.utc) - job['first_failed_at']).total_seconds()
+            if age >= RETRY_MAX_AGE:
+                await self.db.delete_embed_retry(job['message_id'])
+                self._count(platform, 'abandoned')
+                logger.info(f'Gave up retrying {job["original_url"]} after {job["attempts"] + 1} retries')
+                await self.db.insert_audit_log(
+                    server_id=job['server_id'],
+                    user_id=job['user_id'],
+                    action='embed_retry_abandoned',
+                    target_type='message',
+                    target_id=str(job['message_id']),
+                    details={
+                        'original_url': job['original_url'],
+                        'attempts': job['attempts'] + 1,
+                        'error': error,
+                        'message_id': job['message_id']
+                    }
+                )
+                return
+            await self.db.reschedule_embed_retry(job['message_id'], error, retry_delay(job['attempts'] + 1))
+            self._count(platform, 'failed')
+        except Exception as e:
+            logger.warning(f'Failed to update retry for message {job["message_id"]}: {e}')
+
+    def _count(self, platform: str, result: str):
+        if self.metrics:
+            self.metrics.incr('embed_retries_total', platform=platform, result=result)
@@ -0,0 +1,72 @@
+import os
+from typing import List, Optional
+
+# Run as an AutoShardedBot; SHARD_COUNT empty uses Discord's recommended count
+SHARDING_ENABLED = os.getenv('SHARDING_ENABLED', 'false').lower() == 'true'
+
+
+def parse_shard_ids(value: str) -> Optional[List[int]]:
+    """
+    Parse a shard ID list such as "0-3,6".
+
+    Args:
+        value: Comma-separated shard IDs and inclusive ranges
+
+    Returns:
+        Sorted shard IDs, or None if value is empty
+    """
+    shard_ids = set()
+    for part in value.replace(' ', '').split(','):
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            shard_ids.update(range(int(start), int(end) + 1))
+        else:
+            shard_ids.add(int(part))
+    return sorted(shard_ids) or None
+
+
+def format_shard_ids(shard_ids: List[int]) -> str:
+    """Format shard IDs compactly, e.g. [0, 1, 2, 3, 6] -> "0-3,6"."""
+    parts = []
+    for shard_id in sorted(shard_ids):
+        if parts and parts[-1][1] == shard_id - 1:
+            parts[-1][1] = shard_id
+        else:
+            parts.append([shard_id, shard_id])
+    return ','.join(str(start) if start == end else f'{start}-{end}' for start, end in parts)
+
+
+def split_shards(shard_count: int, clusters: int) -> List[List[int]]:
+    """
+    Split shard IDs into contiguous ranges of near-equal size.
+
+    Args:
+        shard_count: Total number of shards
+        clusters: Number of processes
+
+    Returns:
+        One list of shard IDs per process
+    """
+    clusters = max(1, min(clusters, shard_count))
+    size, extra = divmod(shard_count, clusters)
+    ranges = []
+    start = 0
+    for index in range(clusters):
+        end = start + size + (1 if index < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+SHARD_COUNT = int(os.getenv('SHARD_COUNT')) if os.getenv('SHARD_COUNT') else None
+SHARD_IDS = parse_shard_ids(os.getenv('SHARD_IDS', ''))
+
+
+def guild_shard(bot, guild_id: int) -> Optional[int]:
+    """Shard ID of a guild, or None when the bot isn't sharded."""
+    shard_count = bot.shard_count or SHARD_COUNT
+    if not shard_count:
+        return None
+    return (guild_id >> 22) % shard_count
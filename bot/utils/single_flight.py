@@ -0,0 +1,73 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from utils.metrics import Metrics
+
+logger = logging.getLogger('gfcbot.single_flight')
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one in-flight operation.
+
+    The first caller for a key starts the operation; callers arriving while it
+    is still running await the same result instead of starting their own.
+    """
+
+    def __init__(self, name: str, metrics: Optional[Metrics] = None):
+        """
+        Initialize single-flight group.
+
+        Args:
+            name: Group name used as a metrics label
+            metrics: Metrics registry for leader/coalesced counts
+        """
+        self.name = name
+        self.metrics = metrics
+        self.in_flight: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(
+        self,
+        key: str,
+        func: Callable[[], Awaitable[Any]],
+        timeout: Optional[float] = None,
+        timeout_result: Any = None
+    ) -> Any:
+        """
+        Run func for key, or join the call already in flight for that key.
+
+        Args:
+            key: Deduplication key (e.g. the embedded URL)
+            func: Zero-argument coroutine factory performing the operation
+            timeout: Longest a joining caller waits; the call it joins may have been
+                started with a longer budget than this caller has
+            timeout_result: Returned to a joining caller whose timeout passed
+
+        Returns:
+            The operation's result (shared by all coalesced callers)
+        """
+        task = self.in_flight.get(key)
+        if task is None:
+            self.leaders += 1
+            if self.metrics:
+                self.metrics.incr('singleflight_calls_total', group=self.name, result='leader')
+            task = asyncio.ensure_future(func())
+            self.in_flight[key] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+            if self.metrics:
+                self.metrics.incr('singleflight_calls_total', group=self.name, result='coalesced')
+            logger.debug(f'Coalesced {self.name} call for {key}')
+            if timeout is not None:
+                try:
+                    # The leader bounds func itself; a joiner gives up on its own bound and leaves it running
+                    return await asyncio.wait_for(asyncio.shield(task), max(0.0, timeout))
+                except asyncio.TimeoutError:
+                    logger.debug(f'Coalesced {self.name} call for {key} timed out after {timeout:.2f}s')
+                    return timeout_result
+        # Shield so one caller being cancelled doesn't cancel the shared operation
+        return await asyncio.shield(task)
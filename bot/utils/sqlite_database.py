@@ -0,0 +1,658 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any
+
+import aiosqlite  # type: ignore
+
+from utils.database import encode_json
+from utils.memory_database import DEFAULT_FEATURES
+from utils.storage import Storage
+
+logger = logging.getLogger('gfcbot.sqlite_database')
+
+# How long a statement waits on a lock held by another connection (e.g. the sqlite3 CLI)
+BUSY_TIMEOUT_MS = 5000
+
+# The Postgres schema (database/*.sql) translated to SQLite: timestamps are
+# epoch seconds (REAL), booleans 0/1 and JSONB columns JSON text
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS features (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    active INTEGER NOT NULL DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS feature_permissions (
+    server_id INTEGER NOT NULL,
+    role_id INTEGER NOT NULL,
+    feature_id TEXT NOT NULL REFERENCES features (id) ON DELETE CASCADE,
+    actions TEXT NOT NULL DEFAULT '{"read": false, "manage": false, "delete": false}',
+    updated_at REAL,
+    UNIQUE (server_id, role_id, feature_id)
+);
+
+CREATE TABLE IF NOT EXISTS embed_configs (
+    id TEXT PRIMARY KEY,
+    server_id INTEGER NOT NULL,
+    feature_id TEXT NOT NULL REFERENCES features (id) ON DELETE CASCADE,
+    prefix TEXT NOT NULL,
+    active INTEGER NOT NULL DEFAULT 1,
+    priority INTEGER NOT NULL DEFAULT 0,
+    embed_type TEXT NOT NULL DEFAULT 'prefix',
+    UNIQUE (server_id, feature_id, prefix)
+);
+
+CREATE INDEX IF NOT EXISTS idx_embed_configs_server_priority ON embed_configs (server_id, priority);
+
+CREATE TABLE IF NOT EXISTS message_data (
+    id INTEGER PRIMARY KEY,
+    message_id INTEGER NOT NULL UNIQUE,
+    channel_id INTEGER NOT NULL,
+    server_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    original_url TEXT NOT NULL,
+    embedded_url TEXT,
+    embed_prefix_used TEXT,
+    validation_status TEXT NOT NULL,
+    validation_error TEXT,
+    checked_at REAL,
+    created_at REAL NOT NULL,
+    webhook_message_id INTEGER,
+    post_key TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_message_data_channel_post_key ON message_data (channel_id, post_key, created_at);
+
+CREATE INDEX IF NOT EXISTS idx_message_data_webhook_message ON message_data (webhook_message_id);
+
+CREATE TABLE IF NOT EXISTS audit_logs (
+    id INTEGER PRIMARY KEY,
+    server_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    target_type TEXT,
+    target_id TEXT,
+    details TEXT,
+    timestamp REAL NOT NULL,
+    deleted_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS pruning_config (
+    server_id INTEGER PRIMARY KEY,
+    enabled INTEGER NOT NULL DEFAULT 1,
+    max_days INTEGER NOT NULL DEFAULT 90
+);
+
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    updated_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS channels (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    updated_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS bot_settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS resolved_links (
+    short_url TEXT PRIMARY KEY,
+    resolved_url TEXT NOT NULL,
+    resolved_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS post_metadata (
+    post_key TEXT PRIMARY KEY,
+    title TEXT,
+    author TEXT,
+    description TEXT,
+    media_url TEXT,
+    media_type TEXT,
+    source TEXT NOT NULL DEFAULT 'provider',
+    fetched_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_post_metadata_fetched_at ON post_metadata (fetched_at);
+
+CREATE TABLE IF NOT EXISTS embed_retry_queue (
+    message_id INTEGER PRIMARY KEY,
+    channel_id INTEGER NOT NULL,
+    server_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    platform TEXT NOT NULL,
+    original_url TEXT NOT NULL,
+    post_key TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    first_failed_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_embed_retry_queue_due ON embed_retry_queue (platform, next_attempt_at);
+
+CREATE TABLE IF NOT EXISTS link_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    platform TEXT NOT NULL,
+    message_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    server_id INTEGER NOT NULL,
+    original_url TEXT NOT NULL,
+    post_id TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    locked_by TEXT,
+    locked_until REAL,
+    enqueued_at REAL NOT NULL,
+    UNIQUE (message_id, platform)
+);
+
+CREATE INDEX IF NOT EXISTS idx_link_jobs_platform_id ON link_jobs (platform, id);
+
+CREATE TABLE IF NOT EXISTS channel_watermarks (
+    channel_id INTEGER PRIMARY KEY,
+    server_id INTEGER NOT NULL,
+    last_message_id INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+# Columns stored as epoch seconds and returned as aware datetimes, like asyncpg's timestamptz
+TIMESTAMP_COLUMNS = {
+    'checked_at', 'created_at', 'timestamp', 'deleted_at', 'updated_at', 'resolved_at',
+    'fetched_at', 'first_failed_at', 'next_attempt_at', 'locked_until', 'enqueued_at'
+}
+
+BOOLEAN_COLUMNS = {'active', 'enabled'}
+
+
+def _to_epoch(value) -> Optional[float]:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return value
+
+
+def _row(row: aiosqlite.Row) -> Dict[str, Any]:
+    result = dict(row)
+    for key, value in result.items():
+        if value is None:
+            continue
+        if key in TIMESTAMP_COLUMNS:
+            result[key] = datetime.fromtimestamp(value, timezone.utc)
+        elif key in BOOLEAN_COLUMNS:
+            result[key] = bool(value)
+    return result
+
+
+class SqliteDatabase(Storage):
+    """
+    SQLite storage backend for single-node deployments, using aiosqlite.
+
+    Same methods and semantics as Database (upserts, ON CONFLICT DO NOTHING,
+    check_permission inheritance) on a local file in WAL mode, so no network
+    database is needed. The schema is created on first connect. See Database
+    for the method documentation.
+    """
+
+    # Only one process can own the database file, so it is always the leader
+    single_node = True
+
+    def __init__(self, path: str):
+        """
+        Initialize database.
+
+        Args:
+            path: Database file (':memory:' for a private in-memory database)
+        """
+        if not path:
+            raise ValueError("SQLite database path is empty")
+        self.path = path
+        self.conn: Optional[aiosqlite.Connection] = None
+        # Serializes statements on the single connection so transactions never interleave
+        self.lock = asyncio.Lock()
+        logger.info(f"Initializing SQLite database at: {path}")
+
+    async def connect(self):
+        """Open the database and create the schema."""
+        if self.conn:
+            return
+        async with self.lock:
+            if self.conn:
+                return
+            # Autocommit: single statements need no transaction; batches open one explicitly
+            conn = await aiosqlite.connect(self.path, isolation_level=None)
+            conn.row_factory = aiosqlite.Row
+            await conn.execute('PRAGMA journal_mode = WAL')
+            await conn.execute('PRAGMA synchronous = NORMAL')
+            await conn.execute('PRAGMA foreign_keys = ON')
+            await conn.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+            await conn.executescript(SCHEMA)
+            await conn.executemany(
+                "INSERT INTO features (id, name) VALUES (?, ?) ON CONFLICT (name) DO NOTHING",
+                [(str(uuid.uuid4()), name) for name in DEFAULT_FEATURES]
+            )
+            await conn.execute(
+                "INSERT INTO bot_settings (key, value, updated_at) VALUES ('bot_status', ?, ?) ON CONFLICT (key) DO NOTHING",
+                ('Currently freeing your Instagram links', time.time())
+            )
+            self.conn = conn
+            logger.info('SQLite database opened successfully')
+
+    async def close(self):
+        """Close the database."""
+        if self.conn:
+            await self.conn.close()
+            self.conn = None
+            logger.info('SQLite database closed')
+
+    async def _execute(self, sql: str, params=()) -> int:
+        await self.connect()
+        async with self.lock:
+            cursor = await self.conn.execute(sql, params)  # type: ignore
+            rowcount = cursor.rowcount
+            await cursor.close()
+            return rowcount
+
+    async def _executemany(self, sql: str, params: List[tuple]):
+        # One transaction for the batch instead of a commit per row
+        await self.connect()
+        async with self.lock:
+            await self.conn.execute('BEGIN')  # type: ignore
+            try:
+                await self.conn.executemany(sql, params)  # type: ignore
+            except Exception:
+                await self.conn.execute('ROLLBACK')  # type: ignore
+                raise
+            await self.conn.execute('COMMIT')  # type: ignore
+
+    async def _fetch(self, sql: str, params=()) -> List[Dict[str, Any]]:
+        await self.connect()
+        async with self.lock:
+            cursor = await self.conn.execute(sql, params)  # type: ignore
+            rows = await cursor.fetchall()
+            await cursor.close()
+            return [_row(row) for row in rows]
+
+    async def _fetchrow(self, sql: str, params=()) -> Optional[Dict[str, Any]]:
+        rows = await self._fetch(sql, params)
+        return rows[0] if rows else None
+
+    async def add_embed_config(self, server_id: int, feature_id: str, prefix: str, priority: int, embed_type: str = 'prefix'):
+        """Add or re-activate an embed config (the dashboard manages these in Postgres deployments)."""
+        await self._execute(
+            """
+            INSERT INTO embed_configs (id, server_id, feature_id, prefix, priority, embed_type)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (server_id, feature_id, prefix) DO UPDATE SET
+                active = 1, priority = excluded.priority, embed_type = excluded.embed_type
+            """,
+            (str(uuid.uuid4()), server_id, feature_id, prefix, priority, embed_type)
+        )
+
+    async def upsert_user(self, user_id: int, username: str):
+        await self._execute(
+            """
+            INSERT INTO users (id, username, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET username = excluded.username, updated_at = excluded.updated_at
+            """,
+            (user_id, username, time.time())
+        )
+
+    async def upsert_channel(self, channel_id: int, channel_name: str):
+        await self._execute(
+            """
+            INSERT INTO channels (id, name, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET name = excluded.name, updated_at = excluded.updated_at
+            """,
+            (channel_id, channel_name, time.time())
+        )
+
+    async def ensure_pruning_config(self, server_id: int):
+        await self._execute(
+            "INSERT INTO pruning_config (server_id, enabled, max_days) VALUES (?, 1, 90) ON CONFLICT (server_id) DO NOTHING",
+            (server_id,)
+        )
+
+    async def get_embed_configs(self, server_id: int, feature_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        return await self._fetch(
+            """
+            SELECT id, prefix, priority, active, embed_type, feature_id
+            FROM embed_configs
+            WHERE server_id = ? AND (? IS NULL OR feature_id = ?) AND active = 1
+            ORDER BY priority ASC
+            """,
+            (server_id, feature_id, feature_id)
+        )
+
+    async def get_feature_embed_prefixes(self, feature_id: str, server_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        return await self._fetch(
+            """
+            SELECT DISTINCT prefix, embed_type
+            FROM embed_configs
+            WHERE feature_id = ? AND active = 1
+              AND (? IS NULL OR server_id IN (SELECT value FROM json_each(?)))
+            """,
+            (feature_id, None if server_ids is None else 1, json.dumps(server_ids or []))
+        )
+
+    async def get_feature_id(self, feature_name: str) -> Optional[str]:
+        row = await self._fetchrow("SELECT id FROM features WHERE name = ? AND active = 1", (feature_name,))
+        return row['id'] if row else None
+
+    async def get_feature_ids(self) -> Dict[str, str]:
+        rows = await self._fetch("SELECT name, id FROM features WHERE active = 1")
+        return {row['name']: row['id'] for row in rows}
+
+    async def check_permission(self, server_id: int, role_ids: List[int], feature_name: str, action: str) -> bool:
+        # Same inheritance as the check_permission() Postgres function: delete > manage > read
+        row = await self._fetchrow(
+            """
+            SELECT EXISTS (
+                SELECT 1 FROM feature_permissions fp
+                JOIN features f ON f.id = fp.feature_id
+                WHERE fp.server_id = :server_id
+                  AND fp.role_id IN (SELECT value FROM json_each(:role_ids))
+                  AND f.name = :feature_name AND f.active = 1
+                  AND (
+                      json_extract(fp.actions, '$.delete') = 1
+                      OR (:action IN ('read', 'manage') AND json_extract(fp.actions, '$.manage') = 1)
+                      OR (:action = 'read' AND json_extract(fp.actions, '$.read') = 1)
+                  )
+            ) AS allowed
+            """,
+            {'server_id': server_id, 'role_ids': json.dumps(role_ids), 'feature_name': feature_name, 'action': action}
+        )
+        return bool(row and row['allowed'])
+
+    async def set_feature_permissions(self, server_id: int, role_id: int, feature_id: str, actions: Dict[str, bool]):
+        await self._execute(
+            """
+            INSERT INTO feature_permissions (server_id, role_id, feature_id, actions, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (server_id, role_id, feature_id)
+            DO UPDATE SET actions = excluded.actions, updated_at = excluded.updated_at
+            """,
+            (server_id, role_id, feature_id, encode_json(actions), time.time())
+        )
+
+    async def insert_message_data(
+        self,
+        message_id: int,
+        channel_id: int,
+        server_id: int,
+        user_id: int,
+        original_url: str,
+        embedded_url: Optional[str],
+        embed_prefix_used: Optional[str],
+        validation_status: str,
+        validation_error: Optional[str],
+        webhook_message_id: Optional[int] = None,
+        post_key: Optional[str] = None
+    ):
+        now = time.time()
+        await self._execute(
+            """
+            INSERT INTO message_data (
+                message_id, channel_id, server_id, user_id,
+                original_url, embedded_url, embed_prefix_used,
+                validation_status, validation_error, checked_at, created_at, webhook_message_id, post_key
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (message_id) DO NOTHING
+            """,
+            (message_id, channel_id, server_id, user_id, original_url, embedded_url, embed_prefix_used,
+             validation_status, validation_error, now, now, webhook_message_id, post_key)
+        )
+
+    async def update_message_embed(
+        self,
+        message_id: int,
+        embedded_url: Optional[str],
+        embed_prefix_used: Optional[str],
+        validation_status: str,
+        validation_error: Optional[str]
+    ):
+        await self._execute(
+            """
+            UPDATE message_data
+            SET embedded_url = ?, embed_prefix_used = ?, validation_status = ?, validation_error = ?, checked_at = ?
+            WHERE message_id = ?
+            """,
+            (embedded_url, embed_prefix_used, validation_status, validation_error, time.time(), message_id)
+        )
+
+    async def get_recent_embed(self, channel_id: int, post_key: str, within_minutes: int) -> Optional[Dict[str, Any]]:
+        return await self._fetchrow(
+            """
+            SELECT message_id, webhook_message_id FROM message_data
+            WHERE channel_id = ? AND post_key = ? AND validation_status = 'success' AND created_at > ?
+            ORDER BY created_at DESC
+            LIMIT 1
+            """,
+            (channel_id, post_key, time.time() - within_minutes * 60)
+        )
+
+    async def get_original_user_from_webhook(self, webhook_message_id: int) -> Optional[int]:
+        row = await self._fetchrow("SELECT user_id FROM message_data WHERE webhook_message_id = ?", (webhook_message_id,))
+        return row['user_id'] if row else None
+
+    async def get_resolved_link(self, short_url: str) -> Optional[str]:
+        row = await self._fetchrow("SELECT resolved_url FROM resolved_links WHERE short_url = ?", (short_url,))
+        return row['resolved_url'] if row else None
+
+    async def save_resolved_link(self, short_url: str, resolved_url: str):
+        await self._execute(
+            """
+            INSERT INTO resolved_links (short_url, resolved_url, resolved_at) VALUES (?, ?, ?)
+            ON CONFLICT (short_url) DO UPDATE SET resolved_url = excluded.resolved_url, resolved_at = excluded.resolved_at
+            """,
+            (short_url, resolved_url, time.time())
+        )
+
+    async def get_post_metadata(self, post_key: str) -> Optional[Dict[str, Any]]:
+        return await self._fetchrow(
+            "SELECT title, author, description, media_url, media_type, source FROM post_metadata WHERE post_key = ?",
+            (post_key,)
+        )
+
+    async def save_post_metadata(self, post_key: str, metadata: Dict[str, Any]):
+        await self._execute(
+            """
+            INSERT INTO post_metadata (post_key, title, author, description, media_url, media_type, source, fetched_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (post_key) DO UPDATE SET
+                title = excluded.title, author = excluded.author, description = excluded.description,
+                media_url = excluded.media_url, media_type = excluded.media_type,
+                source = excluded.source, fetched_at = excluded.fetched_at
+            """,
+            (post_key, metadata.get('title'), metadata.get('author'), metadata.get('description'),
+             metadata.get('media_url'), metadata.get('media_type'), metadata.get('source', 'provider'), time.time())
+        )
+
+    async def enqueue_embed_retry(
+        self,
+        message_id: int,
+        channel_id: int,
+        server_id: int,
+        user_id: int,
+        platform: str,
+        original_url: str,
+        post_key: Optional[str],
+        error: Optional[str],
+        delay_seconds: float
+    ):
+        now = time.time()
+        await self._execute(
+            """
+            INSERT INTO embed_retry_queue (
+                message_id, channel_id, server_id, user_id, platform,
+                original_url, post_key, last_error, first_failed_at, next_attempt_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (message_id) DO NOTHING
+            """,
+            (message_id, channel_id, server_id, user_id, platform, original_url, post_key, error, now, now + delay_seconds)
+        )
+
+    async def claim_embed_retries(self, platform: str, limit: int, lease_seconds: float) -> List[Dict[str, Any]]:
+        # A single statement, so the claim is atomic without row locks
+        now = time.time()
+        rows = await self._fetch(
+            """
+            UPDATE embed_retry_queue
+            SET next_attempt_at = ?
+            WHERE message_id IN (
+                SELECT message_id FROM embed_retry_queue
+                WHERE platform = ? AND next_attempt_at <= ?
+                ORDER BY next_attempt_at
+                LIMIT ?
+            )
+            RETURNING *
+            """,
+            (now + lease_seconds, platform, now, limit)
+        )
+        return rows
+
+    async def reschedule_embed_retry(self, message_id: int, error: Optional[str], delay_seconds: float, count_attempt: bool = True):
+        await self._execute(
+            """
+            UPDATE embed_retry_queue
+            SET attempts = attempts + ?, last_error = COALESCE(?, last_error), next_attempt_at = ?
+            WHERE message_id = ?
+            """,
+            (1 if count_attempt else 0, error, time.time() + delay_seconds, message_id)
+        )
+
+    async def delete_embed_retry(self, message_id: int):
+        await self._execute("DELETE FROM embed_retry_queue WHERE message_id = ?", (message_id,))
+
+    async def insert_link_jobs(self, jobs: List[Dict[str, Any]]):
+        if not jobs:
+            return
+        await self._executemany(
+            """
+            INSERT INTO link_jobs (platform, message_id, channel_id, server_id, original_url, post_id, enqueued_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (message_id, platform) DO NOTHING
+            """,
+            [
+                (job['platform'], job['message_id'], job['channel_id'], job['server_id'],
+                 job['original_url'], job['post_id'], _to_epoch(job['enqueued_at']))
+                for job in jobs
+            ]
+        )
+
+    async def claim_link_jobs(self, platform: str, limit: int, lease_seconds: float, locked_by: str) -> List[Dict[str, Any]]:
+        now = time.time()
+        rows = await self._fetch(
+            """
+            UPDATE link_jobs
+            SET locked_by = ?, locked_until = ?, attempts = attempts + 1
+            WHERE id IN (
+                SELECT id FROM link_jobs
+                WHERE platform = ? AND (locked_until IS NULL OR locked_until < ?)
+                ORDER BY id
+                LIMIT ?
+            )
+            RETURNING *
+            """,
+            (locked_by, now + lease_seconds, platform, now, limit)
+        )
+        return sorted(rows, key=lambda row: row['id'])
+
+    async def delete_link_job(self, job_id: int):
+        await self._execute("DELETE FROM link_jobs WHERE id = ?", (job_id,))
+
+    async def release_link_jobs(self, locked_by: str) -> int:
+        return await self._execute(
+            "UPDATE link_jobs SET locked_by = NULL, locked_until = NULL WHERE locked_by = ?",
+            (locked_by,)
+        )
+
+    async def get_queue_depths(self, server_id: int) -> Dict[str, int]:
+        row = await self._fetchrow(
+            """
+            SELECT
+                (SELECT COUNT(*) FROM link_jobs WHERE server_id = ?) AS link_jobs,
+                (SELECT COUNT(*) FROM embed_retry_queue WHERE server_id = ?) AS embed_retries
+            """,
+            (server_id, server_id)
+        )
+        return {'link_jobs': row['link_jobs'], 'embed_retries': row['embed_retries']}  # type: ignore
+
+    def pool_stats(self) -> Dict[str, Any]:
+        # One connection, busy while a statement holds the lock
+        size = 1 if self.conn else 0
+        return {'backend': 'sqlite', 'size': size, 'idle': size if not self.lock.locked() else 0, 'min': 1, 'max': 1}
+
+    async def get_channel_watermarks(self) -> Dict[int, int]:
+        rows = await self._fetch("SELECT channel_id, last_message_id FROM channel_watermarks")
+        return {row['channel_id']: row['last_message_id'] for row in rows}
+
+    async def save_channel_watermarks(self, watermarks: Dict[int, tuple]):
+        if not watermarks:
+            return
+        now = time.time()
+        await self._executemany(
+            """
+            INSERT INTO channel_watermarks (channel_id, server_id, last_message_id, updated_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (channel_id) DO UPDATE SET
+                last_message_id = MAX(channel_watermarks.last_message_id, excluded.last_message_id),
+                updated_at = excluded.updated_at
+            """,
+            [(channel_id, server_id, message_id, now) for channel_id, (server_id, message_id) in watermarks.items()]
+        )
+
+    async def get_processed_message_ids(self, message_ids: List[int]) -> set:
+        if not message_ids:
+            return set()
+        rows = await self._fetch(
+            "SELECT message_id FROM message_data WHERE message_id IN (SELECT value FROM json_each(?))",
+            (json.dumps(message_ids),)
+        )
+        return {row['message_id'] for row in rows}
+
+    async def prune_cached_lookups(self, older_than_days: int) -> int:
+        cutoff = time.time() - older_than_days * 86400
+        links = await self._execute("DELETE FROM resolved_links WHERE resolved_at < ?", (cutoff,))
+        metadata = await self._execute("DELETE FROM post_metadata WHERE fetched_at < ?", (cutoff,))
+        return links + metadata
+
+    async def insert_audit_log(
+        self,
+        server_id: int,
+        user_id: int,
+        action: str,
+        target_type: str,
+        target_id: str,
+        details: Optional[Dict[str, Any]] = None
+    ):
+        await self._execute(
+            """
+            INSERT INTO audit_logs (server_id, user_id, action, target_type, target_id, details, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (server_id, user_id, action, target_type, target_id, encode_json(details), time.time())
+        )
+
+    async def get_bot_setting(self, key: str) -> Optional[str]:
+        row = await self._fetchrow("SELECT value FROM bot_settings WHERE key = ?", (key,))
+        return row['value'] if row else None
+
+    async def set_bot_setting(self, key: str, value: str):
+        await self._execute(
+            """
+            INSERT INTO bot_settings (key, value, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT (key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+            """,
+            (key, value, time.time())
+        )
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+from discord import app_commands
+
+from utils.metrics import Metrics
+
+logger = logging.getLogger('gfcbot.startup')
+
+# bot_settings key of the hash of the last synced command tree
+COMMAND_TREE_HASH_KEY = 'command_tree_hash'
+# Sync the command tree on startup even if its hash is unchanged
+FORCE_COMMAND_SYNC = os.getenv('FORCE_COMMAND_SYNC', 'false').lower() == 'true'
+
+# When the bot modules started loading, the reference point of the startup milestones
+PROCESS_STARTED = time.monotonic()
+
+
+def command_tree_hash(tree: app_commands.CommandTree, application_id: Optional[int]) -> str:
+    """
+    Hash of the global command tree as it would be synced to Discord.
+
+    Args:
+        tree: The bot's command tree
+        application_id: Application the commands belong to
+
+    Returns:
+        SHA-256 hex digest, independent of the order commands were added in
+    """
+    commands = sorted(
+        (command.to_dict() for command in tree.get_commands()),
+        key=lambda command: (command.get('type', 1), command['name'])
+    )
+    payload = json.dumps({'application_id': application_id, 'commands': commands}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+async def sync_command_tree(bot: Any, db: Any, force: bool = FORCE_COMMAND_SYNC) -> Optional[int]:
+    """
+    Sync the global command tree, unless it is unchanged since the last sync.
+
+    Syncing hits Discord's heavily rate-limited command endpoint, so the hash
+    of the synced tree is kept in bot_settings and compared on startup.
+
+    Args:
+        bot: The bot
+        db: Storage backend holding bot_settings
+        force: Sync even if the hash is unchanged
+
+    Returns:
+        Number of commands synced, or None if the sync was skipped
+    """
+    tree_hash = command_tree_hash(bot.tree, bot.application_id)
+    if not force:
+        try:
+            stored_hash = await db.get_bot_setting(COMMAND_TREE_HASH_KEY)
+        except Exception as e:
+            logger.warning(f'Failed to read the synced command tree hash: {e}')
+            stored_hash = None
+        if stored_hash == tree_hash:
+            logger.info(f'Command tree unchanged ({tree_hash[:12]}); skipping sync')
+            return None
+    synced = await bot.tree.sync()
+    try:
+        await db.set_bot_setting(COMMAND_TREE_HASH_KEY, tree_hash)
+    except Exception as e:
+        logger.warning(f'Failed to store the synced command tree hash: {e}')
+    return len(synced)
+
+
+class StartupTimer:
+    """
+    Time from process start to startup milestones: cogs loaded, gateway ready, first embed.
+
+    Each milestone is logged and published once (the startup_seconds gauge,
+    labelled by phase); later calls for the same milestone are a dict lookup.
+    """
+
+    def __init__(self, metrics: Optional[Metrics] = None, started: float = PROCESS_STARTED):
+        """
+        Initialize startup timer.
+
+        Args:
+            metrics: Metrics registry for the startup_seconds gauge
+            started: Monotonic time the process started
+        """
+        self.metrics = metrics
+        self.started = started
+        self.phases: Dict[str, float] = {}
+
+    def mark(self, phase: str) -> Optional[float]:
+        """
+        Record reaching a milestone.
+
+        Args:
+            phase: Milestone name (e.g. 'ready', 'first_embed')
+
+        Returns:
+            Seconds since process start, or None if the milestone was already recorded
+        """
+        if phase in self.phases:
+            return None
+        elapsed = time.monotonic() - self.started
+        self.phases[phase] = elapsed
+        if self.metrics:
+            self.metrics.gauge('startup_seconds', elapsed, phase=phase)
+        logger.info(f'Startup: {phase} after {elapsed:.2f}s')
+        return elapsed
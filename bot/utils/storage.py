@@ -0,0 +1,284 @@
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger('gfcbot.storage')
+
+
+class Storage(ABC):
+    """
+    Interface every storage backend implements (Database, SqliteDatabase, MemoryDatabase).
+
+    A method added to one backend is added here too, so a backend missing it
+    fails when it is instantiated instead of when the method is first called.
+    See Database for the method documentation.
+    """
+
+    # True when the database belongs to this one process, so it is always the leader
+    single_node: bool = False
+
+    @abstractmethod
+    async def upsert_user(self, user_id: int, username: str):
+        """Upsert Discord user ID and username into users table."""
+
+    @abstractmethod
+    async def upsert_channel(self, channel_id: int, channel_name: str):
+        """Upsert Discord channel ID and name into channels table."""
+
+    @abstractmethod
+    async def connect(self):
+        """Create database connection pool."""
+
+    @abstractmethod
+    async def close(self):
+        """Close database connection pool."""
+
+    @abstractmethod
+    async def ensure_pruning_config(self, server_id: int):
+        """Ensure pruning config exists for a server."""
+
+    @abstractmethod
+    async def get_embed_configs(self, server_id: int, feature_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get all active embed configurations for a server, optionally scoped to a feature, ordered by priority."""
+
+    @abstractmethod
+    async def get_feature_embed_prefixes(
+        self,
+        feature_id: str,
+        server_ids: Optional[List[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get the distinct active embed prefixes for a feature across servers."""
+
+    @abstractmethod
+    async def get_feature_id(self, feature_name: str) -> Optional[str]:
+        """Get feature ID by name."""
+
+    @abstractmethod
+    async def get_feature_ids(self) -> Dict[str, str]:
+        """Get the IDs of every active feature in one query."""
+
+    @abstractmethod
+    async def check_permission(
+        self,
+        server_id: int,
+        role_ids: List[int],
+        feature_name: str,
+        action: str
+    ) -> bool:
+        """Check if any of the roles has permission for a feature action (delete > manage > read)."""
+
+    @abstractmethod
+    async def set_feature_permissions(
+        self,
+        server_id: int,
+        role_id: int,
+        feature_id: str,
+        actions: Dict[str, bool]
+    ):
+        """Set the actions a role may perform on a feature."""
+
+    @abstractmethod
+    async def insert_message_data(
+        self,
+        message_id: int,
+        channel_id: int,
+        server_id: int,
+        user_id: int,
+        original_url: str,
+        embedded_url: Optional[str],
+        embed_prefix_used: Optional[str],
+        validation_status: str,
+        validation_error: Optional[str],
+        webhook_message_id: Optional[int] = None,
+        post_key: Optional[str] = None
+    ):
+        """Insert message transformation data."""
+
+    @abstractmethod
+    async def update_message_embed(
+        self,
+        message_id: int,
+        embedded_url: Optional[str],
+        embed_prefix_used: Optional[str],
+        validation_status: str,
+        validation_error: Optional[str]
+    ):
+        """Update the embed outcome of an existing message transformation record."""
+
+    @abstractmethod
+    async def get_recent_embed(
+        self,
+        channel_id: int,
+        post_key: str,
+        within_minutes: int
+    ) -> Optional[Dict[str, Any]]:
+        """Get the most recent successful embed of a post in a channel within a time window."""
+
+    @abstractmethod
+    async def get_original_user_from_webhook(self, webhook_message_id: int) -> Optional[int]:
+        """Get the original user ID from a webhook message ID."""
+
+    @abstractmethod
+    async def get_resolved_link(self, short_url: str) -> Optional[str]:
+        """Get the cached resolution of a share/short link."""
+
+    @abstractmethod
+    async def save_resolved_link(self, short_url: str, resolved_url: str):
+        """Cache the resolution of a share/short link."""
+
+    @abstractmethod
+    async def get_post_metadata(self, post_key: str) -> Optional[Dict[str, Any]]:
+        """Get cached metadata for a post."""
+
+    @abstractmethod
+    async def save_post_metadata(self, post_key: str, metadata: Dict[str, Any]):
+        """Cache metadata for a post."""
+
+    @abstractmethod
+    async def enqueue_embed_retry(
+        self,
+        message_id: int,
+        channel_id: int,
+        server_id: int,
+        user_id: int,
+        platform: str,
+        original_url: str,
+        post_key: Optional[str],
+        error: Optional[str],
+        delay_seconds: float
+    ):
+        """Queue a failed link for a deferred retry (no-op if it is already queued)."""
+
+    @abstractmethod
+    async def claim_embed_retries(
+        self,
+        platform: str,
+        limit: int,
+        lease_seconds: float
+    ) -> List[Dict[str, Any]]:
+        """Claim due retries, hiding them from other workers for the lease duration."""
+
+    @abstractmethod
+    async def reschedule_embed_retry(
+        self,
+        message_id: int,
+        error: Optional[str],
+        delay_seconds: float,
+        count_attempt: bool = True
+    ):
+        """Schedule the next retry of a queued link."""
+
+    @abstractmethod
+    async def delete_embed_retry(self, message_id: int):
+        """Remove a link from the retry queue."""
+
+    @abstractmethod
+    async def insert_link_jobs(self, jobs: List[Dict[str, Any]]):
+        """Insert a batch of link jobs in one round trip (duplicates are ignored)."""
+
+    @abstractmethod
+    async def claim_link_jobs(
+        self,
+        platform: str,
+        limit: int,
+        lease_seconds: float,
+        locked_by: str
+    ) -> List[Dict[str, Any]]:
+        """Claim the oldest unleased link jobs of a platform."""
+
+    @abstractmethod
+    async def delete_link_job(self, job_id: int):
+        """Acknowledge a processed link job."""
+
+    @abstractmethod
+    async def release_link_jobs(self, locked_by: str) -> int:
+        """Release the leases held by an instance so its jobs are picked up right away."""
+
+    @abstractmethod
+    async def get_queue_depths(self, server_id: int) -> Dict[str, int]:
+        """Count a server's links waiting in the durable queues."""
+
+    @abstractmethod
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool statistics."""
+
+    @abstractmethod
+    async def get_channel_watermarks(self) -> Dict[int, int]:
+        """Get the newest message ID seen in each channel."""
+
+    @abstractmethod
+    async def save_channel_watermarks(self, watermarks: Dict[int, tuple]):
+        """Advance channel watermarks in one round trip (never moves one backwards)."""
+
+    @abstractmethod
+    async def get_processed_message_ids(self, message_ids: List[int]) -> set:
+        """Get which of the given messages already have a message_data record."""
+
+    @abstractmethod
+    async def prune_cached_lookups(self, older_than_days: int) -> int:
+        """Delete cached link resolutions and post metadata older than a number of days."""
+
+    @abstractmethod
+    async def insert_audit_log(
+        self,
+        server_id: int,
+        user_id: int,
+        action: str,
+        target_type: str,
+        target_id: str,
+        details: Optional[Dict[str, Any]] = None
+    ):
+        """Insert audit log entry."""
+
+    @abstractmethod
+    async def get_bot_setting(self, key: str) -> Optional[str]:
+        """Get a bot setting value."""
+
+    @abstractmethod
+    async def set_bot_setting(self, key: str, value: str):
+        """Set a bot setting value."""
+
+    async def connect_dedicated(self) -> Any:
+        """
+        Open a connection outside the pool, for session-scoped state such as advisory locks.
+
+        Only shared (not single_node) backends need one: single-node backends elect
+        themselves leader without it.
+        """
+        raise NotImplementedError(f'{type(self).__name__} has no dedicated connections')
+
+
+def create_database(database_url: str) -> Storage:
+    """
+    Create the storage backend for a DATABASE_URL.
+
+    Args:
+        database_url: postgres://... or postgresql://... (Postgres, the default deployment),
+            sqlite:///path/to/gfcbot.db (single node, no network database) or
+            memory:// (nothing persisted; benchmarks and tests)
+
+    Returns:
+        Storage backend (Database, SqliteDatabase or MemoryDatabase)
+
+    Raises:
+        ValueError: If the URL is empty or its scheme is not supported
+    """
+    if not database_url:
+        raise ValueError("DATABASE_URL environment variable is not set!")
+    scheme = urlparse(database_url).scheme.lower()
+    if scheme in ('postgres', 'postgresql'):
+        # Imported here because every backend module imports Storage from this one
+        from utils.database import Database
+        return Database(database_url=database_url)
+    if scheme == 'sqlite':
+        # Imported lazily so Postgres deployments do not need aiosqlite installed
+        from utils.sqlite_database import SqliteDatabase
+        # sqlite:///relative.db and sqlite:////absolute/path.db, as in SQLAlchemy
+        path = database_url[len('sqlite:///'):] if database_url.startswith('sqlite:///') else ''
+        return SqliteDatabase(path)
+    if scheme == 'memory':
+        from utils.memory_database import MemoryDatabase
+        logger.warning('Using the in-memory database; nothing is persisted')
+        return MemoryDatabase(database_url)
+    raise ValueError(f"Unsupported DATABASE_URL scheme: {scheme or database_url!r}")
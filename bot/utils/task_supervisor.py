@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Awaitable, Callable, Dict, Any, Optional
+
+from utils.leader import LeaderElection
+from utils.metrics import Metrics
+
+logger = logging.getLogger('gfcbot.task_supervisor')
+
+# Crashed tasks restart after RESTART_BASE_DELAY * 2^n seconds (jittered, capped);
+# the backoff resets once a task has run for STABLE_AFTER seconds
+RESTART_BASE_DELAY = 1.0
+RESTART_MAX_DELAY = 60.0
+STABLE_AFTER = 60.0
+
+# Time allowed on SIGTERM for draining queues and flushing buffers
+SHUTDOWN_GRACE_SECONDS = float(os.getenv('SHUTDOWN_GRACE_SECONDS', '8'))
+
+
+class TaskSupervisor:
+    """
+    Runs named background loops: at most one live instance of each per process,
+    restarted with jittered exponential backoff when they crash.
+
+    Starting a name whose task is still running is a no-op, so event handlers
+    that fire repeatedly (on_ready on every reconnect, cog reloads) can start
+    their loops unconditionally. Cluster-wide singletons additionally only
+    run while this process holds a LeaderElection. On shutdown the registered
+    drain hooks get a grace period to finish queued work and flush buffers
+    before every task is cancelled.
+    """
+
+    def __init__(self, metrics: Optional[Metrics] = None):
+        """
+        Initialize task supervisor.
+
+        Args:
+            metrics: Metrics registry
+        """
+        self.metrics = metrics
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.restarts: Dict[str, int] = {}
+        self.last_errors: Dict[str, str] = {}
+        self.drain_hooks: Dict[str, Callable[[float], Awaitable]] = {}
+        self.draining = False
+
+    def start(self, name: str, factory: Callable[[], Awaitable], restart: bool = True) -> asyncio.Task:
+        """
+        Start a background loop unless one with this name is already running.
+
+        Args:
+            name: Unique task name
+            factory: Callable returning the coroutine to run
+            restart: Whether to restart the task when it raises
+
+        Returns:
+            The running task
+        """
+        task = self.tasks.get(name)
+        if task and not task.done():
+            return task
+        task = asyncio.get_running_loop().create_task(self._run(name, factory, restart), name=name)
+        self.tasks[name] = task
+        return task
+
+    def start_singleton(self, name: str, factory: Callable[[], Awaitable], election: LeaderElection) -> asyncio.Task:
+        """
+        Start a cluster-wide singleton: it runs only while this process is the leader.
+
+        Args:
+            name: Unique task name
+            factory: Callable returning the coroutine to run
+            election: Leader election gating the task
+
+        Returns:
+            The supervising task
+        """
+        return self.start(name, lambda: self._lead(name, factory, election))
+
+    def cancel(self, name: str):
+        """Cancel a background loop if it is running."""
+        task = self.tasks.pop(name, None)
+        if task and not task.done():
+            task.cancel()
+
+    def is_running(self, name: str) -> bool:
+        """Whether a background loop is running."""
+        task = self.tasks.get(name)
+        return bool(task and not task.done())
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Liveness, restart count and last error of every background loop."""
+        return {
+            name: {
+                'alive': not task.done(),
+                'restarts': self.restarts.get(name, 0),
+                'last_error': self.last_errors.get(name)
+            }
+            for name, task in self.tasks.items()
+        }
+
+    def add_drain_hook(self, name: str, hook: Callable[[float], Awaitable]):
+        """
+        Register work to finish on shutdown.
+
+        Args:
+            name: Unique hook name
+            hook: Callable taking the grace period in seconds and returning a coroutine;
+                it must return within that time
+        """
+        self.drain_hooks[name] = hook
+
+    def remove_drain_hook(self, name: str):
+        """Unregister a drain hook."""
+        self.drain_hooks.pop(name, None)
+
+    async def shutdown(self, grace: float = SHUTDOWN_GRACE_SECONDS):
+        """
+        Run the drain hooks within the grace period, then cancel every background loop.
+
+        Args:
+            grace: Seconds allowed for the drain hooks
+        """
+        self.draining = True
+        started = time.monotonic()
+        if self.drain_hooks:
+            hooks = list(self.drain_hooks.items())
+            try:
+                results = await asyncio.wait_for(
+                    asyncio.gather(*(hook(grace) for _, hook in hooks), return_exceptions=True),
+                    timeout=grace + 1
+                )
+                for (name, _), result in zip(hooks, results):
+                    if isinstance(result, Exception):
+                        logger.error(f'Drain hook {name} failed: {result}')
+            except asyncio.TimeoutError:
+                logger.warning(f'Drain hooks did not finish within {grace}s')
+        logger.info(f'Drained in {time.monotonic() - started:.1f}s; stopping {len(self.tasks)} background task(s)')
+
+        current = asyncio.current_task()
+        tasks = [task for task in self.tasks.values() if task is not current and not task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks, timeout=1)
+
+    async def _run(self, name: str, factory: Callable[[], Awaitable], restart: bool):
+        failures = 0
+        while True:
+            started = time.monotonic()
+            try:
+                await factory()
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f'Background task {name} crashed: {e}', exc_info=True)
+                self.last_errors[name] = f'{type(e).__name__}: {e}'
+                if self.metrics:
+                    self.metrics.incr('background_task_crashes_total', task=name)
+            if not restart or self.draining:
+                return
+            if time.monotonic() - started >= STABLE_AFTER:
+                failures = 0
+            delay = min(RESTART_MAX_DELAY, RESTART_BASE_DELAY * (2 ** failures)) * random.uniform(0.5, 1.0)
+            failures += 1
+            self.restarts[name] = self.restarts.get(name, 0) + 1
+            logger.warning(f'Restarting background task {name} in {delay:.1f}s (restart #{self.restarts[name]})')
+            await asyncio.sleep(delay)
+
+    async def _lead(self, name: str, factory: Callable[[], Awaitable], election: LeaderElection):
+        while True:
+            await election.wait_until_leader()
+            logger.info(f'Starting cluster singleton {name}')
+            job = asyncio.ensure_future(factory())
+            lost = asyncio.ensure_future(election.wait_until_follower())
+            try:
+                done, _ = await asyncio.wait({job, lost}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                job.cancel()
+                lost.cancel()
+            if job in done:
+                if job.exception():
+                    raise job.exception()  # type: ignore
+                return
+            logger.info(f'Stopped cluster singleton {name} (no longer leader)')
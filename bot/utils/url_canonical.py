@@ -0,0 +1,70 @@
+import re
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+
+# Host prefixes that refer to the same site
+HOST_VARIANT_PREFIXES = ('www.', 'mobile.', 'm.')
+
+INSTAGRAM_PATH_PATTERN = re.compile(r'^/(p|reels?|tv)/([a-zA-Z0-9_-]+)', re.IGNORECASE)
+TWITTER_PATH_PATTERN = re.compile(r'^/(\w+)/status(?:es)?/(\d+)', re.IGNORECASE)
+
+
+def _normalize_host(url: str) -> str:
+    host = (urlsplit(url).hostname or '').lower()
+    for variant in HOST_VARIANT_PREFIXES:
+        if host.startswith(variant):
+            return host[len(variant):]
+    return host
+
+
+def post_key(platform: str, post_id: str) -> str:
+    """Key identifying a post across URL variants, used for caches and message_data."""
+    return f'{platform}:{post_id}'
+
+
+def canonicalize_instagram_url(url: str) -> Optional[Tuple[str, str, str]]:
+    """
+    Canonicalize an Instagram post URL.
+
+    Drops tracking query params (e.g. ?igsh=), fragments, host case and
+    www./m. variants (canonical host is the bare instagram.com,
+    which every prefix service accepts), and maps /reels/ to /reel/.
+
+    Args:
+        url: Instagram URL as posted
+
+    Returns:
+        Tuple of (platform, post_id, canonical_url), or None if not a post URL
+    """
+    parts = urlsplit(url.strip())
+    match = INSTAGRAM_PATH_PATTERN.match(parts.path)
+    if not match or not _normalize_host(url).endswith('instagram.com'):
+        return None
+    kind = match.group(1).lower()
+    if kind == 'reels':
+        kind = 'reel'
+    post_id = match.group(2)
+    return 'instagram', post_id, f'https://instagram.com/{kind}/{post_id}/'
+
+
+def canonicalize_twitter_url(url: str) -> Optional[Tuple[str, str, str]]:
+    """
+    Canonicalize a Twitter/X status URL.
+
+    Drops tracking query params (e.g. ?s=20&t=...), fragments, host case and
+    www./mobile. variants while keeping the twitter.com / x.com domain family.
+
+    Args:
+        url: Twitter/X URL as posted
+
+    Returns:
+        Tuple of (platform, status_id, canonical_url), or None if not a status URL
+    """
+    parts = urlsplit(url.strip())
+    match = TWITTER_PATH_PATTERN.match(parts.path)
+    host = _normalize_host(url)
+    if not match or not (host.endswith('twitter.com') or host.endswith('x.com')):
+        return None
+    domain = 'twitter.com' if host.endswith('twitter.com') else 'x.com'
+    status_id = match.group(2)
+    return 'twitter', status_id, f'https://{domain}/{match.group(1)}/status/{status_id}'
@@ -0,0 +1,101 @@
+"""
+Embed worker processes for the split gateway/worker deployment.
+
+The gateway (main.py with PROCESS_ROLE=gateway) only classifies messages and
+queues link jobs in the link_jobs table. Each worker process logs in over
+REST only (no gateway connection), claims jobs from the queue, validates the
+links and replies/reposts through the REST API, so embed work never delays
+gateway heartbeats and can use more than one core.
+
+Usage:
+    python worker.py [--processes N]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+
+from dotenv import load_dotenv
+
+from utils.process_pool import ProcessPool
+
+logger = logging.getLogger('gfcbot.worker')
+
+# Cogs that consume link jobs
+WORKER_COGS = [
+    'cogs.instagram_embed',
+    'cogs.twitter_embed'
+]
+
+# Delay before restarting a worker process that exited unexpectedly
+RESTART_DELAY = 5
+
+
+def run_worker(index: int):
+    """Entry point of one worker process."""
+    # Must be set before the bot modules read their configuration
+    os.environ['PROCESS_ROLE'] = 'worker'
+    base_id = os.getenv('INSTANCE_ID') or socket.gethostname()
+    os.environ['INSTANCE_ID'] = f'{base_id}-worker-{index}'
+
+    import main
+    if main.USE_UVLOOP:
+        main.install_uvloop()
+    asyncio.run(_serve(main))
+
+
+async def _serve(main):
+    """Log in over REST and consume link jobs until SIGTERM/SIGINT."""
+    token = os.getenv('DISCORD_TOKEN')
+    if not token:
+        logger.error('DISCORD_TOKEN not found in environment variables')
+        return
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    bot = main.bot
+    async with bot:
+        if main.LOOP_MONITOR_ENABLED:
+            main.task_supervisor.start('loop_monitor', main.loop_monitor.run)
+        await main.http_client.start()
+        try:
+            await main.load_cogs(WORKER_COGS)
+            # REST-only: login() authenticates the HTTP client without opening a gateway connection
+            await bot.login(token)
+            logger.info(f'Worker {os.environ["INSTANCE_ID"]} logged in as {bot.user}')
+            main.startup.mark('ready')
+            await stop.wait()
+            logger.info(f'Worker {os.environ["INSTANCE_ID"]} stopping')
+            await main.task_supervisor.shutdown()
+        finally:
+            await main.http_client.close()
+            await main.db.close()
+
+
+def main():
+    """Start N worker processes and restart any that exit unexpectedly."""
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='GFC Bot embed workers')
+    parser.add_argument(
+        '--processes', type=int,
+        default=int(os.getenv('WORKER_PROCESSES', '2')),
+        help='Number of worker processes (default: WORKER_PROCESSES or 2)'
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    pool = ProcessPool('gfcbot-worker', restart_delay=RESTART_DELAY)
+    for index in range(args.processes):
+        pool.add(index, run_worker, (index,))
+    pool.run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,24 @@
+-- 023_add_embed_deadline.sql
+-- Per-server upper bound on time-to-embed for queued links
+
+ALTER TABLE instagram_embed_config
+ADD COLUMN embed_deadline_seconds INTEGER CHECK (
+    embed_deadline_seconds IS NULL
+    OR (
+        embed_deadline_seconds > 0
+        AND embed_deadline_seconds <= 120
+    )
+);
+
+ALTER TABLE twitter_embed_config
+ADD COLUMN embed_deadline_seconds INTEGER CHECK (
+    embed_deadline_seconds IS NULL
+    OR (
+        embed_deadline_seconds > 0
+        AND embed_deadline_seconds <= 120
+    )
+);
+
+COMMENT ON COLUMN instagram_embed_config.embed_deadline_seconds IS 'Max seconds from detection to embed before the link is finalized as timeout (NULL uses the bot default)';
+
+COMMENT ON COLUMN twitter_embed_config.embed_deadline_seconds IS 'Max seconds from detection to embed before the link is finalized as timeout (NULL uses the bot default)';
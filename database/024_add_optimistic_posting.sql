@@ -0,0 +1,12 @@
+-- 024_add_optimistic_posting.sql
+-- Allow posting before validation completes when the top prefix is reliably healthy
+
+ALTER TABLE instagram_embed_config
+ADD COLUMN optimistic_posting_enabled BOOLEAN DEFAULT false;
+
+ALTER TABLE twitter_embed_config
+ADD COLUMN optimistic_posting_enabled BOOLEAN DEFAULT false;
+
+COMMENT ON COLUMN instagram_embed_config.optimistic_posting_enabled IS 'Post immediately with a healthy top prefix and verify in the background';
+
+COMMENT ON COLUMN twitter_embed_config.optimistic_posting_enabled IS 'Post immediately with a healthy top prefix and verify in the background';
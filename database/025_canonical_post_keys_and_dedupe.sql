@@ -0,0 +1,24 @@
+-- 025_canonical_post_keys_and_dedupe.sql
+-- Canonical (platform:post_id) keys on message_data and per-channel repost dedupe window
+
+ALTER TABLE message_data ADD COLUMN post_key VARCHAR(100);
+
+CREATE INDEX idx_message_data_channel_post_key ON message_data (channel_id, post_key, created_at DESC);
+
+COMMENT ON COLUMN message_data.post_key IS 'Canonical post key (platform:post_id) shared by all URL variants of a post';
+
+ALTER TABLE instagram_embed_config
+ADD COLUMN repost_dedupe_minutes INTEGER DEFAULT 0 CHECK (
+    repost_dedupe_minutes >= 0
+    AND repost_dedupe_minutes <= 1440
+);
+
+ALTER TABLE twitter_embed_config
+ADD COLUMN repost_dedupe_minutes INTEGER DEFAULT 0 CHECK (
+    repost_dedupe_minutes >= 0
+    AND repost_dedupe_minutes <= 1440
+);
+
+COMMENT ON COLUMN instagram_embed_config.repost_dedupe_minutes IS 'If > 0, point to the earlier embed when the same post is shared in a channel within this many minutes';
+
+COMMENT ON COLUMN twitter_embed_config.repost_dedupe_minutes IS 'If > 0, point to the earlier embed when the same post is shared in a channel within this many minutes';
@@ -0,0 +1,12 @@
+-- 026_resolved_links.sql
+-- Cache of share/short links resolved to their canonical post URL
+
+CREATE TABLE IF NOT EXISTS resolved_links (
+    short_url TEXT PRIMARY KEY,
+    resolved_url TEXT NOT NULL,
+    resolved_at TIMESTAMP
+    WITH
+        TIME ZONE DEFAULT NOW()
+);
+
+COMMENT ON TABLE resolved_links IS 'Share and shortened links (e.g. instagram.com/share/..., t.co) resolved by following redirects';
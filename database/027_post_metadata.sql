@@ -0,0 +1,19 @@
+-- 027_post_metadata.sql
+-- Cached post metadata used to build native embeds when every prefix fails
+
+CREATE TABLE IF NOT EXISTS post_metadata (
+    post_key VARCHAR(100) PRIMARY KEY,
+    title TEXT,
+    author TEXT,
+    description TEXT,
+    media_url TEXT,
+    media_type VARCHAR(20),
+    source VARCHAR(20) NOT NULL,
+    fetched_at TIMESTAMP
+    WITH
+        TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_post_metadata_fetched_at ON post_metadata (fetched_at);
+
+COMMENT ON TABLE post_metadata IS 'Title, author and media of posts (platform:post_id) from provider APIs or og: tags';
@@ -0,0 +1,24 @@
+-- 028_embed_retry_queue.sql
+-- Deferred retries for links whose embed prefixes all failed
+
+CREATE TABLE IF NOT EXISTS embed_retry_queue (
+    message_id BIGINT PRIMARY KEY,
+    channel_id BIGINT NOT NULL,
+    server_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    platform VARCHAR(20) NOT NULL,
+    original_url TEXT NOT NULL,
+    post_key VARCHAR(100),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    first_failed_at TIMESTAMP
+    WITH
+        TIME ZONE DEFAULT NOW(),
+        next_attempt_at TIMESTAMP
+    WITH
+        TIME ZONE NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_embed_retry_queue_due ON embed_retry_queue (platform, next_attempt_at);
+
+COMMENT ON TABLE embed_retry_queue IS 'Failed links re-validated with exponential backoff until a prefix recovers or the max age passes';
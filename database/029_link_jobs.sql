@@ -0,0 +1,25 @@
+-- 029_link_jobs.sql
+-- Durable queue of detected links awaiting validation (ids only; the message is fetched by the worker)
+
+CREATE TABLE IF NOT EXISTS link_jobs (
+    id BIGSERIAL PRIMARY KEY,
+    platform VARCHAR(20) NOT NULL,
+    message_id BIGINT NOT NULL,
+    channel_id BIGINT NOT NULL,
+    server_id BIGINT NOT NULL,
+    original_url TEXT NOT NULL,
+    post_id VARCHAR(100) NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    locked_by VARCHAR(100),
+    locked_until TIMESTAMP
+    WITH
+        TIME ZONE,
+        enqueued_at TIMESTAMP
+    WITH
+        TIME ZONE DEFAULT NOW(),
+        UNIQUE (message_id, platform)
+);
+
+CREATE INDEX IF NOT EXISTS idx_link_jobs_platform_id ON link_jobs (platform, id);
+
+COMMENT ON TABLE link_jobs IS 'Links awaiting validation; claimed with a lease (locked_until) and deleted once processed';
@@ -0,0 +1,13 @@
+-- 030_channel_watermarks.sql
+-- Per-channel high-water message IDs used to backfill messages missed while disconnected
+
+CREATE TABLE IF NOT EXISTS channel_watermarks (
+    channel_id BIGINT PRIMARY KEY,
+    server_id BIGINT NOT NULL,
+    last_message_id BIGINT NOT NULL,
+    updated_at TIMESTAMP
+    WITH
+        TIME ZONE DEFAULT NOW()
+);
+
+COMMENT ON TABLE channel_watermarks IS 'ID of the newest message seen in each channel; backfill fetches history after it';